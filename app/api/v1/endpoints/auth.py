@@ -1,38 +1,60 @@
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.security import OAuth2PasswordRequestForm
-from app.core.deps import get_cursor, get_current_user_id
-from app.core.security import verify_password, create_access_token
+from app.core.deps import get_cursor, get_async_cursor, async_cursor_scope, get_current_user_id
+from app.core.sessions import revoke_sessions
+from app.core.security import verify_password_async, get_password_hash_async, needs_rehash, create_access_token
 from app.schemas.user import UserCreate, UserOut, UserUpdate
 from app.schemas.token import Token
-from app.crud import user as user_crud
+from app.repository import user as user_crud
 
 router = APIRouter()
 
+# Password hashing runs on the dedicated bcrypt pool, so these handlers are async
+# and never hold a threadpool slot while waiting for it. Nor do they hold a
+# database connection: the async pool is shared with feed, profile and
+# notification reads, so the queries get short scopes on either side of the hash.
 @router.post("/register", status_code=201)
-def register(user: UserCreate, cursor=Depends(get_cursor)):
-    # Check if email is taken
-    if user_crud.get_user_by_email_or_username(cursor, user.email):
-        raise HTTPException(status_code=400, detail="Email already exists")
-        
-    # Check if username is taken
-    if user_crud.get_user_by_email_or_username(cursor, user.username):
-        raise HTTPException(status_code=400, detail="Username already exists")
-    
-    user_crud.create_user(cursor, user)
+async def register(user: UserCreate):
+    async with async_cursor_scope() as cursor:
+        # Check if email is taken
+        if await user_crud.get_user_by_email_or_username_async(cursor, user.email):
+            raise HTTPException(status_code=400, detail="Email already exists")
+
+        # Check if username is taken
+        if await user_crud.get_user_by_email_or_username_async(cursor, user.username):
+            raise HTTPException(status_code=400, detail="Username already exists")
+
+    hashed_pw = await get_password_hash_async(user.password)
+    async with async_cursor_scope() as cursor:
+        await user_crud.create_user_async(cursor, user, hashed_pw)
     return {"message": "User registered successfully"}
 
 @router.post("/token", response_model=Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), cursor=Depends(get_cursor)):
-    user = user_crud.get_user_by_email_or_username(cursor, form_data.username)
-    if not user or not verify_password(form_data.password, user[1]):
+async def login(form_data: OAuth2PasswordRequestForm = Depends()):
+    async with async_cursor_scope() as cursor:
+        user = await user_crud.get_user_by_email_or_username_async(cursor, form_data.username)
+    if not user or not await verify_password_async(form_data.password, user[1]):
         raise HTTPException(status_code=400, detail="Invalid credentials")
+
+    # Upgrade hashes made with an older BCRYPT_ROUNDS while we have the plain password
+    if needs_rehash(user[1]):
+        new_hash = await get_password_hash_async(form_data.password)
+        async with async_cursor_scope() as cursor:
+            await user_crud.update_password_hash_async(cursor, user[0], new_hash)
     
-    access_token = create_access_token(data={"sub": user[0]})
+    # sv ties the token to the current session version (see app/core/sessions.py)
+    access_token = create_access_token(data={"sub": user[0], "sv": user[2]})
     return {"access_token": access_token, "token_type": "bearer"}
 
+@router.post("/logout")
+def logout(user_id: str = Depends(get_current_user_id), cursor=Depends(get_cursor)):
+    """Revokes every token issued to the user so far (all devices)."""
+    revoke_sessions(cursor, user_id)
+    return {"success": True}
+
 @router.get("/me", response_model=UserOut)
-def get_me(user_id: str = Depends(get_current_user_id), cursor=Depends(get_cursor)):
-    user = user_crud.get_user_profile(cursor, user_id)
+async def get_me(user_id: str = Depends(get_current_user_id), cursor=Depends(get_async_cursor)):
+    user = await user_crud.get_user_profile_async(cursor, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
@@ -1,19 +1,92 @@
-from fastapi import APIRouter, Depends
-from typing import List
+import asyncio
+import json
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
 from pydantic import BaseModel
-from app.core.deps import get_cursor, get_current_user_id
-from app.crud import notification as notif_crud
+from app.core import push
+from app.core.config import settings
+from app.core.deps import get_cursor, get_async_cursor, get_current_user_id, get_stream_token, verify_token
+from app.core.http_cache import json_response
+from app.core.pagination import PageParams, get_seq_page_params
+from app.repository import notification as notif_crud
 
 router = APIRouter()
 
 class MarkReadSchema(BaseModel):
     ids: List[str]
 
+class MarkAllReadSchema(BaseModel):
+    upTo: Optional[int] = None  # highest `seq` among the notifications the client has seen
+
 @router.get("/")
-def get_user_notifications(user_id: str = Depends(get_current_user_id), cursor=Depends(get_cursor)):
-    return notif_crud.get_notifications(cursor, user_id)
+async def get_user_notifications(
+    page: PageParams = Depends(get_seq_page_params),
+    user_id: str = Depends(get_current_user_id),
+    cursor=Depends(get_async_cursor),
+):
+    notifications, next_cursor = await notif_crud.get_notifications_async(cursor, user_id, page)
+    return json_response({"notifications": notifications, "nextCursor": next_cursor})
+
+@router.get("/unread-count")
+async def get_unread_count(user_id: str = Depends(get_current_user_id), cursor=Depends(get_async_cursor)):
+    return {"count": await notif_crud.get_unread_count_async(cursor, user_id)}
+
+async def _still_authorized(token: str) -> bool:
+    try:
+        return await verify_token(token) is not None
+    except HTTPException:
+        # The session couldn't be checked (database busy): close, the client reconnects
+        return False
+
+async def _event_stream(user_id: str, token: str):
+    """Server-Sent Events: one `notification` event per new notification, a comment
+    line as heartbeat, and `overflow` before closing when the client fell behind."""
+    sub = push.subscribe(user_id)
+    loop = asyncio.get_running_loop()
+    try:
+        yield "retry: 5000\n\n"
+        verify_at = loop.time() + settings.PUSH_HEARTBEAT_SECONDS
+        while True:
+            # On the clock, not only when idle: a busy stream must stop too once
+            # the token expires or the session is revoked
+            if loop.time() >= verify_at:
+                if not await _still_authorized(token):
+                    return
+                verify_at = loop.time() + settings.PUSH_HEARTBEAT_SECONDS
+                yield ": heartbeat\n\n"
+            try:
+                event = await asyncio.wait_for(sub.queue.get(), verify_at - loop.time())
+            except asyncio.TimeoutError:
+                continue
+            if event is push.OVERFLOW:
+                yield "event: overflow\ndata: {}\n\n"
+                return
+            yield f"event: notification\ndata: {json.dumps(event, separators=(',', ':'))}\n\n"
+    finally:
+        push.unsubscribe(sub)
+
+@router.get("/stream")
+async def stream_notifications(token: str = Depends(get_stream_token)):
+    user_id = await verify_token(token)
+    if user_id is None:
+        raise HTTPException(status_code=401, detail="Could not validate credentials")
+    return StreamingResponse(
+        _event_stream(user_id, token),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 @router.post("/mark-read")
 def mark_read(payload: MarkReadSchema, user_id: str = Depends(get_current_user_id), cursor=Depends(get_cursor)):
     notif_crud.mark_read(cursor, user_id, payload.ids)
-    return {"success": True}
\ No newline at end of file
+    return {"success": True}
+
+@router.post("/mark-all-read")
+def mark_all_read(
+    payload: Optional[MarkAllReadSchema] = None,
+    user_id: str = Depends(get_current_user_id),
+    cursor=Depends(get_cursor),
+):
+    updated = notif_crud.mark_all_read(cursor, user_id, payload.upTo if payload else None)
+    return {"success": True, "updated": updated}
@@ -1,42 +1,79 @@
-from fastapi import APIRouter, Depends, HTTPException
-from app.core.deps import get_cursor, get_current_user_id
+from fastapi import APIRouter, Depends, HTTPException, Request
+from app.core.cache import TTLCache, SingleFlight
+from app.core.config import settings
+from app.core.deps import get_cursor, get_async_cursor, async_cursor_scope, get_current_user_id
+from app.core.http_cache import make_etag, etag_matches, render_json, json_response, conditional_response
+from app.core.pagination import PageParams, get_page_params
 from app.schemas.post import PostCreate, CommentCreate
-from app.crud import post as post_crud
-from app.crud import notification as notif_crud
+from app.repository import post as post_crud
 
 router = APIRouter()
 
+# The global feed is the same for every viewer: keep rendered pages for a moment
+# and let concurrent misses share one render.
+_feed_microcache = TTLCache("feed_pages", settings.FEED_MICROCACHE_SIZE, settings.FEED_MICROCACHE_TTL_SECONDS)
+_feed_renders = SingleFlight()
+
+async def _render_feed(page: PageParams, cursor) -> bytes:
+    posts, next_cursor = await post_crud.get_feed_async(cursor, page)
+    return render_json({"posts": posts, "nextCursor": next_cursor})
+
 @router.get("/")
-def get_posts(cursor=Depends(get_cursor)):
-    # Returns the list of dicts directly from CRUD
-    return post_crud.get_feed(cursor)
+async def get_posts(request: Request, page: PageParams = Depends(get_page_params)):
+    cached = _feed_microcache.get(page)
+    if cached:
+        etag, body = cached
+        return conditional_response(request, etag, body)
+
+    async with async_cursor_scope() as cursor:
+        etag = make_etag("feed", page, await post_crud.get_feed_version_async(cursor, page))
+        if etag_matches(request, etag):
+            return conditional_response(request, etag)
+        body = await _feed_renders.do((page, etag), lambda: _render_feed(page, cursor))
+    _feed_microcache.set(page, (etag, body))
+    return conditional_response(request, etag, body)
+
+@router.get("/timeline")
+async def get_home_timeline(
+    page: PageParams = Depends(get_page_params),
+    user_id: str = Depends(get_current_user_id),
+    cursor=Depends(get_async_cursor),
+):
+    posts, next_cursor = await post_crud.get_home_timeline_async(cursor, user_id, page)
+    return json_response({"posts": posts, "nextCursor": next_cursor})
 
 @router.post("/")
 def create_post(post: PostCreate, user_id: str = Depends(get_current_user_id), cursor=Depends(get_cursor)):
     pid = post_crud.create_post(cursor, user_id, post.content, post.image)
     return {"success": True, "id": pid}
 
+def _set_like(cursor, user_id: str, post_id: str, liked: bool | None):
+    # Existence check, toggle, counter update and the author's notification
+    # (for a new like) happen in one round trip
+    author_id, liked, changed = post_crud.set_like(cursor, user_id, post_id, liked)
+    if author_id is None:
+        raise HTTPException(status_code=404, detail="Post not found")
+    return {"success": True, "liked": liked}
+
 @router.post("/{post_id}/like")
 def like_post(post_id: str, user_id: str = Depends(get_current_user_id), cursor=Depends(get_cursor)):
-    # 1. Get the post to find its author
-    post = post_crud.get_post_by_id(cursor, post_id)
-    if not post:
-        raise HTTPException(status_code=404, detail="Post not found")
+    """Toggles the like."""
+    return _set_like(cursor, user_id, post_id, None)
 
-    # 2. Toggle the like status in the database
-    liked = post_crud.toggle_like(cursor, user_id, post_id)
+@router.put("/{post_id}/like")
+def put_like(post_id: str, user_id: str = Depends(get_current_user_id), cursor=Depends(get_cursor)):
+    """Idempotent like: repeating it is a no-op."""
+    return _set_like(cursor, user_id, post_id, True)
 
-    # 3. If a new like was added (not an unlike), create a notification
-    if liked:
-        notif_crud.create_notification(
-            cursor,
-            type_n="LIKE",
-            user_id=post["author_id"],  # The user to notify is the post's author
-            creator_id=user_id,         # The user who performed the action
-            post_id=post_id
-        )
+@router.delete("/{post_id}/like")
+def delete_like(post_id: str, user_id: str = Depends(get_current_user_id), cursor=Depends(get_cursor)):
+    """Idempotent unlike."""
+    return _set_like(cursor, user_id, post_id, False)
 
-    return {"success": True, "liked": liked}
+@router.get("/{post_id}/comments")
+async def get_post_comments(post_id: str, page: PageParams = Depends(get_page_params), cursor=Depends(get_async_cursor)):
+    comments, next_cursor = await post_crud.get_comments_async(cursor, post_id, page)
+    return json_response({"comments": comments, "nextCursor": next_cursor})
 
 @router.post("/{post_id}/comments")
 def create_comment_on_post(
@@ -45,21 +82,11 @@ def create_comment_on_post(
     user_id: str = Depends(get_current_user_id),
     cursor=Depends(get_cursor),
 ):
-    post = post_crud.get_post_by_id(cursor, post_id)
-    if not post:
+    # Also notifies the post's author
+    created = post_crud.create_comment(cursor, user_id, post_id, comment.content)
+    if created is None:
         raise HTTPException(status_code=404, detail="Post not found")
-
-    comment_id = post_crud.create_comment(cursor, user_id, post_id, comment.content)
-
-    notif_crud.create_notification(
-        cursor,
-        type_n="COMMENT",
-        user_id=post["author_id"],
-        creator_id=user_id,
-        post_id=post_id,
-        comment_id=comment_id,
-    )
-
+    comment_id, _ = created
     return {"success": True, "comment_id": comment_id}
 
 @router.delete("/{post_id}", status_code=200)
@@ -1,39 +1,126 @@
-from fastapi import APIRouter, Depends, HTTPException
+import itertools
+import logging
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from typing import Optional
-from app.core.deps import get_cursor, get_optional_user_id, get_current_user_id
-from app.crud import user as user_crud
-from app.crud import post as post_crud
-from app.crud import notification as notif_crud
+from app.core.config import settings
+from app.core.database import get_db_connection, PoolTimeoutError
+from app.core.deps import get_cursor, get_async_cursor, async_cursor_scope, get_optional_user_id, get_current_user_id
+from app.core.http_cache import make_etag, etag_matches, render_json, json_response, conditional_response
+from app.core.pagination import PageParams, get_page_params
+from app.repository import user as user_crud
+from app.repository import post as post_crud
+from app.repository import export as export_crud
+from app.repository import suggestion as suggestion_crud
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 @router.get("/suggestions")
-def get_suggestions(cursor=Depends(get_cursor), user_id: Optional[str] = Depends(get_optional_user_id)):
-    return user_crud.get_random_users(cursor, user_id)
+async def get_suggestions(user_id: Optional[str] = Depends(get_optional_user_id)):
+    # Precomputed lists are usually cached: only a miss checks out a connection
+    cached = suggestion_crud.cached_suggestions(user_id)
+    if cached is not None:
+        return cached
+    async with async_cursor_scope() as cursor:
+        return await suggestion_crud.get_suggestions_async(cursor, user_id)
 
 @router.get("/{username}")
-def get_profile(username: str, cursor=Depends(get_cursor)):
-    user = user_crud.get_profile_by_username(cursor, username)
+async def get_profile(request: Request, username: str, cursor=Depends(get_async_cursor)):
+    user = await user_crud.get_profile_by_username_async(cursor, username)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    return user
+    # Profiles are usually served from cache, so hashing the profile itself is cheap
+    return conditional_response(request, make_etag("profile", user), render=lambda: render_json(user))
 
 # THESE ARE THE MISSING ROUTES FOR PROFILE TABS
 @router.get("/{user_id}/posts")
-def get_user_posts(user_id: str, cursor=Depends(get_cursor)):
-    return post_crud.get_posts_by_author(cursor, user_id)
+async def get_user_posts(
+    request: Request,
+    user_id: str,
+    page: PageParams = Depends(get_page_params),
+    cursor=Depends(get_async_cursor),
+):
+    version = await post_crud.get_posts_by_author_version_async(cursor, user_id, page)
+    etag = make_etag("author_posts", user_id, page, version)
+    if etag_matches(request, etag):
+        return conditional_response(request, etag)
+
+    posts, next_cursor = await post_crud.get_posts_by_author_async(cursor, user_id, page)
+    return conditional_response(request, etag, render_json({"posts": posts, "nextCursor": next_cursor}))
 
 @router.get("/{user_id}/likes")
-def get_user_liked_posts(user_id: str, cursor=Depends(get_cursor)):
-    return post_crud.get_posts_liked_by_user(cursor, user_id)
+async def get_user_liked_posts(user_id: str, page: PageParams = Depends(get_page_params), cursor=Depends(get_async_cursor)):
+    posts, next_cursor = await post_crud.get_posts_liked_by_user_async(cursor, user_id, page)
+    return json_response({"posts": posts, "nextCursor": next_cursor})
 
 @router.get("/{target_id}/is_following")
 def check_follow(target_id: str, user_id: str = Depends(get_current_user_id), cursor=Depends(get_cursor)):
     return {"is_following": user_crud.is_following(cursor, user_id, target_id)}
 
+def _set_follow(cursor, user_id: str, target_id: str, following: bool | None):
+    is_following, changed = user_crud.set_follow(cursor, user_id, target_id, following)
+    if is_following is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return {"success": True, "following": is_following}
+
 @router.post("/{target_id}/follow")
 def follow_user(target_id: str, user_id: str = Depends(get_current_user_id), cursor=Depends(get_cursor)):
-    is_following = user_crud.toggle_follow(cursor, user_id, target_id)
-    if is_following:
-        notif_crud.create_notification(cursor, "FOLLOW", target_id, user_id)
-    return {"success": True, "following": is_following}
\ No newline at end of file
+    """Toggles the follow."""
+    return _set_follow(cursor, user_id, target_id, None)
+
+@router.put("/{target_id}/follow")
+def put_follow(target_id: str, user_id: str = Depends(get_current_user_id), cursor=Depends(get_cursor)):
+    """Idempotent follow: repeating it is a no-op."""
+    return _set_follow(cursor, user_id, target_id, True)
+
+@router.delete("/{target_id}/follow")
+def delete_follow(target_id: str, user_id: str = Depends(get_current_user_id), cursor=Depends(get_cursor)):
+    """Idempotent unfollow."""
+    return _set_follow(cursor, user_id, target_id, False)
+
+def _ndjson_export(conn, cursor, records):
+    """Yields NDJSON in chunks of EXPORT_ARRAYSIZE lines (one threadpool hop per
+    chunk, not per row), then releases the connection. A failure after the 200
+    went out ends the body with an error record instead of just stopping."""
+    try:
+        chunk = []
+        for record in records:
+            chunk.append(render_json(record) + b"\n")
+            if len(chunk) >= settings.EXPORT_ARRAYSIZE:
+                yield b"".join(chunk)
+                chunk = []
+        if chunk:
+            yield b"".join(chunk)
+    except Exception:
+        logger.exception("Export failed while streaming")
+        yield render_json({"type": "error", "detail": "Export interrupted, try again"}) + b"\n"
+    finally:
+        cursor.close()
+        conn.close()
+
+@router.get("/{user_id}/export")
+def export_user_data(user_id: str, current_user_id: str = Depends(get_current_user_id)):
+    if user_id != current_user_id:
+        raise HTTPException(status_code=403, detail="You can only export your own data")
+    # Connection and first query happen here, so failures still get an error status
+    try:
+        conn = get_db_connection()
+    except PoolTimeoutError:
+        raise HTTPException(status_code=503, detail="Database busy, try again")
+    cursor = conn.cursor()
+    try:
+        records = export_crud.iter_user_export(cursor, user_id)
+        first = next(records, None)
+    except Exception:
+        cursor.close()
+        conn.close()
+        raise
+    if first is not None:
+        records = itertools.chain([first], records)
+    return StreamingResponse(
+        _ndjson_export(conn, cursor, records),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="socially-export-{user_id}.ndjson"'},
+    )
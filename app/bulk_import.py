@@ -0,0 +1,372 @@
+"""Bulk loader for data exported from the previous Prisma/PostgreSQL backend.
+
+Reads one dump file per table from a directory (users, posts, comments, likes,
+follows, notifications; each as .jsonl/.ndjson, .json or .csv) and inserts it
+with executemany in batches, committing every batch and recording progress in
+a checkpoint file so an interrupted run resumes where it stopped. Field names
+may be Prisma's camelCase (authorId, createdAt) or the column names used here.
+
+On Oracle, foreign keys and non-unique indexes of the loaded tables are
+switched off for the load and re-enabled (and validated/rebuilt) afterwards,
+then counters, home timelines and follow suggestions are recomputed; they are
+recomputed on the embedded SQLite schema (DB_BACKEND=sqlite) too. Any other
+DB-API connection with named-bind support can be used as a stand-in target.
+
+    python app/bulk_import.py ./dump --batch-size 5000
+"""
+import argparse
+import csv
+import json
+import oracledb
+import sqlite3
+import sys
+import os
+import time
+from datetime import datetime, timezone
+
+# Add backend directory to python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.core.database import get_db_connection
+from app.crud import counters as counters_crud
+from app.crud import suggestion as suggestion_crud
+from app.crud import timeline as timeline_crud
+from app.crud.sqlite import counters as sqlite_counters_crud
+from app.crud.sqlite import suggestion as sqlite_suggestion_crud
+from app.crud.sqlite import timeline as sqlite_timeline_crud
+from app.crud.content import split_content
+
+# Load order respects foreign keys. Each column lists the field names accepted
+# for it in the dump, first match wins.
+TABLES = {
+    "users": {
+        "id": ("id",),
+        "email": ("email",),
+        "username": ("username",),
+        "password_hash": ("password_hash", "passwordHash", "password"),
+        "name": ("name",),
+        "bio": ("bio",),
+        "image": ("image",),
+        "location": ("location",),
+        "website": ("website",),
+        "created_at": ("created_at", "createdAt"),
+        "updated_at": ("updated_at", "updatedAt"),
+    },
+    "posts": {
+        "id": ("id",),
+        "author_id": ("author_id", "authorId"),
+        "content": ("content",),
+        "image": ("image",),
+        "created_at": ("created_at", "createdAt"),
+        "updated_at": ("updated_at", "updatedAt"),
+    },
+    "comments": {
+        "id": ("id",),
+        "author_id": ("author_id", "authorId"),
+        "post_id": ("post_id", "postId"),
+        "content": ("content",),
+        "created_at": ("created_at", "createdAt"),
+    },
+    "likes": {
+        "id": ("id",),
+        "user_id": ("user_id", "userId"),
+        "post_id": ("post_id", "postId"),
+        "created_at": ("created_at", "createdAt"),
+    },
+    "follows": {
+        "follower_id": ("follower_id", "followerId"),
+        "following_id": ("following_id", "followingId"),
+        "created_at": ("created_at", "createdAt"),
+    },
+    "notifications": {
+        "id": ("id",),
+        "user_id": ("user_id", "userId"),
+        "creator_id": ("creator_id", "creatorId"),
+        "type": ("type",),
+        "read_status": ("read_status", "read"),
+        "post_id": ("post_id", "postId"),
+        "comment_id": ("comment_id", "commentId"),
+        "created_at": ("created_at", "createdAt"),
+    },
+}
+
+_EXTENSIONS = (".jsonl", ".ndjson", ".json", ".csv")
+
+def _find_dump(directory: str, table: str) -> str | None:
+    for ext in _EXTENSIONS:
+        path = os.path.join(directory, table + ext)
+        if os.path.exists(path):
+            return path
+    return None
+
+def read_records(path: str):
+    """Yields dicts from a dump file; .jsonl and .csv are streamed line by line,
+    a .json array is loaded whole (prefer .jsonl for large tables)."""
+    if path.endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as f:
+            for record in csv.DictReader(f):
+                # CSV has no NULL: empty cells become None
+                yield {k: (v if v != "" else None) for k, v in record.items()}
+    elif path.endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            yield from json.load(f)
+    else:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+def _timestamp(value):
+    """ISO-8601 (Prisma writes UTC with a Z suffix) -> naive UTC datetime."""
+    if value is None:
+        return datetime.utcnow()
+    if isinstance(value, datetime):
+        dt = value
+    else:
+        dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+def _flag(value) -> int:
+    if isinstance(value, str):
+        return 1 if value.strip().lower() in ("1", "true", "t", "yes") else 0
+    return 1 if value else 0
+
+def to_row(table: str, record: dict) -> dict:
+    """Maps one dump record onto the bind values for insert_sql(table)."""
+    row = {}
+    for column, sources in TABLES[table].items():
+        row[column] = next((record[s] for s in sources if s in record), None)
+    for column in row:
+        if column.endswith("_at"):
+            row[column] = _timestamp(row[column])
+    if "content" in row:
+        row["content_text"], row["content"] = split_content(row["content"])
+    if table == "notifications":
+        row["read_status"] = _flag(row["read_status"])
+        # Imported history isn't coalesced: one actor per row
+        row["recent_actor_ids"] = row["creator_id"]
+    return row
+
+def insert_sql(table: str) -> str:
+    columns = list(TABLES[table])
+    if "content" in columns:
+        columns.append("content_text")
+    if table == "notifications":
+        columns.append("recent_actor_ids")
+    binds = ", ".join(f":{c}" for c in columns)
+    return f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({binds})"
+
+def _is_oracle(conn) -> bool:
+    return isinstance(conn, oracledb.Connection)
+
+def _derived_data_crud(conn):
+    """(counters, timeline, suggestion) modules for the target's schema, or None if it has none."""
+    if _is_oracle(conn):
+        return counters_crud, timeline_crud, suggestion_crud
+    if isinstance(conn, sqlite3.Connection):
+        return sqlite_counters_crud, sqlite_timeline_crud, sqlite_suggestion_crud
+    return None
+
+class Checkpoint:
+    """Rows committed per table, persisted as JSON after every commit."""
+
+    def __init__(self, path: str | None):
+        self.path = path
+        self.done: dict[str, int] = {}
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.done = json.load(f)
+
+    def get(self, table: str) -> int:
+        return self.done.get(table, 0)
+
+    def save(self, table: str, rows: int):
+        self.done[table] = rows
+        if self.path:
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.done, f)
+            os.replace(tmp, self.path)  # atomic: a crash never leaves half a file
+
+def _input_sizes(table: str) -> dict:
+    # Keep microseconds (a datetime bind would otherwise go in as DATE) and
+    # send overflow text as CLOB
+    sizes = {c: oracledb.DB_TYPE_TIMESTAMP for c in TABLES[table] if c.endswith("_at")}
+    if "content" in TABLES[table]:
+        sizes["content"] = oracledb.DB_TYPE_CLOB
+    return sizes
+
+# Columns identifying a row that a previous run may already have committed
+_PRIMARY_KEYS = {"follows": ("follower_id", "following_id")}
+
+def _already_loaded(cursor, table: str, row: dict) -> bool:
+    columns = _PRIMARY_KEYS.get(table, ("id",))
+    where = " AND ".join(f"{c} = :{c}" for c in columns)
+    cursor.execute(f"SELECT 1 FROM {table} WHERE {where}", {c: row[c] for c in columns})
+    return cursor.fetchone() is not None
+
+def _insert_batch(conn, cursor, table: str, batch: list[dict]) -> int:
+    """Returns rows inserted. Rows whose primary key is already present (the
+    batch committed before the checkpoint was written) are skipped; any other
+    constraint violation, e.g. a duplicate email under a new id, fails the run."""
+    sql = insert_sql(table)
+    if _is_oracle(conn):
+        cursor.setinputsizes(**_input_sizes(table))
+        cursor.executemany(sql, batch, batcherrors=True)
+        errors = cursor.getbatcherrors()
+        for e in errors:
+            # ORA-00001 is raised for unique keys too, not only the primary key
+            if e.code != 1 or not _already_loaded(cursor, table, batch[e.offset]):
+                raise oracledb.DatabaseError(f"row {e.offset}: {e.message}")
+        return len(batch) - len(errors)
+    try:
+        cursor.executemany(sql, batch)
+        return len(batch)
+    except conn.IntegrityError:
+        conn.rollback()
+        inserted = 0
+        for offset, row in enumerate(batch):
+            try:
+                cursor.execute(sql, row)
+                inserted += 1
+            except conn.IntegrityError as e:
+                if not _already_loaded(cursor, table, row):
+                    raise conn.IntegrityError(f"row {offset}: {e}") from e
+        return inserted
+
+def load_table(conn, table: str, records, batch_size: int, checkpoint: Checkpoint) -> tuple[int, float]:
+    """Loads `records` into `table`, skipping those a previous run committed.
+    Returns (rows inserted, seconds)."""
+    cursor = conn.cursor()
+    done = checkpoint.get(table)
+    position = inserted = 0
+    start = time.perf_counter()
+    batch = []
+    for record in records:
+        position += 1
+        if position <= done:
+            continue
+        batch.append(to_row(table, record))
+        if len(batch) >= batch_size:
+            inserted += _insert_batch(conn, cursor, table, batch)
+            conn.commit()
+            checkpoint.save(table, position)
+            batch = []
+    if batch:
+        inserted += _insert_batch(conn, cursor, table, batch)
+        conn.commit()
+        checkpoint.save(table, position)
+    cursor.close()
+    return inserted, time.perf_counter() - start
+
+def _switch_constraints(cursor, tables: list[str], enable: bool):
+    """Foreign keys on and off, and non-unique indexes unusable/rebuilt. Unique
+    keys stay on: they are what makes re-running a batch safe."""
+    names = [t.upper() for t in tables]
+    binds = ", ".join(f":t{i}" for i in range(len(names)))
+    params = {f"t{i}": n for i, n in enumerate(names)}
+
+    cursor.execute(
+        f"SELECT table_name, constraint_name FROM user_constraints WHERE constraint_type = 'R' AND table_name IN ({binds})",
+        params,
+    )
+    for table, constraint in cursor.fetchall():
+        action = "ENABLE VALIDATE" if enable else "DISABLE"
+        print(f"  {action} {table}.{constraint}")
+        cursor.execute(f"ALTER TABLE {table} MODIFY CONSTRAINT {constraint} {action}")
+
+    cursor.execute(
+        f"""SELECT index_name FROM user_indexes
+            WHERE uniqueness = 'NONUNIQUE' AND index_type = 'NORMAL' AND table_name IN ({binds})""",
+        params,
+    )
+    for (index,) in cursor.fetchall():
+        action = "REBUILD" if enable else "UNUSABLE"
+        print(f"  {action} {index}")
+        cursor.execute(f"ALTER INDEX {index} {action}")
+
+def load(conn, sources: list[tuple[str, object]], batch_size: int = 1000,
+         checkpoint: Checkpoint | None = None, switch_constraints: bool = True) -> dict:
+    """Loads (table, records) pairs in order, then recomputes counters and
+    timelines; returns {table: rows inserted}. `records` are dump-style dicts."""
+    checkpoint = checkpoint or Checkpoint(None)
+    tables = [t for t, _ in sources]
+    oracle = _is_oracle(conn) and switch_constraints
+    results = {}
+
+    cursor = conn.cursor()
+    if oracle:
+        print("Disabling constraints and indexes...")
+        _switch_constraints(cursor, tables, enable=False)
+    try:
+        for table, records in sources:
+            print(f"Loading {table}...")
+            inserted, seconds = load_table(conn, table, records, batch_size, checkpoint)
+            rate = inserted / seconds if seconds > 0 else 0
+            print(f"  {inserted} rows in {seconds:.1f}s ({rate:,.0f} rows/sec)")
+            results[table] = inserted
+    finally:
+        if oracle:
+            print("Re-enabling constraints and rebuilding indexes...")
+            _switch_constraints(cursor, tables, enable=True)
+
+    derived = _derived_data_crud(conn)
+    if derived:
+        counters, timeline, suggestion = derived
+        print("Recomputing counters, timelines and follow suggestions...")
+        counters.reconcile_post_counters(cursor)
+        counters.reconcile_user_counters(cursor)
+        timeline.rebuild(cursor)
+        suggestion.refresh(cursor)
+        conn.commit()
+    cursor.close()
+    return results
+
+def bulk_import(conn, directory: str, batch_size: int = 1000, checkpoint_path: str | None = None,
+                tables: list[str] | None = None, switch_constraints: bool = True) -> dict:
+    """Loads every dump found in `directory`; returns {table: rows inserted}."""
+    dumps = [(t, _find_dump(directory, t)) for t in TABLES if not tables or t in tables]
+    sources = []
+    for table, path in dumps:
+        if path:
+            print(f"Found {table} dump: {path}")
+            sources.append((table, read_records(path)))
+    return load(conn, sources, batch_size, Checkpoint(checkpoint_path), switch_constraints)
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-load a Prisma/PostgreSQL dump into the database")
+    parser.add_argument("directory", help="Directory with <table>.jsonl / .json / .csv files")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--checkpoint", default="bulk_import.checkpoint.json",
+                        help="Progress file; re-run with the same file to resume")
+    parser.add_argument("--tables", help="Comma-separated subset of: " + ", ".join(TABLES))
+    parser.add_argument("--keep-constraints", action="store_true",
+                        help="Leave foreign keys and indexes enabled during the load")
+    args = parser.parse_args()
+
+    print(f"Connecting to database: {settings.SQLITE_PATH if settings.DB_BACKEND == 'sqlite' else settings.DB_DSN}")
+    try:
+        # Oracle or SQLite per DB_BACKEND; no pool runs here, so this is a standalone connection
+        conn = get_db_connection()
+        print("Connected successfully.")
+
+        start = time.perf_counter()
+        results = bulk_import(
+            conn, args.directory, args.batch_size, args.checkpoint,
+            args.tables.split(",") if args.tables else None, not args.keep_constraints,
+        )
+        total = sum(results.values())
+        seconds = time.perf_counter() - start
+        print(f"Imported {total} rows in {seconds:.1f}s ({total / seconds if seconds else 0:,.0f} rows/sec)")
+        conn.close()
+
+    except Exception as e:
+        print(f"Error: {e}")
+        # Callers rely on the exit status
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+from typing import Literal
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -8,7 +9,110 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 1440
 
+    # "oracle", or "sqlite" for an embedded database file at SQLITE_PATH (local
+    # profiling and test runs without an Oracle instance; single worker)
+    DB_BACKEND: Literal["oracle", "sqlite"] = "oracle"
+    SQLITE_PATH: str = "socially.db"
+
+    # Connection pool (sized to the anyio threadpool that runs sync endpoints)
+    DB_POOL_MIN: int = 2
+    DB_POOL_MAX: int = 40
+    DB_POOL_INCREMENT: int = 2
+    DB_POOL_TIMEOUT_MS: int = 5000      # max wait for a free connection
+    DB_POOL_PING_INTERVAL: int = 0      # seconds; 0 = ping on every checkout, -1 = never
+    DB_STMT_CACHE_SIZE: int = 40
+    DB_ASYNC_POOL_MAX: int = 40         # connections shared by all async endpoints
+
+    # Request cursors record per-statement metrics for GET /metrics; statements
+    # slower than SLOW_QUERY_MS are logged with their SQL (0 = off)
+    DB_QUERY_METRICS: bool = True
+    SLOW_QUERY_MS: float = 500
+
+    # Server-Timing header with time per request phase (auth, pool, sql, lob, json)
+    SERVER_TIMING_ENABLED: bool = True
+    # Sampling profiler, inert unless PROFILING_ENABLED. Profiles requests sent
+    # with X-Profile-Token: PROFILE_TOKEN, whose path starts with PROFILE_PATH, or
+    # a random SAMPLE_RATE fraction; collapsed stacks are appended under PROFILE_DIR
+    PROFILING_ENABLED: bool = False
+    PROFILE_TOKEN: str = ""
+    PROFILE_PATH: str = ""
+    PROFILE_SAMPLE_RATE: float = 0.0
+    PROFILE_INTERVAL_MS: float = 5
+    PROFILE_DIR: str = "profiles"
+
+    # CLOB columns come back as str in the fetch itself instead of a LOB locator
+    # that costs a round trip per row to read
+    DB_FETCH_LOBS_AS_STRING: bool = True
+    # Post/comment text up to this many UTF-8 bytes is stored in VARCHAR2 (max 4000,
+    # 0 = always CLOB); longer text overflows into the CLOB column
+    CONTENT_INLINE_MAX_BYTES: int = 4000
+    # Upper bound on post/comment length, which also bounds the size of strings
+    # materialised when CLOBs are fetched inline
+    CONTENT_MAX_CHARS: int = 100000
+
+    # Latest comments embedded per post in feed/profile listings
+    COMMENT_PREVIEW_COUNT: int = 3
+
+    # Home timeline: authors with more followers are merged in on read instead of fanned out
+    TIMELINE_FANOUT_MAX_FOLLOWERS: int = 10000
+    TIMELINE_BACKFILL_POSTS: int = 50   # posts copied into a timeline on follow
+
+    # Profile cache (per worker); poll > 0 enables cross-worker invalidation
+    PROFILE_CACHE_SIZE: int = 10000
+    PROFILE_CACHE_TTL_SECONDS: float = 60
+    CACHE_INVALIDATION_POLL_SECONDS: float = 0
+
+    # Rendered global feed pages shared by concurrent requests
+    FEED_MICROCACHE_TTL_SECONDS: float = 1.0
+    FEED_MICROCACHE_SIZE: int = 64
+
+    # Password hashing runs on its own bounded pool (503 once MAX_PENDING is reached)
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_USE_PROCESSES: bool = False
+    PASSWORD_HASH_MAX_PENDING: int = 64
+
+    # Verified JWTs are cached until their exp; revocation compares the token's
+    # session version (sv claim) with users.session_version
+    TOKEN_CACHE_SIZE: int = 50000
+    TOKEN_REVOCATION_ENABLED: bool = True
+    SESSION_VERSION_TTL_SECONDS: float = 30
+
+    # Notifications are written behind the request: queued after commit and
+    # inserted in batches, spilling to the outbox table when the queue is full or
+    # a batch fails. QUEUE_SIZE=0 writes every event to the outbox inside the
+    # request transaction instead (one more INSERT, but nothing lost on a crash).
+    NOTIFICATION_QUEUE_SIZE: int = 10000
+    NOTIFICATION_BATCH_SIZE: int = 500
+    NOTIFICATION_FLUSH_MS: int = 200
+    NOTIFICATION_ENQUEUE_TIMEOUT_MS: int = 100
+    NOTIFICATION_OUTBOX_POLL_SECONDS: float = 5
+    # LIKE/FOLLOW notifications for the same recipient and post within this
+    # window share one row with an actor count (0 = one row per event)
+    NOTIFICATION_COALESCE_WINDOW_SECONDS: int = 86400
+
+    # Notification push (GET /notifications/stream). "local" delivers within this
+    # worker only; "database" polls new notifications so any worker can deliver.
+    PUSH_BROKER: str = "local"
+    PUSH_POLL_SECONDS: float = 1
+    PUSH_HEARTBEAT_SECONDS: float = 15
+    # Events buffered per connection before a slow client is disconnected
+    PUSH_BUFFER_SIZE: int = 100
+
+    # "Who to follow": top SUGGESTIONS_TOP_K per user from friends of friends and
+    # the POPULAR_CANDIDATES most-followed accounts, recomputed in bulk every
+    # REFRESH_SECONDS (0 = only by app/refresh_suggestions.py) and cached per worker
+    SUGGESTIONS_TOP_K: int = 20
+    SUGGESTIONS_POPULAR_CANDIDATES: int = 20
+    SUGGESTIONS_REFRESH_SECONDS: float = 3600
+    SUGGESTIONS_CACHE_SIZE: int = 10000
+    SUGGESTIONS_CACHE_TTL_SECONDS: float = 300
+    SUGGESTIONS_COUNT: int = 3          # accounts returned per request
+
+    # Rows per fetch round trip (and per streamed chunk) for NDJSON exports
+    EXPORT_ARRAYSIZE: int = 500
+
     class Config:
         env_file = ".env"
 
-settings = Settings()
\ No newline at end of file
+settings = Settings()
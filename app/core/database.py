@@ -1,9 +1,171 @@
+import threading
+import time
 import oracledb
+from app.core import metrics, sqlite_db
 from app.core.config import settings
+from app.core.instrumentation import record_phase
+
+class PoolTimeoutError(Exception):
+    """Raised when no pooled connection became free within DB_POOL_TIMEOUT_MS."""
+
+_pool: oracledb.ConnectionPool | None = None
+_async_pool: oracledb.AsyncConnectionPool | None = None
+
+# Applies to every connection, pooled or not; per-execute fetch_lobs still overrides
+oracledb.defaults.fetch_lobs = not settings.DB_FETCH_LOBS_AS_STRING
+
+# Counters for /health/pool (oracledb only exposes busy/opened)
+_stats_lock = threading.Lock()
+_stats = {"acquires": 0, "waits": 0, "timeouts": 0, "wait_ms_total": 0.0}
+
+_pool_wait = metrics.Histogram("db_pool_wait_seconds", "Time to acquire a pooled connection")
+metrics.Gauge("db_pool_busy", "Connections of the sync pool in use", lambda: _pool.busy if _pool else None)
+metrics.Gauge("db_pool_open", "Connections of the sync pool open", lambda: _pool.opened if _pool else None)
+metrics.Gauge("db_pool_timeouts_total", "Acquires that gave up after DB_POOL_TIMEOUT_MS",
+              lambda: _stats["timeouts"], type="counter")
+
+def _use_sqlite() -> bool:
+    return settings.DB_BACKEND == "sqlite"
+
+def init_pool():
+    global _pool
+    if _use_sqlite():
+        sqlite_db.ensure_schema()  # no pool: connections are opened per request
+        return None
+    if _pool is None:
+        _pool = oracledb.create_pool(
+            user=settings.DB_USER,
+            password=settings.DB_PASSWORD,
+            dsn=settings.DB_DSN,
+            min=settings.DB_POOL_MIN,
+            max=settings.DB_POOL_MAX,
+            increment=settings.DB_POOL_INCREMENT,
+            getmode=oracledb.POOL_GETMODE_TIMEDWAIT,
+            wait_timeout=settings.DB_POOL_TIMEOUT_MS,
+            ping_interval=settings.DB_POOL_PING_INTERVAL,
+            stmtcachesize=settings.DB_STMT_CACHE_SIZE,
+        )
+    return _pool
+
+def close_pool():
+    global _pool
+    if _pool is not None:
+        _pool.close(force=True)
+        _pool = None
+
+def init_async_pool():
+    global _async_pool
+    if _use_sqlite():
+        return None
+    if _async_pool is None:
+        _async_pool = oracledb.create_pool_async(
+            user=settings.DB_USER,
+            password=settings.DB_PASSWORD,
+            dsn=settings.DB_DSN,
+            min=settings.DB_POOL_MIN,
+            max=settings.DB_ASYNC_POOL_MAX,
+            increment=settings.DB_POOL_INCREMENT,
+            getmode=oracledb.POOL_GETMODE_TIMEDWAIT,
+            wait_timeout=settings.DB_POOL_TIMEOUT_MS,
+            ping_interval=settings.DB_POOL_PING_INTERVAL,
+            stmtcachesize=settings.DB_STMT_CACHE_SIZE,
+        )
+    return _async_pool
+
+async def close_async_pool():
+    global _async_pool
+    if _async_pool is not None:
+        await _async_pool.close(force=True)
+        _async_pool = None
+
+def _record_acquire(start: float, waited: bool):
+    elapsed = time.perf_counter() - start
+    _pool_wait.observe((), elapsed)
+    record_phase("pool", elapsed)
+    elapsed_ms = elapsed * 1000
+    with _stats_lock:
+        _stats["acquires"] += 1
+        _stats["wait_ms_total"] += elapsed_ms
+        if waited:
+            _stats["waits"] += 1
+
+def _pool_timeout(e: oracledb.Error) -> PoolTimeoutError | None:
+    error, = e.args
+    if error.full_code != "DPY-4005":
+        return None
+    with _stats_lock:
+        _stats["timeouts"] += 1
+    return PoolTimeoutError("Timed out waiting for a database connection")
 
 def get_db_connection():
-    return oracledb.connect(
-        user=settings.DB_USER,
-        password=settings.DB_PASSWORD,
-        dsn=settings.DB_DSN
-    )
\ No newline at end of file
+    """Acquires a pooled connection; conn.close() hands it back to the pool.
+
+    Falls back to a standalone connection when no pool is running (scripts).
+    """
+    if _use_sqlite():
+        sqlite_db.ensure_schema()
+        return sqlite_db.connect()
+    if _pool is None:
+        return oracledb.connect(
+            user=settings.DB_USER,
+            password=settings.DB_PASSWORD,
+            dsn=settings.DB_DSN
+        )
+
+    waited = _pool.busy >= _pool.max
+    start = time.perf_counter()
+    try:
+        conn = _pool.acquire()
+    except oracledb.Error as e:
+        timeout = _pool_timeout(e)
+        if timeout:
+            raise timeout from e
+        raise
+    _record_acquire(start, waited)
+    return conn
+
+async def get_async_db_connection():
+    """Async counterpart of get_db_connection; await conn.close() to release."""
+    if _use_sqlite():
+        sqlite_db.ensure_schema()
+        return sqlite_db.AsyncConnection(sqlite_db.connect())
+    pool = _async_pool or init_async_pool()
+    waited = pool.busy >= pool.max
+    start = time.perf_counter()
+    try:
+        conn = await pool.acquire()
+    except oracledb.Error as e:
+        timeout = _pool_timeout(e)
+        if timeout:
+            raise timeout from e
+        raise
+    _record_acquire(start, waited)
+    return conn
+
+# Work to run once a request transaction has committed; dropped on rollback.
+# Only cursors handed out by get_cursor and async_cursor_scope run their hooks.
+_commit_hooks: dict[int, list] = {}
+
+def on_commit(cursor, fn):
+    _commit_hooks.setdefault(id(cursor), []).append(fn)
+
+def pop_commit_hooks(cursor) -> list:
+    return _commit_hooks.pop(id(cursor), [])
+
+def pool_stats() -> dict:
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["wait_ms_total"] = round(stats["wait_ms_total"], 3)
+    if _pool is None:
+        return {"enabled": False, **stats}
+    stats = {
+        "enabled": True,
+        "min": _pool.min,
+        "max": _pool.max,
+        "open": _pool.opened,
+        "busy": _pool.busy,
+        **stats,
+    }
+    if _async_pool is not None:
+        stats["async"] = {"max": _async_pool.max, "open": _async_pool.opened, "busy": _async_pool.busy}
+    return stats
@@ -1,17 +1,28 @@
-from typing import Generator, Optional
-from fastapi import Depends, HTTPException, status
+import hashlib
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, Generator, Optional
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
-from app.core.database import get_db_connection
+from app.core.cache import TTLCache
+from app.core.database import (
+    get_db_connection, get_async_db_connection, PoolTimeoutError, pop_commit_hooks,
+)
 from app.core.config import settings
+from app.core.instrumentation import instrument, record_phase
+from app.core.sessions import current_session_version
 
 # auto_error=False prevents 401 if token is missing
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/token", auto_error=False)
 
 def get_cursor() -> Generator:
     """Yields an Oracle cursor and handles commit/rollback automatically."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    try:
+        conn = get_db_connection()
+    except PoolTimeoutError:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Database busy, try again")
+    cursor = instrument(conn.cursor())
     try:
         yield cursor
         conn.commit()
@@ -20,9 +31,79 @@ def get_cursor() -> Generator:
         raise
     finally:
         cursor.close()
-        conn.close()
+        conn.close()  # returns the connection to the pool
+        hooks = pop_commit_hooks(cursor)
+    # Only reached once the commit succeeded
+    for hook in hooks:
+        hook()
+
+@asynccontextmanager
+async def async_cursor_scope() -> AsyncGenerator:
+    """Async cursor with get_cursor's commit/rollback semantics, for endpoints that
+    only need the database on some paths (e.g. cache misses)."""
+    try:
+        conn = await get_async_db_connection()
+    except PoolTimeoutError:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Database busy, try again")
+    cursor = instrument(conn.cursor())
+    try:
+        yield cursor
+        await conn.commit()
+    except Exception:
+        await conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        await conn.close()
+        hooks = pop_commit_hooks(cursor)
+    for hook in hooks:
+        hook()
+
+async def get_async_cursor() -> AsyncGenerator:
+    """Async variant of get_cursor for `async def` endpoints (no threadpool slot held)."""
+    async with async_cursor_scope() as cursor:
+        yield cursor
+
+# Verified tokens keyed by SHA-256 digest -> (user_id, session_version); each
+# entry expires with the token's own `exp`. Failed verifications aren't cached.
+_token_cache = TTLCache("tokens", settings.TOKEN_CACHE_SIZE, settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60)
 
-def get_current_user_id(token: str = Depends(oauth2_scheme)) -> str:
+async def verify_token(token: str) -> Optional[str]:
+    """Returns the token's user_id, or None if it is invalid, expired or revoked.
+    Raises a 503 when the session version can't be read for lack of a connection."""
+    start = time.perf_counter()
+    try:
+        return await _verify_token(token)
+    finally:
+        record_phase("auth", time.perf_counter() - start)
+
+async def _verify_token(token: str) -> Optional[str]:
+    key = hashlib.sha256(token.encode()).digest()
+    entry = _token_cache.get(key)
+    if entry is None:
+        try:
+            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        except JWTError:
+            return None
+        user_id = payload.get("sub")
+        if user_id is None:
+            return None
+        entry = (user_id, payload.get("sv", 0))
+        ttl = payload["exp"] - time.time() if "exp" in payload else None
+        if ttl is None or ttl > 0:
+            _token_cache.set(key, entry, ttl=ttl)
+
+    user_id, session_version = entry
+    if settings.TOKEN_REVOCATION_ENABLED:
+        try:
+            current = await current_session_version(user_id)
+        except PoolTimeoutError:
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Database busy, try again")
+        if current is None or session_version < current:
+            return None
+    return user_id
+
+async def get_current_user_id(token: str = Depends(oauth2_scheme)) -> str:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -30,23 +111,25 @@ def get_current_user_id(token: str = Depends(oauth2_scheme)) -> str:
     )
     if not token:
         raise credentials_exception
-        
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-        return user_id
-    except JWTError:
+
+    user_id = await verify_token(token)
+    if user_id is None:
         raise credentials_exception
+    return user_id
 
 # NEW FUNCTION ADDED HERE
-def get_optional_user_id(token: Optional[str] = Depends(oauth2_scheme)) -> Optional[str]:
+async def get_optional_user_id(token: Optional[str] = Depends(oauth2_scheme)) -> Optional[str]:
     """Returns user_id if token is valid, otherwise returns None."""
     if not token:
         return None
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        return payload.get("sub")
-    except JWTError:
-        return None
\ No newline at end of file
+    return await verify_token(token)
+
+async def get_stream_token(
+    token: Optional[str] = Depends(oauth2_scheme),
+    access_token: Optional[str] = Query(None, alias="token", description="For clients that can't set headers (EventSource)"),
+) -> str:
+    """Validated JWT from the Authorization header or a `?token=` query parameter.
+    Long-lived streams keep the token to re-check it while they stay open."""
+    token = token or access_token
+    await get_current_user_id(token)
+    return token
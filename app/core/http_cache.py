@@ -0,0 +1,60 @@
+"""Conditional GET helpers: strong ETags, If-None-Match handling and pre-rendered JSON bodies."""
+import hashlib
+import json
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from app.core.instrumentation import record_phase
+
+# Clients may keep the body but must revalidate before reusing it
+_CACHE_CONTROL = "no-cache"
+
+def make_etag(*parts) -> str:
+    """Strong validator over a cheap version of the resource (e.g. ids + counters)."""
+    digest = hashlib.blake2b(json.dumps(parts, default=str).encode(), digest_size=16)
+    return f'"{digest.hexdigest()}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison (RFC 9110 13.1.2)
+    candidates = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return etag in candidates
+
+def _encode_default(value):
+    # Only called for values json can't encode natively, so the plain dicts,
+    # lists and strings built from rows skip jsonable_encoder's recursive copy.
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return int(value) if value.as_tuple().exponent >= 0 else float(value)
+    return jsonable_encoder(value)
+
+_encoder = json.JSONEncoder(
+    ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":"), default=_encode_default
+)
+
+def render_json(data) -> bytes:
+    """Same bytes FastAPI's default JSONResponse would produce for `data`."""
+    start = time.perf_counter()
+    body = _encoder.encode(data).encode("utf-8")
+    record_phase("json", time.perf_counter() - start)
+    return body
+
+def json_response(data) -> Response:
+    """Pre-rendered JSON response for large listings, bypassing FastAPI's generic serialization."""
+    return Response(content=render_json(data), media_type="application/json")
+
+def conditional_response(request: Request, etag: str, body: bytes | None = None, render=None) -> Response:
+    """304 when the client already holds `etag`; otherwise the JSON body (rendered lazily via render())."""
+    headers = {"ETag": etag, "Cache-Control": _CACHE_CONTROL}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    if body is None:
+        body = render()
+    return Response(content=body, media_type="application/json", headers=headers)
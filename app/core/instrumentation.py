@@ -0,0 +1,280 @@
+"""Per-statement and per-request metrics (exported on GET /metrics).
+
+get_cursor and async_cursor_scope hand endpoints an instrumented proxy of their
+cursor. A statement is timed from its execute until the next statement or
+close, so its fetches count too; rows and LOB locators fetched are counted and
+round trips are estimated from prefetchrows/arraysize (plus one per LOB read).
+
+Statements are labeled by the repository function that ran them, taken from
+the call stack rather than the SQL text so labels stay few and stable:
+"post.get_feed", or "post.get_feed:_fetch_and_group_comments" for a statement
+run by one of its private helpers. Statements slower than SLOW_QUERY_MS are
+logged with their text.
+
+MetricsMiddleware times every request per route template and records how many
+statements and round trips it made. The same RequestStats collects time per
+phase (auth, pool, sql, lob, json; see record_phase) for the Server-Timing
+header (app/core/profiling.py).
+"""
+import contextvars
+import logging
+import math
+import sys
+import time
+import oracledb
+from app.core import metrics
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_QUERY_SECONDS = metrics.Histogram(
+    "db_query_duration_seconds", "Statement time from execute to the next statement, fetches included", ("query",)
+)
+_QUERY_ROWS = metrics.Counter("db_query_rows_total", "Rows fetched", ("query",))
+_QUERY_ROUND_TRIPS = metrics.Counter("db_query_round_trips_total", "Estimated database round trips", ("query",))
+_QUERY_LOB_READS = metrics.Counter("db_query_lob_reads_total", "LOB locators fetched, one round trip each to read", ("query",))
+_REQUEST_SECONDS = metrics.Histogram(
+    "http_request_duration_seconds", "Request time until the response is sent", ("method", "route", "status")
+)
+_REQUEST_ROUND_TRIPS = metrics.Histogram(
+    "http_request_db_round_trips", "Estimated database round trips per request", ("route",),
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55),
+)
+
+_LOB_TYPES = (oracledb.LOB, oracledb.AsyncLOB)
+
+class RequestStats:
+    __slots__ = ("queries", "round_trips", "phases")
+
+    def __init__(self):
+        self.queries = 0
+        self.round_trips = 0
+        self.phases: dict[str, float] = {}  # phase -> seconds
+
+_request_stats: contextvars.ContextVar[RequestStats | None] = contextvars.ContextVar("request_stats", default=None)
+
+def current_request_stats() -> RequestStats | None:
+    return _request_stats.get()
+
+def record_phase(phase: str, seconds: float):
+    """Adds time spent in `phase` to the current request, if any."""
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.phases[phase] = stats.phases.get(phase, 0.0) + seconds
+
+def _query_name(frame) -> str:
+    """module.function of the code that ran the statement; private helpers are
+    attributed to the nearest caller in the same module."""
+    module = frame.f_globals.get("__name__", "?")
+    outer = frame
+    while (outer.f_code.co_name.startswith("_") and outer.f_back is not None
+           and outer.f_back.f_globals.get("__name__") == module):
+        outer = outer.f_back
+    name = f"{module.rsplit('.', 1)[-1]}.{outer.f_code.co_name}"
+    return name if outer is frame else f"{name}:{frame.f_code.co_name}"
+
+class _Statement:
+    __slots__ = ("name", "sql", "seconds", "rows", "lobs", "fetched")
+
+    def __init__(self, name: str, sql: str):
+        self.name, self.sql = name, sql
+        self.seconds = 0.0
+        self.rows = self.lobs = 0
+        self.fetched = False
+
+class InstrumentedCursor:
+    """Delegates everything to the wrapped cursor (setting arraysize etc. included)."""
+
+    __slots__ = ("_cursor", "_statement")
+
+    def __init__(self, cursor):
+        object.__setattr__(self, "_cursor", cursor)
+        object.__setattr__(self, "_statement", None)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._cursor, name, value)
+
+    def _begin(self, sql: str):
+        self._end()
+        # Frame 2 is whoever called execute()/executemany() on this proxy
+        object.__setattr__(self, "_statement", _Statement(_query_name(sys._getframe(2)), sql))
+
+    def _fetched(self, rows, start: float):
+        statement = self._statement
+        if statement is None:
+            return
+        statement.seconds += time.perf_counter() - start
+        statement.fetched = True
+        statement.rows += len(rows)
+        statement.lobs += sum(1 for row in rows for value in row if isinstance(value, _LOB_TYPES))
+
+    def _round_trips(self, statement: _Statement) -> int:
+        trips = 1 + statement.lobs
+        prefetch = getattr(self._cursor, "prefetchrows", None)
+        if statement.fetched and prefetch is not None:
+            # The execute returns the first `prefetch` rows; each further arraysize costs a trip
+            trips += max(0, math.ceil((statement.rows + 1 - prefetch) / max(self._cursor.arraysize, 1)))
+        return trips
+
+    def _end(self):
+        statement = self._statement
+        if statement is None:
+            return
+        object.__setattr__(self, "_statement", None)
+        labels = (statement.name,)
+        trips = self._round_trips(statement)
+        _QUERY_SECONDS.observe(labels, statement.seconds)
+        _QUERY_ROUND_TRIPS.inc(labels, trips)
+        if statement.rows:
+            _QUERY_ROWS.inc(labels, statement.rows)
+        if statement.lobs:
+            _QUERY_LOB_READS.inc(labels, statement.lobs)
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.round_trips += trips
+            stats.phases["sql"] = stats.phases.get("sql", 0.0) + statement.seconds
+        if settings.SLOW_QUERY_MS > 0 and statement.seconds * 1000 >= settings.SLOW_QUERY_MS:
+            logger.warning("Slow query %s: %.1f ms, %d rows: %s", statement.name, statement.seconds * 1000,
+                           statement.rows, " ".join(statement.sql.split())[:500])
+
+    def execute(self, sql, *args, **kwargs):
+        self._begin(sql)
+        start = time.perf_counter()
+        try:
+            result = self._cursor.execute(sql, *args, **kwargs)
+        finally:
+            self._statement.seconds += time.perf_counter() - start
+        # oracledb and sqlite3 return the cursor itself for queries
+        return self if result is self._cursor else result
+
+    def executemany(self, sql, *args, **kwargs):
+        self._begin(sql)
+        start = time.perf_counter()
+        try:
+            result = self._cursor.executemany(sql, *args, **kwargs)
+        finally:
+            self._statement.seconds += time.perf_counter() - start
+        return self if result is self._cursor else result
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = self._cursor.fetchone()
+        self._fetched([row] if row is not None else [], start)
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        start = time.perf_counter()
+        rows = self._cursor.fetchmany(*args, **kwargs)
+        self._fetched(rows, start)
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = self._cursor.fetchall()
+        self._fetched(rows, start)
+        return rows
+
+    def __iter__(self):
+        while (row := self.fetchone()) is not None:
+            yield row
+
+    def close(self):
+        self._end()
+        self._cursor.close()
+
+class AsyncInstrumentedCursor(InstrumentedCursor):
+    """Same accounting for oracledb.AsyncCursor, whose execute and fetches are awaited."""
+
+    __slots__ = ()
+
+    async def execute(self, sql, *args, **kwargs):
+        self._begin(sql)
+        start = time.perf_counter()
+        try:
+            result = await self._cursor.execute(sql, *args, **kwargs)
+        finally:
+            self._statement.seconds += time.perf_counter() - start
+        return self if result is self._cursor else result
+
+    async def executemany(self, sql, *args, **kwargs):
+        self._begin(sql)
+        start = time.perf_counter()
+        try:
+            result = await self._cursor.executemany(sql, *args, **kwargs)
+        finally:
+            self._statement.seconds += time.perf_counter() - start
+        return self if result is self._cursor else result
+
+    async def fetchone(self):
+        start = time.perf_counter()
+        row = await self._cursor.fetchone()
+        self._fetched([row] if row is not None else [], start)
+        return row
+
+    async def fetchmany(self, *args, **kwargs):
+        start = time.perf_counter()
+        rows = await self._cursor.fetchmany(*args, **kwargs)
+        self._fetched(rows, start)
+        return rows
+
+    async def fetchall(self):
+        start = time.perf_counter()
+        rows = await self._cursor.fetchall()
+        self._fetched(rows, start)
+        return rows
+
+def instrument(cursor):
+    """Wraps a request cursor; returns it unchanged when DB_QUERY_METRICS is off."""
+    if not settings.DB_QUERY_METRICS:
+        return cursor
+    if isinstance(cursor, oracledb.AsyncCursor):
+        return AsyncInstrumentedCursor(cursor)
+    return InstrumentedCursor(cursor)
+
+def route_template(scope) -> str:
+    """Path pattern of the matched route, e.g. /api/v1/users/{username}; unmatched
+    paths share one label so 404 scans can't grow the series count."""
+    route = scope.get("route")
+    if route is None:
+        return "unmatched"
+    # Routes of a router included with a prefix only know their own part of the path
+    pattern = route.path_format
+    concrete = pattern.format(**{name: str(value) for name, value in scope.get("path_params", {}).items()})
+    path = scope["path"]
+    if path.endswith(concrete):
+        return path[:len(path) - len(concrete)] + pattern
+    return pattern
+
+class MetricsMiddleware:
+    """ASGI middleware: request latency per route template (unmatched paths share
+    one label) and round trips per request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            _request_stats.reset(token)
+            route = route_template(scope)
+            _REQUEST_SECONDS.observe((scope["method"], route, str(status)), time.perf_counter() - start)
+            _REQUEST_ROUND_TRIPS.observe((route,), stats.round_trips)
@@ -0,0 +1,121 @@
+"""Cross-worker cache invalidation over the database.
+
+Writers call publish() with the request cursor, so the invalidation row commits
+(or rolls back) together with the change it describes. Their own caches are
+evicted immediately and again once the transaction commits: a request that
+read the old row in between may have cached it again. Only when
+CACHE_INVALIDATION_POLL_SECONDS > 0 (Oracle, several workers) does publish
+write a row to `cache_invalidations`; every worker's listener thread then polls
+the table, replays rows written by other workers into the registered handlers
+and purges rows older than an hour. With polling off the channel costs nothing.
+"""
+import logging
+import threading
+import time
+from typing import Callable
+from app.core.config import settings
+from app.core.database import get_db_connection, on_commit
+
+logger = logging.getLogger(__name__)
+
+_handlers: dict[str, Callable[[str], None]] = {}
+_listener: threading.Thread | None = None
+_stop = threading.Event()
+
+# Identity values can commit out of order, so poll by time with an overlap and
+# remember which ids were already applied.
+_OVERLAP_SECONDS = 30
+_RETENTION_SECONDS = 3600
+
+def _enabled() -> bool:
+    # An embedded SQLite database is only ever served by a single worker
+    return settings.DB_BACKEND != "sqlite"
+
+def _polling() -> bool:
+    return _enabled() and settings.CACHE_INVALIDATION_POLL_SECONDS > 0
+
+def register_handler(cache_name: str, handler: Callable[[str], None]):
+    """handler(key) evicts `key` from the local cache called `cache_name`."""
+    _handlers[cache_name] = handler
+
+def broadcasting() -> bool:
+    """True when publish() writes a row; PL/SQL blocks that write their rows
+    themselves (invalidations_sql) bind it as :broadcast."""
+    return _polling()
+
+def invalidations_sql(*entries: tuple[str, str]) -> str:
+    """PL/SQL writing one row per (cache_name, key expression) when :broadcast = 1."""
+    rows = " UNION ALL ".join(f"SELECT '{name}', {key} FROM dual" for name, key in entries)
+    return f"IF :broadcast = 1 THEN INSERT INTO cache_invalidations (cache_name, cache_key) {rows}; END IF"
+
+def evict(cursor, cache_name: str, key: str):
+    """publish() for a key whose row the caller's own statement wrote."""
+    handler = _handlers[cache_name]
+    handler(key)
+    on_commit(cursor, lambda: handler(key))
+
+def publish(cursor, cache_name: str, key: str):
+    evict(cursor, cache_name, key)
+    # Nobody reads the rows unless the listeners poll
+    if _polling():
+        cursor.execute(
+            "INSERT INTO cache_invalidations (cache_name, cache_key) VALUES (:1, :2)",
+            (cache_name, key),
+        )
+
+def _replay(cursor, seen: dict[int, float], now: float):
+    cursor.execute(
+        """
+        SELECT id, cache_name, cache_key FROM cache_invalidations
+        WHERE created_at > SYSTIMESTAMP - NUMTODSINTERVAL(:1, 'SECOND')
+        """,
+        (settings.CACHE_INVALIDATION_POLL_SECONDS + _OVERLAP_SECONDS,),
+    )
+    for inv_id, cache_name, key in cursor:
+        if inv_id in seen:
+            continue
+        seen[inv_id] = now
+        handler = _handlers.get(cache_name)
+        if handler:
+            handler(key)
+    horizon = now - 2 * (settings.CACHE_INVALIDATION_POLL_SECONDS + _OVERLAP_SECONDS)
+    for inv_id in [i for i, t in seen.items() if t < horizon]:
+        del seen[inv_id]
+
+def _poll_forever():
+    seen: dict[int, float] = {}
+    last_cleanup = 0.0
+    while not _stop.wait(settings.CACHE_INVALIDATION_POLL_SECONDS):
+        try:
+            conn = get_db_connection()
+            try:
+                cursor = conn.cursor()
+                now = time.monotonic()
+                _replay(cursor, seen, now)
+                if now - last_cleanup >= _RETENTION_SECONDS:
+                    cursor.execute(
+                        "DELETE FROM cache_invalidations WHERE created_at < SYSTIMESTAMP - NUMTODSINTERVAL(:1, 'SECOND')",
+                        (_RETENTION_SECONDS,),
+                    )
+                    conn.commit()
+                    last_cleanup = now
+                cursor.close()
+            finally:
+                conn.close()
+        except Exception:
+            logger.exception("Cache invalidation poll failed")
+
+def start_listener():
+    global _listener
+    if not _polling() or _listener is not None:
+        return
+    _stop.clear()
+    _listener = threading.Thread(target=_poll_forever, name="cache-invalidation", daemon=True)
+    _listener.start()
+
+def stop_listener():
+    global _listener
+    if _listener is not None:
+        _stop.set()
+        _listener.join(timeout=5)
+        _listener = None
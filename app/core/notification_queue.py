@@ -0,0 +1,284 @@
+"""Delivery of notifications outside the request.
+
+By default events are queued once the like/comment/follow commits, so the
+request itself does no notification write. A writer thread inserts them in
+batches (executemany) every NOTIFICATION_FLUSH_MS or as soon as
+NOTIFICATION_BATCH_SIZE are waiting. The statements live in the repository's
+notification_delivery module: each event is a MERGE on its group_key, so
+repeated likes/follows coalesce into one row per recipient, post and time
+window.
+
+The `notification_outbox` table is the fallback. When the queue
+(NOTIFICATION_QUEUE_SIZE) is full, committing requests wait up to
+NOTIFICATION_ENQUEUE_TIMEOUT_MS for space and then spill the event there;
+batches the writer cannot insert, events committed after the writer stopped
+and events still queued at shutdown go there too. The writer relays the outbox
+at startup and every NOTIFICATION_OUTBOX_POLL_SECONDS. A crash loses what is
+still in memory.
+
+NOTIFICATION_QUEUE_SIZE=0 trades the saved round trip for durability: every
+event is written to the outbox inside the request transaction, and once the
+request commits the relay thread is woken, waits NOTIFICATION_FLUSH_MS for more
+events and moves them in batches of NOTIFICATION_BATCH_SIZE.
+"""
+import logging
+import queue
+import threading
+import time
+from app import repository
+from app.core import push
+from app.core.config import settings
+from app.core.database import get_db_connection, on_commit
+
+logger = logging.getLogger(__name__)
+
+_queue: queue.Queue | None = None
+_writer: threading.Thread | None = None
+_stop = threading.Event()
+_wake = threading.Event()  # an outbox event committed
+# Held while deciding whether the writer can still take an event
+_offer_lock = threading.Lock()
+# flush() relays from the caller's thread too; SQLite has no SKIP LOCKED
+_relay_lock = threading.Lock()
+
+# Coalescing windows are long: dropping their expired actors hourly is plenty
+_PRUNE_INTERVAL_SECONDS = 3600
+_last_prune = 0.0
+
+_stats_lock = threading.Lock()
+_stats = {"enqueued": 0, "written": 0, "batches": 0, "spilled": 0, "relayed": 0, "dropped": 0}
+
+def _count(name: str, n: int = 1):
+    with _stats_lock:
+        _stats[name] += n
+
+def writes_outbox() -> bool:
+    """True when submit() would insert into the outbox (NOTIFICATION_QUEUE_SIZE=0),
+    so a caller can do it in its own statement and pass in_outbox=True."""
+    return _queue is None and _writer is not None
+
+def submit(cursor, row: tuple, in_outbox: bool = False):
+    """Delivers `row` (id, type, user_id, creator_id, post_id, comment_id, group_key)
+    once the transaction behind `cursor` commits; nothing is sent if it rolls back.
+    in_outbox: the caller already inserted the row into the outbox."""
+    if in_outbox:
+        on_commit(cursor, _wake.set)
+        return
+    if _queue is None:
+        # Outbox mode, or no writer running (scripts): stay in the caller's transaction
+        if _writer is not None:
+            repository.notification_delivery.write_outbox(cursor, [row])  # published by the relay
+            on_commit(cursor, _wake.set)
+        else:
+            written, failed = repository.notification_delivery.write(cursor, [row])
+            _log_dropped(failed)
+            on_commit(cursor, lambda: _publish(written))
+        return
+    q = _queue
+    on_commit(cursor, lambda: _offer(q, row))
+
+def _offer(q: queue.Queue, row: tuple):
+    with _offer_lock:
+        # stop() may have drained the queue since the event was submitted
+        if q is _queue and not _stop.is_set():
+            try:
+                q.put(row, timeout=settings.NOTIFICATION_ENQUEUE_TIMEOUT_MS / 1000)
+                _count("enqueued")
+                return
+            except queue.Full:
+                pass
+    # Writer is behind or gone: make the event durable rather than wait longer
+    try:
+        _spill([row])
+    except Exception:
+        # The request already committed; don't turn its response into an error
+        logger.exception("Notification %s lost: writer unavailable and outbox unavailable", row[0])
+
+def _spill(rows: list[tuple]):
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        repository.notification_delivery.write_outbox(cursor, rows)
+        conn.commit()
+        cursor.close()
+    finally:
+        conn.close()
+    _count("spilled", len(rows))
+
+def _log_dropped(failed: list):
+    # Their post, comment or user was deleted in the meantime
+    for row, message in failed:
+        logger.warning("Dropped notification %s: %s", row[0], message)
+    _count("dropped", len(failed))
+
+def _publish(rows: list[tuple]):
+    for row in rows:
+        push.publish(row[2], push.make_event(row[1], row[3], row[4], row[5]))
+
+def _write(rows: list[tuple]):
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        written, failed = repository.notification_delivery.write(cursor, rows)
+        _log_dropped(failed)
+        conn.commit()
+        cursor.close()
+    finally:
+        conn.close()
+    _count("written", len(written))
+    _count("batches")
+    _publish(written)
+
+def _next_batch(q: queue.Queue) -> list[tuple]:
+    """Blocks for the first event, then collects more until the batch is full or
+    NOTIFICATION_FLUSH_MS has passed since the first one arrived."""
+    try:
+        batch = [q.get(timeout=settings.NOTIFICATION_FLUSH_MS / 1000)]
+    except queue.Empty:
+        return []
+    deadline = time.monotonic() + settings.NOTIFICATION_FLUSH_MS / 1000
+    while len(batch) < settings.NOTIFICATION_BATCH_SIZE:
+        remaining = deadline - time.monotonic()
+        try:
+            batch.append(q.get(timeout=remaining) if remaining > 0 else q.get_nowait())
+        except queue.Empty:
+            break
+    return batch
+
+def _flush(q: queue.Queue, batch: list[tuple]):
+    try:
+        _write(batch)
+    except Exception:
+        logger.exception("Notification batch insert failed, moving %d events to the outbox", len(batch))
+        try:
+            _spill(batch)
+        except Exception:
+            logger.exception("Outbox write failed, %d notifications lost", len(batch))
+    finally:
+        for _ in batch:
+            q.task_done()
+
+def relay_outbox() -> int:
+    """Moves outbox events into notifications; returns how many were moved."""
+    with _relay_lock:
+        moved = _relay_all()
+    _count("relayed", moved)
+    return moved
+
+def _relay_all() -> int:
+    moved = 0
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        while True:
+            rows, written, failed = repository.notification_delivery.relay_outbox_batch(
+                cursor, settings.NOTIFICATION_BATCH_SIZE
+            )
+            if not rows:
+                break
+            _log_dropped(failed)
+            conn.commit()
+            moved += len(rows)
+            _publish(written)
+        cursor.close()
+    finally:
+        conn.close()
+    return moved
+
+def _prune_actors():
+    """Runs on the writer's periodic outbox tick, at most every _PRUNE_INTERVAL_SECONDS."""
+    global _last_prune
+    now = time.monotonic()
+    if now - _last_prune < _PRUNE_INTERVAL_SECONDS:
+        return
+    _last_prune = now
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        repository.notification_delivery.prune_actors(cursor)
+        conn.commit()
+        cursor.close()
+    finally:
+        conn.close()
+
+def _run(q: queue.Queue):
+    last_relay = 0.0
+    while not (_stop.is_set() and q.empty()):
+        batch = _next_batch(q)
+        if batch:
+            _flush(q, batch)
+        now = time.monotonic()
+        if now - last_relay >= settings.NOTIFICATION_OUTBOX_POLL_SECONDS and not _stop.is_set():
+            last_relay = now
+            try:
+                relay_outbox()
+                _prune_actors()
+            except Exception:
+                logger.exception("Notification outbox relay failed")
+
+def _relay_forever():
+    while True:
+        try:
+            relay_outbox()
+            _prune_actors()
+        except Exception:
+            logger.exception("Notification outbox relay failed")
+        if _stop.is_set():
+            return
+        if _wake.wait(settings.NOTIFICATION_OUTBOX_POLL_SECONDS):
+            # Let the events of concurrent requests join this batch
+            _stop.wait(settings.NOTIFICATION_FLUSH_MS / 1000)
+        _wake.clear()
+
+def start():
+    global _queue, _writer
+    if _writer is not None:
+        return
+    _stop.clear()
+    _wake.clear()
+    if settings.NOTIFICATION_QUEUE_SIZE > 0:
+        _queue = queue.Queue(maxsize=settings.NOTIFICATION_QUEUE_SIZE)
+        _writer = threading.Thread(target=_run, args=(_queue,), name="notification-writer", daemon=True)
+    else:
+        # Outbox mode: the thread just relays
+        _writer = threading.Thread(target=_relay_forever, name="notification-relay", daemon=True)
+    _writer.start()
+
+def stop(timeout: float = 10):
+    """Drains queued events into the database, then stops the writer."""
+    global _queue, _writer
+    if _writer is None:
+        return
+    with _offer_lock:
+        _stop.set()
+    _wake.set()
+    _writer.join(timeout=timeout)
+    if _queue is not None:
+        leftover = []
+        while True:
+            try:
+                leftover.append(_queue.get_nowait())
+            except queue.Empty:
+                break
+        if leftover:
+            try:
+                _spill(leftover)
+            except Exception:
+                logger.exception("Could not save %d queued notifications on shutdown", len(leftover))
+    _queue = None
+    _writer = None
+
+def flush():
+    """Waits until everything committed so far has been written (tests, scripts)."""
+    if _queue is not None:
+        _queue.join()
+    elif _writer is not None:
+        relay_outbox()
+
+def queue_stats() -> dict:
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["mode"] = "queue" if _queue is not None else ("outbox" if _writer is not None else "inline")
+    stats["queued"] = _queue.qsize() if _queue is not None else 0
+    stats["capacity"] = settings.NOTIFICATION_QUEUE_SIZE
+    return stats
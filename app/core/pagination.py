@@ -0,0 +1,96 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import NamedTuple, Optional
+from fastapi import HTTPException, Query
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# Timestamps travel as strings and are converted with TO_TIMESTAMP in SQL so the
+# comparison keeps microsecond precision (a bound datetime may be sent as DATE).
+_TS_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+_TS_SQL_FORMAT = "YYYY-MM-DD HH24:MI:SS.FF6"
+
+class PageParams(NamedTuple):
+    limit: int
+    # (created_at, id) of the last item already seen; (seq,) for listings ordered by a sequence column
+    after: Optional[tuple]
+
+def encode_cursor(created_at: datetime, item_id: str) -> str:
+    raw = json.dumps([created_at.strftime(_TS_FORMAT), item_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(token: str) -> tuple[str, str]:
+    """Inverse of encode_cursor. Raises ValueError for anything malformed."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        created_at, item_id = json.loads(base64.urlsafe_b64decode(padded))
+        datetime.strptime(created_at, _TS_FORMAT)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(item_id, str):
+        raise ValueError("Invalid cursor")
+    return created_at, item_id
+
+def encode_seq_cursor(seq: int) -> str:
+    raw = json.dumps([seq], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_seq_cursor(token: str) -> tuple[int]:
+    """Inverse of encode_seq_cursor. Raises ValueError for anything malformed."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        seq, = json.loads(base64.urlsafe_b64decode(padded))
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(seq, int) or isinstance(seq, bool):
+        raise ValueError("Invalid cursor")
+    return (seq,)
+
+def _page_params(cursor: Optional[str], limit: int, decode) -> PageParams:
+    if not cursor:
+        return PageParams(limit, None)
+    try:
+        return PageParams(limit, decode(cursor))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def get_page_params(
+    cursor: Optional[str] = Query(None, description="Opaque nextCursor from the previous page"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+) -> PageParams:
+    return _page_params(cursor, limit, decode_cursor)
+
+def get_seq_page_params(
+    cursor: Optional[str] = Query(None, description="Opaque nextCursor from the previous page"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+) -> PageParams:
+    """get_page_params for listings ordered by a sequence column."""
+    return _page_params(cursor, limit, decode_seq_cursor)
+
+def keyset_filter(ts_col: str, id_col: str, page: PageParams, op: str = "<") -> tuple[str, dict]:
+    """Seek predicate `(ts, id) < (:after_ts, :after_id)` for a descending listing
+    (op=">" for ascending). Returns ("", {}) on the first page."""
+    if page.after is None:
+        return "", {}
+    ts = f"TO_TIMESTAMP(:after_ts, '{_TS_SQL_FORMAT}')"
+    sql = f"({ts_col} {op} {ts} OR ({ts_col} = {ts} AND {id_col} {op} :after_id))"
+    return sql, {"after_ts": page.after[0], "after_id": page.after[1]}
+
+def seq_filter(seq_col: str, page: PageParams) -> tuple[str, dict]:
+    """Seek predicate `seq < :after_seq` for a listing in descending sequence
+    order. Returns ("", {}) on the first page."""
+    if page.after is None:
+        return "", {}
+    return f"{seq_col} < :after_seq", {"after_seq": page.after[0]}
+
+def split_page(rows: list, limit: int, key, encode=encode_cursor) -> tuple[list, Optional[str]]:
+    """Queries fetch limit + 1 rows; the extra row only tells us there is a next page.
+    `key(row)` returns the (created_at, id) pair the listing is ordered by, or
+    the (seq,) with encode=encode_seq_cursor."""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode(*key(rows[-1]))
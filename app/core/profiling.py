@@ -0,0 +1,168 @@
+"""Server-Timing headers and an on-demand sampling profiler.
+
+ServerTimingMiddleware adds a Server-Timing header with the time the request
+spent in each phase recorded so far (see instrumentation.record_phase):
+
+    auth   JWT verification and session-version check
+    pool   waiting for a pooled connection
+    sql    statements and their fetches (instrumented cursors only)
+    lob    LOB locator reads
+    json   render_json for pre-rendered bodies
+    total  until the response headers were sent
+
+The profiler does nothing unless PROFILING_ENABLED is set. It then profiles a
+request that carries `X-Profile-Token: PROFILE_TOKEN`, a request whose path
+starts with PROFILE_PATH, or a random PROFILE_SAMPLE_RATE fraction of
+requests. While any profiled request is in flight, a background thread samples
+the stacks of every thread every PROFILE_INTERVAL_MS. Only stacks that are
+running app code are kept, so idle workers and the idle event loop drop out.
+Samples from other requests running at the same time are kept too, so profile
+at low concurrency or narrow the selection. Each request's samples are
+appended in collapsed-stack format (input for flamegraph.pl, speedscope,
+inferno) to PROFILE_DIR/<METHOD>_<route>.folded. When nothing is profiled, the
+only cost is the settings check.
+"""
+import hmac
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from app.core.config import settings
+from app.core.instrumentation import current_request_stats, route_template
+
+# Listed first, in this order; anything else recorded follows
+_PHASES = ("auth", "pool", "sql", "lob", "json")
+
+def server_timing(phases: dict[str, float], queries: int, total: float) -> str:
+    ordered = [p for p in _PHASES if p in phases] + [p for p in phases if p not in _PHASES]
+    parts = []
+    for phase in ordered:
+        entry = f"{phase};dur={phases[phase] * 1000:.2f}"
+        if phase == "sql":
+            entry += f';desc="{queries} statements"'
+        parts.append(entry)
+    parts.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(parts)
+
+def _collapse(frame) -> str | None:
+    """Root-first "module:function;..." for one thread, or None if no app code is on it."""
+    names = []
+    in_app = False
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "?")
+        in_app = in_app or module.startswith("app.")
+        names.append(f"{module}:{frame.f_code.co_qualname}")
+        frame = frame.f_back
+    return ";".join(reversed(names)) if in_app else None
+
+class Profile:
+    def __init__(self):
+        self.samples: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def add(self, stacks: list[str]):
+        with self._lock:
+            self.samples.update(stacks)
+
+    def collapsed(self) -> str:
+        with self._lock:
+            return "".join(f"{stack} {count}\n" for stack, count in self.samples.items())
+
+class _Sampler:
+    """One thread for all profiled requests, running only while there are some."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._active: set[Profile] = set()
+        self._thread: threading.Thread | None = None
+
+    def attach(self, profile: Profile):
+        with self._lock:
+            self._active.add(profile)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+                self._thread.start()
+
+    def detach(self, profile: Profile):
+        with self._lock:
+            self._active.discard(profile)
+
+    def _run(self):
+        me = threading.get_ident()
+        while True:
+            with self._lock:
+                if not self._active:
+                    self._thread = None
+                    return
+                profiles = list(self._active)
+            stacks = [stack for ident, frame in sys._current_frames().items()
+                      if ident != me and (stack := _collapse(frame))]
+            for profile in profiles:
+                profile.add(stacks)
+            time.sleep(settings.PROFILE_INTERVAL_MS / 1000)
+
+_sampler = _Sampler()
+_write_lock = threading.Lock()
+
+def _header(scope, name: bytes) -> bytes | None:
+    for key, value in scope.get("headers", []):
+        if key == name:
+            return value
+    return None
+
+def should_profile(scope) -> bool:
+    token = _header(scope, b"x-profile-token")
+    if settings.PROFILE_TOKEN and token and hmac.compare_digest(token, settings.PROFILE_TOKEN.encode()):
+        return True
+    if settings.PROFILE_PATH and scope["path"].startswith(settings.PROFILE_PATH):
+        return True
+    return settings.PROFILE_SAMPLE_RATE > 0 and random.random() < settings.PROFILE_SAMPLE_RATE
+
+def profile_path(scope) -> str:
+    name = re.sub(r"[^A-Za-z0-9]+", "_", f"{scope['method']} {route_template(scope)}").strip("_")
+    return os.path.join(settings.PROFILE_DIR, f"{name}.folded")
+
+def _save(path: str, profile: Profile):
+    collapsed = profile.collapsed()
+    if not collapsed:
+        return
+    with _write_lock:
+        os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(collapsed)
+
+class ServerTimingMiddleware:
+    """ASGI middleware; needs MetricsMiddleware outside it for the phase times."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not (settings.SERVER_TIMING_ENABLED or settings.PROFILING_ENABLED):
+            await self.app(scope, receive, send)
+            return
+        profile = Profile() if settings.PROFILING_ENABLED and should_profile(scope) else None
+        stats = current_request_stats()
+        start = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start" and settings.SERVER_TIMING_ENABLED:
+                phases, queries = (dict(stats.phases), stats.queries) if stats else ({}, 0)
+                value = server_timing(phases, queries, time.perf_counter() - start)
+                if profile is not None:
+                    value += f', profile;desc="{os.path.basename(profile_path(scope))}"'
+                message = {**message, "headers": [*message.get("headers", []), (b"server-timing", value.encode())]}
+            await send(message)
+
+        if profile is None:
+            await self.app(scope, receive, send_with_timing)
+            return
+        _sampler.attach(profile)
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _sampler.detach(profile)
+            _save(profile_path(scope), profile)
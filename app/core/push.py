@@ -0,0 +1,180 @@
+"""In-process pub/sub hub for pushing notification events to connected clients.
+
+Stream endpoints subscribe() per connection and read events from an
+asyncio.Queue. publish() may be called from any thread (the notification writer
+runs in its own); events go through the configured Broker, which must call
+_deliver() in every worker that could hold the recipient's connection:
+
+- LocalBroker hands events straight to this worker's subscribers. Enough for a
+  single worker.
+- DatabaseBroker ignores publish() and instead polls recently written
+  notifications, so every worker sees every event without extra writes.
+
+Other transports (e.g. Redis pub/sub) plug in through set_broker().
+"""
+import asyncio
+import logging
+import threading
+import time
+from app.core.config import settings
+from app.core.database import get_db_connection
+
+logger = logging.getLogger(__name__)
+
+# Queued on a subscription whose buffer overflowed: the stream ends and the
+# client reconnects and refetches, instead of silently missing events.
+OVERFLOW = object()
+
+class Subscription:
+    def __init__(self, user_id: str):
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        # One slot is kept free for the OVERFLOW marker
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=settings.PUSH_BUFFER_SIZE + 1)
+        self.overflowed = False
+
+    def _put(self, event):
+        if self.overflowed:
+            return
+        if self.queue.qsize() >= settings.PUSH_BUFFER_SIZE:
+            self.overflowed = True
+            event = OVERFLOW
+        self.queue.put_nowait(event)
+
+    def offer(self, event):
+        # Subscribers live on the event loop; publishers may not
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            pass  # loop already closed (shutdown)
+
+_subscriptions: dict[str, set[Subscription]] = {}
+_lock = threading.Lock()
+_stats = {"published": 0, "delivered": 0, "overflows": 0}
+
+def subscribe(user_id: str) -> Subscription:
+    sub = Subscription(user_id)
+    with _lock:
+        _subscriptions.setdefault(user_id, set()).add(sub)
+    return sub
+
+def unsubscribe(sub: Subscription):
+    with _lock:
+        subs = _subscriptions.get(sub.user_id)
+        if subs is not None:
+            subs.discard(sub)
+            if not subs:
+                del _subscriptions[sub.user_id]
+        if sub.overflowed:
+            _stats["overflows"] += 1
+
+def _deliver(user_id: str, event: dict):
+    with _lock:
+        subs = list(_subscriptions.get(user_id, ()))
+        _stats["delivered"] += len(subs)
+    for sub in subs:
+        sub.offer(event)
+
+class Broker:
+    def start(self):
+        pass
+
+    def publish(self, user_id: str, event: dict):
+        raise NotImplementedError
+
+    def stop(self):
+        pass
+
+class LocalBroker(Broker):
+    def publish(self, user_id: str, event: dict):
+        _deliver(user_id, event)
+
+class DatabaseBroker(Broker):
+    """Polls notifications written in the last few seconds (ix_notif_created).
+    Coalesced rows count as new events each time their created_at moves."""
+
+    _OVERLAP_SECONDS = 5
+
+    def __init__(self):
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._poll_forever, name="push-broker", daemon=True)
+        self._thread.start()
+
+    def publish(self, user_id: str, event: dict):
+        pass  # the notification row itself is the message
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _poll_forever(self):
+        seen: dict[tuple, float] = {}
+        window = settings.PUSH_POLL_SECONDS + self._OVERLAP_SECONDS
+        while not self._stop.wait(settings.PUSH_POLL_SECONDS):
+            try:
+                conn = get_db_connection()
+                try:
+                    cursor = conn.cursor()
+                    cursor.execute(
+                        """
+                        SELECT id, created_at, user_id, type, creator_id, post_id, comment_id
+                        FROM notifications
+                        WHERE created_at > SYSTIMESTAMP - NUMTODSINTERVAL(:1, 'SECOND')
+                        """,
+                        (window,),
+                    )
+                    rows = cursor.fetchall()
+                    cursor.close()
+                finally:
+                    conn.close()
+                now = time.monotonic()
+                for row in rows:
+                    if row[:2] in seen:
+                        continue
+                    seen[row[:2]] = now
+                    _deliver(row[2], make_event(*row[3:]))
+                for key in [k for k, t in seen.items() if t < now - 2 * window]:
+                    del seen[key]
+            except Exception:
+                logger.exception("Push broker poll failed")
+
+_broker: Broker = LocalBroker()
+
+def set_broker(broker: Broker):
+    global _broker
+    _broker = broker
+
+def make_event(type_n: str, creator_id: str, post_id: str | None, comment_id: str | None) -> dict:
+    return {"type": type_n, "creatorId": creator_id, "postId": post_id, "commentId": comment_id}
+
+def publish(user_id: str, event: dict):
+    with _lock:
+        _stats["published"] += 1
+    _broker.publish(user_id, event)
+
+def start():
+    if settings.PUSH_BROKER == "database":
+        if settings.DB_BACKEND == "sqlite":
+            # The poll is Oracle SQL; an embedded database serves a single worker anyway
+            logger.warning("PUSH_BROKER=database is not supported with DB_BACKEND=sqlite, using the local broker")
+        else:
+            set_broker(DatabaseBroker())
+    _broker.start()
+
+def stop():
+    _broker.stop()
+
+def push_stats() -> dict:
+    with _lock:
+        return {
+            "broker": type(_broker).__name__,
+            "users": len(_subscriptions),
+            "connections": sum(len(subs) for subs in _subscriptions.values()),
+            **_stats,
+        }
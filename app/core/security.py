@@ -1,30 +1,128 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
+from fastapi import HTTPException, status
 from jose import jwt
 import bcrypt  # Use bcrypt directly instead of passlib
 from app.core.config import settings
 
+def _checkpw(password_byte: bytes, hashed_password_byte: bytes) -> bool:
+    try:
+        return bcrypt.checkpw(password_byte, hashed_password_byte)
+    except ValueError:
+        # Malformed or placeholder hash (e.g. imported accounts): never matches
+        return False
+
+def _hashpw(pwd_bytes: bytes, rounds: int) -> bytes:
+    return bcrypt.hashpw(pwd_bytes, bcrypt.gensalt(rounds=rounds))
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     # bcrypt.checkpw requires bytes
     password_byte = plain_password.encode('utf-8')
-    
+
     # Ensure hashed_password is bytes (it might come as str from DB)
     if isinstance(hashed_password, str):
         hashed_password_byte = hashed_password.encode('utf-8')
     else:
         hashed_password_byte = hashed_password
 
-    return bcrypt.checkpw(password_byte, hashed_password_byte)
+    return _checkpw(password_byte, hashed_password_byte)
 
 def get_password_hash(password: str) -> str:
     # bcrypt.hashpw requires bytes and returns bytes
     pwd_bytes = password.encode('utf-8')
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(pwd_bytes, salt)
+    hashed = _hashpw(pwd_bytes, settings.BCRYPT_ROUNDS)
     # Return as string for database storage
     return hashed.decode('utf-8')
 
+def needs_rehash(hashed_password: str) -> bool:
+    """True when the stored hash ($2b$<cost>$...) was made with a different work factor."""
+    try:
+        return int(hashed_password.split("$")[2]) != settings.BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return False
+
+# --- Dedicated password hashing pool ---
+# bcrypt is deliberately slow; running it on the shared anyio threadpool lets a
+# login burst starve every other sync endpoint. Work goes to its own small
+# executor instead, and callers get a 503 once too much work is queued.
+
+_executor: Executor | None = None
+_pending = 0
+_metrics_lock = threading.Lock()
+_metrics = {
+    "hash": {"count": 0, "seconds_total": 0.0, "seconds_max": 0.0},
+    "verify": {"count": 0, "seconds_total": 0.0, "seconds_max": 0.0},
+    "rejected": 0,
+}
+
+def start_password_hasher():
+    global _executor
+    if _executor is None:
+        if settings.PASSWORD_HASH_USE_PROCESSES:
+            _executor = ProcessPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS)
+        else:
+            _executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+    return _executor
+
+def shutdown_password_hasher():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
+
+async def _run_in_hasher(op: str, fn, *args):
+    global _pending
+    executor = _executor or start_password_hasher()
+    with _metrics_lock:
+        if _pending >= settings.PASSWORD_HASH_MAX_PENDING:
+            _metrics["rejected"] += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many authentication requests, try again",
+                headers={"Retry-After": "1"},
+            )
+        _pending += 1
+
+    start = time.perf_counter()
+    try:
+        return await asyncio.wrap_future(executor.submit(fn, *args))
+    finally:
+        elapsed = time.perf_counter() - start
+        with _metrics_lock:
+            _pending -= 1
+            stats = _metrics[op]
+            stats["count"] += 1
+            stats["seconds_total"] += elapsed
+            stats["seconds_max"] = max(stats["seconds_max"], elapsed)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    if isinstance(hashed_password, str):
+        hashed_password = hashed_password.encode('utf-8')
+    return await _run_in_hasher("verify", _checkpw, plain_password.encode('utf-8'), hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    hashed = await _run_in_hasher("hash", _hashpw, password.encode('utf-8'), settings.BCRYPT_ROUNDS)
+    return hashed.decode('utf-8')
+
+def password_hasher_stats() -> dict:
+    """Latency counters include queueing time, which is what callers experience."""
+    with _metrics_lock:
+        return {
+            "workers": settings.PASSWORD_HASH_WORKERS,
+            "processes": settings.PASSWORD_HASH_USE_PROCESSES,
+            "rounds": settings.BCRYPT_ROUNDS,
+            "pending": _pending,
+            "max_pending": settings.PASSWORD_HASH_MAX_PENDING,
+            "rejected": _metrics["rejected"],
+            "hash": dict(_metrics["hash"]),
+            "verify": dict(_metrics["verify"]),
+        }
+
 def create_access_token(data: dict) -> str:
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
\ No newline at end of file
+    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
@@ -0,0 +1,46 @@
+"""Session versions: a per-user counter embedded in tokens as the `sv` claim.
+
+Bumping users.session_version (logout, password change) revokes every token
+issued before the bump. Versions are cached per worker so the check costs no
+database work on the hot path; other workers learn about a bump through the
+cache invalidation channel, or at the latest after SESSION_VERSION_TTL_SECONDS.
+"""
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.database import get_async_db_connection
+from app.core import invalidation
+from app.repository import user as user_crud
+
+_versions = TTLCache("session_versions", settings.TOKEN_CACHE_SIZE, settings.SESSION_VERSION_TTL_SECONDS)
+
+invalidation.register_handler("session_versions", _versions.pop)
+
+async def current_session_version(user_id: str) -> int | None:
+    """None when the user no longer exists. Raises PoolTimeoutError when no
+    connection is free.
+
+    Misses are read on the async pool: auth runs on the event loop, and a sync
+    request thread that already holds a pooled connection never waits for a
+    second one from the pool sized to the threadpool."""
+    version = _versions.get(user_id)
+    if version is not None:
+        return version
+
+    conn = await get_async_db_connection()
+    try:
+        cursor = conn.cursor()
+        version = await user_crud.get_session_version_async(cursor, user_id)
+        cursor.close()
+    finally:
+        await conn.close()
+    if version is None:
+        return None
+    _versions.set(user_id, version)
+    return version
+
+def revoke_sessions(cursor, user_id: str) -> int:
+    """Invalidates all of the user's existing tokens; returns the new version."""
+    version = user_crud.bump_session_version(cursor, user_id)
+    # Evicted again after commit, so a concurrent reload can't keep the old one
+    invalidation.publish(cursor, "session_versions", user_id)
+    return version
@@ -0,0 +1,214 @@
+"""Embedded SQLite storage for DB_BACKEND=sqlite (local profiling, load tests, CI).
+
+Connections are opened per request against the SQLITE_PATH file (cheap for
+SQLite) with foreign keys on and WAL journaling so readers don't block the
+writer. The schema mirrors app/init_db.py and is created on first use.
+
+Timestamps are stored as 'YYYY-MM-DD HH:MM:SS.ffffff' text, which sorts and
+compares like the value it holds, and come back as datetime for TIMESTAMP
+columns. The async connection wraps the same synchronous calls: statements
+run on the event loop, which is acceptable for a local file.
+"""
+import sqlite3
+import threading
+from datetime import datetime
+from app.core.config import settings
+from app.core.pagination import PageParams
+
+TS_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+sqlite3.register_adapter(datetime, lambda value: value.strftime(TS_FORMAT))
+sqlite3.register_converter("TIMESTAMP", lambda value: datetime.fromisoformat(value.decode()))
+
+# strftime's %f has milliseconds only; pad to the microsecond format above
+_NOW_SQL = "(strftime('%Y-%m-%d %H:%M:%f000', 'now'))"
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS users (
+    id TEXT PRIMARY KEY NOT NULL,
+    email TEXT UNIQUE NOT NULL,
+    username TEXT UNIQUE NOT NULL,
+    password_hash TEXT NOT NULL,
+    name TEXT,
+    bio TEXT,
+    image TEXT,
+    location TEXT,
+    website TEXT,
+    follower_count INTEGER DEFAULT 0 NOT NULL,
+    following_count INTEGER DEFAULT 0 NOT NULL,
+    post_count INTEGER DEFAULT 0 NOT NULL,
+    session_version INTEGER DEFAULT 0 NOT NULL,
+    created_at TIMESTAMP DEFAULT {_NOW_SQL},
+    updated_at TIMESTAMP DEFAULT {_NOW_SQL}
+);
+CREATE TABLE IF NOT EXISTS posts (
+    id TEXT PRIMARY KEY NOT NULL,
+    author_id TEXT NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    content_text TEXT,
+    content TEXT,
+    image TEXT,
+    like_count INTEGER DEFAULT 0 NOT NULL,
+    comment_count INTEGER DEFAULT 0 NOT NULL,
+    created_at TIMESTAMP DEFAULT {_NOW_SQL},
+    updated_at TIMESTAMP DEFAULT {_NOW_SQL}
+);
+CREATE TABLE IF NOT EXISTS comments (
+    id TEXT PRIMARY KEY NOT NULL,
+    content_text TEXT,
+    content TEXT,
+    author_id TEXT NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    post_id TEXT NOT NULL REFERENCES posts(id) ON DELETE CASCADE,
+    created_at TIMESTAMP DEFAULT {_NOW_SQL}
+);
+CREATE TABLE IF NOT EXISTS likes (
+    id TEXT PRIMARY KEY NOT NULL,
+    post_id TEXT NOT NULL REFERENCES posts(id) ON DELETE CASCADE,
+    user_id TEXT NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    created_at TIMESTAMP DEFAULT {_NOW_SQL},
+    CONSTRAINT uq_like_user_post UNIQUE (user_id, post_id)
+);
+CREATE TABLE IF NOT EXISTS follows (
+    follower_id TEXT NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    following_id TEXT NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    created_at TIMESTAMP DEFAULT {_NOW_SQL},
+    PRIMARY KEY (follower_id, following_id)
+);
+CREATE TABLE IF NOT EXISTS notifications (
+    id TEXT PRIMARY KEY NOT NULL,
+    user_id TEXT NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    creator_id TEXT NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    type TEXT NOT NULL,
+    read_status INTEGER DEFAULT 0,
+    post_id TEXT REFERENCES posts(id) ON DELETE CASCADE,
+    comment_id TEXT REFERENCES comments(id) ON DELETE CASCADE,
+    group_key TEXT,
+    actor_count INTEGER DEFAULT 1 NOT NULL,
+    recent_actor_ids TEXT NOT NULL,
+    seq INTEGER,
+    created_at TIMESTAMP DEFAULT {_NOW_SQL}
+);
+-- Stands in for the Oracle notification_seq default; the UPSERT bumps it on coalescing
+CREATE TRIGGER IF NOT EXISTS tr_notif_seq AFTER INSERT ON notifications WHEN NEW.seq IS NULL
+BEGIN
+    UPDATE notifications SET seq = (SELECT COALESCE(MAX(seq), 0) + 1 FROM notifications) WHERE rowid = NEW.rowid;
+END;
+CREATE TABLE IF NOT EXISTS timelines (
+    user_id TEXT NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    post_id TEXT NOT NULL REFERENCES posts(id) ON DELETE CASCADE,
+    author_id TEXT NOT NULL,
+    created_at TIMESTAMP NOT NULL,
+    PRIMARY KEY (user_id, post_id)
+);
+CREATE TABLE IF NOT EXISTS cache_invalidations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    cache_name TEXT NOT NULL,
+    cache_key TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT {_NOW_SQL}
+);
+CREATE TABLE IF NOT EXISTS notification_outbox (
+    id TEXT PRIMARY KEY NOT NULL,
+    type TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    creator_id TEXT NOT NULL,
+    post_id TEXT,
+    comment_id TEXT,
+    group_key TEXT,
+    created_at TIMESTAMP DEFAULT {_NOW_SQL}
+);
+CREATE TABLE IF NOT EXISTS notification_actors (
+    group_key TEXT NOT NULL,
+    actor_id TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT {_NOW_SQL},
+    PRIMARY KEY (group_key, actor_id)
+);
+CREATE TABLE IF NOT EXISTS follow_suggestions (
+    user_id TEXT NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    suggested_id TEXT NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    mutual_count INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    computed_at TIMESTAMP DEFAULT {_NOW_SQL},
+    PRIMARY KEY (user_id, suggested_id)
+);
+CREATE INDEX IF NOT EXISTS ix_posts_created ON posts (created_at, id);
+CREATE INDEX IF NOT EXISTS ix_posts_author_created ON posts (author_id, created_at, id);
+CREATE INDEX IF NOT EXISTS ix_likes_user_created ON likes (user_id, created_at, id);
+CREATE INDEX IF NOT EXISTS ix_likes_post ON likes (post_id);
+CREATE INDEX IF NOT EXISTS ix_comments_post_created ON comments (post_id, created_at, id);
+CREATE INDEX IF NOT EXISTS ix_notif_user_created ON notifications (user_id, created_at, id);
+CREATE INDEX IF NOT EXISTS ix_notif_user_seq ON notifications (user_id, seq);
+CREATE INDEX IF NOT EXISTS ix_notif_seq ON notifications (seq);
+CREATE INDEX IF NOT EXISTS ix_notif_user_unread ON notifications (user_id, read_status);
+CREATE UNIQUE INDEX IF NOT EXISTS ux_notif_group ON notifications (group_key);
+CREATE INDEX IF NOT EXISTS ix_notif_post ON notifications (post_id);
+CREATE INDEX IF NOT EXISTS ix_notif_comment ON notifications (comment_id);
+CREATE INDEX IF NOT EXISTS ix_notif_created ON notifications (created_at);
+CREATE INDEX IF NOT EXISTS ix_notif_actors_created ON notification_actors (created_at);
+CREATE INDEX IF NOT EXISTS ix_timelines_user_created ON timelines (user_id, created_at, post_id);
+CREATE INDEX IF NOT EXISTS ix_timelines_user_author ON timelines (user_id, author_id);
+CREATE INDEX IF NOT EXISTS ix_timelines_post ON timelines (post_id);
+CREATE INDEX IF NOT EXISTS ix_follows_following ON follows (following_id, follower_id);
+CREATE INDEX IF NOT EXISTS ix_users_follower_count ON users (follower_count);
+CREATE INDEX IF NOT EXISTS ix_suggestions_suggested ON follow_suggestions (suggested_id);
+CREATE INDEX IF NOT EXISTS ix_suggestions_computed ON follow_suggestions (computed_at);
+"""
+
+_schema_lock = threading.Lock()
+_schema_ready = False
+
+def connect(path: str | None = None) -> sqlite3.Connection:
+    conn = sqlite3.connect(
+        path or settings.SQLITE_PATH,
+        timeout=settings.DB_POOL_TIMEOUT_MS / 1000,  # wait for the writer lock like for a pool slot
+        detect_types=sqlite3.PARSE_DECLTYPES,
+        isolation_level="IMMEDIATE",  # take the write lock when the transaction starts
+        check_same_thread=False,  # dependencies may open and close it on different threads
+    )
+    conn.execute("PRAGMA foreign_keys = ON")
+    return conn
+
+def create_schema(conn: sqlite3.Connection):
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.executescript(SCHEMA)
+    conn.commit()
+
+def ensure_schema():
+    """Creates the tables in SQLITE_PATH once per process."""
+    global _schema_ready
+    with _schema_lock:
+        if not _schema_ready:
+            conn = connect()
+            try:
+                create_schema(conn)
+            finally:
+                conn.close()
+            _schema_ready = True
+
+def now() -> datetime:
+    return datetime.utcnow()
+
+def keyset_filter(ts_col: str, id_col: str, page: PageParams, op: str = "<") -> tuple[str, dict]:
+    """pagination.keyset_filter for SQLite: cursor timestamps are already in the
+    stored text format, so they compare directly."""
+    if page.after is None:
+        return "", {}
+    sql = f"({ts_col} {op} :after_ts OR ({ts_col} = :after_ts AND {id_col} {op} :after_id))"
+    return sql, {"after_ts": page.after[0], "after_id": page.after[1]}
+
+class AsyncConnection:
+    """The subset of oracledb.AsyncConnection the request scope uses. cursor()
+    hands out a plain sqlite3 cursor; app.crud.sqlite's *_async functions take it."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+
+    def cursor(self) -> sqlite3.Cursor:
+        return self._conn.cursor()
+
+    async def commit(self):
+        self._conn.commit()
+
+    async def rollback(self):
+        self._conn.rollback()
+
+    async def close(self):
+        self._conn.close()
@@ -0,0 +1,60 @@
+"""Periodic recomputation of follow suggestions (see app/crud/suggestion.py).
+
+Every worker runs this thread when SUGGESTIONS_REFRESH_SECONDS > 0, but only
+refreshes when the stored lists are older than the interval. The check runs
+under the refresh lock, so a worker that waited for another one's refresh
+finds the lists fresh and goes back to sleep.
+"""
+import logging
+import threading
+from app import repository
+from app.core.config import settings
+from app.core.database import get_db_connection
+
+logger = logging.getLogger(__name__)
+
+_refresher: threading.Thread | None = None
+_stop = threading.Event()
+
+def refresh(max_age_seconds: float | None = None) -> bool:
+    """Recomputes suggestions unless they are younger than max_age_seconds;
+    returns whether it did."""
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        written = repository.suggestion.refresh(cursor, max_age_seconds)
+        conn.commit()
+        cursor.close()
+    finally:
+        conn.close()
+    if written is None:
+        return False
+    # Not before the commit: a request reading in between would cache the old lists again
+    repository.suggestion.clear_cache()
+    logger.info("Refreshed follow suggestions: %d rows", written)
+    return True
+
+def _refresh_forever():
+    while True:
+        try:
+            refresh(settings.SUGGESTIONS_REFRESH_SECONDS)
+        except Exception:
+            logger.exception("Follow suggestion refresh failed")
+        if _stop.wait(settings.SUGGESTIONS_REFRESH_SECONDS):
+            return
+
+def start():
+    global _refresher
+    if _refresher is not None or settings.SUGGESTIONS_REFRESH_SECONDS <= 0:
+        return
+    _stop.clear()
+    _refresher = threading.Thread(target=_refresh_forever, name="suggestion-refresher", daemon=True)
+    _refresher.start()
+
+def stop(timeout: float = 5):
+    global _refresher
+    if _refresher is None:
+        return
+    _stop.set()
+    _refresher.join(timeout=timeout)
+    _refresher = None
@@ -0,0 +1,33 @@
+"""Storage of user-written text (posts.content, comments.content).
+
+Text that fits CONTENT_INLINE_MAX_BYTES is stored in the VARCHAR2 column
+`content_text` and never touches LOB machinery; longer text overflows into the
+CLOB column `content`. Readers select both and take whichever is set.
+"""
+import time
+from app.core.config import settings
+from app.core.instrumentation import record_phase
+
+# VARCHAR2 limit with the default MAX_STRING_SIZE = STANDARD
+_VARCHAR2_MAX_BYTES = 4000
+
+def split_content(text: str | None) -> tuple[str | None, str | None]:
+    """Returns (content_text, content) column values for `text`."""
+    if text is None:
+        return None, None
+    limit = min(settings.CONTENT_INLINE_MAX_BYTES, _VARCHAR2_MAX_BYTES)
+    if len(text.encode("utf-8")) <= limit:
+        return text, None
+    return None, text
+
+def read_lob(value):
+    """CLOBs arrive as str when fetched as strings, or as LOB locators otherwise."""
+    if value and hasattr(value, "read"):
+        start = time.perf_counter()
+        text = value.read()
+        record_phase("lob", time.perf_counter() - start)
+        return text
+    return value
+
+def join_content(inline, overflow):
+    return inline if inline is not None else read_lob(overflow)
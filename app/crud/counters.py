@@ -0,0 +1,51 @@
+"""Bulk recomputation of the denormalized counter columns.
+
+posts.like_count/comment_count and users.follower_count/following_count/post_count
+are maintained incrementally by the write paths; these statements rebuild them from
+the interaction tables with one grouped pass each and only touch rows that drifted.
+"""
+
+_RECONCILE_POSTS_SQL = """
+    MERGE INTO posts p
+    USING (
+        SELECT p2.id, NVL(l.cnt, 0) as like_count, NVL(c.cnt, 0) as comment_count
+        FROM posts p2
+        LEFT JOIN (SELECT post_id, COUNT(*) cnt FROM likes GROUP BY post_id) l ON l.post_id = p2.id
+        LEFT JOIN (SELECT post_id, COUNT(*) cnt FROM comments GROUP BY post_id) c ON c.post_id = p2.id
+    ) s
+    ON (p.id = s.id)
+    WHEN MATCHED THEN UPDATE SET p.like_count = s.like_count, p.comment_count = s.comment_count
+    WHERE p.like_count != s.like_count OR p.comment_count != s.comment_count
+"""
+
+_RECONCILE_USERS_SQL = """
+    MERGE INTO users u
+    USING (
+        SELECT u2.id,
+               NVL(fr.cnt, 0) as follower_count,
+               NVL(fg.cnt, 0) as following_count,
+               NVL(p.cnt, 0) as post_count
+        FROM users u2
+        LEFT JOIN (SELECT following_id, COUNT(*) cnt FROM follows GROUP BY following_id) fr ON fr.following_id = u2.id
+        LEFT JOIN (SELECT follower_id, COUNT(*) cnt FROM follows GROUP BY follower_id) fg ON fg.follower_id = u2.id
+        LEFT JOIN (SELECT author_id, COUNT(*) cnt FROM posts GROUP BY author_id) p ON p.author_id = u2.id
+    ) s
+    ON (u.id = s.id)
+    WHEN MATCHED THEN UPDATE SET
+        u.follower_count = s.follower_count,
+        u.following_count = s.following_count,
+        u.post_count = s.post_count
+    WHERE u.follower_count != s.follower_count
+       OR u.following_count != s.following_count
+       OR u.post_count != s.post_count
+"""
+
+def reconcile_post_counters(cursor) -> int:
+    """Returns the number of posts whose counters were repaired."""
+    cursor.execute(_RECONCILE_POSTS_SQL)
+    return cursor.rowcount
+
+def reconcile_user_counters(cursor) -> int:
+    """Returns the number of users whose counters were repaired."""
+    cursor.execute(_RECONCILE_USERS_SQL)
+    return cursor.rowcount
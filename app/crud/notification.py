@@ -1,4 +1,9 @@
+import time
 import uuid
+from app.core import notification_queue
+from app.core.config import settings
+from app.core.pagination import PageParams, encode_seq_cursor, seq_filter, split_page
+from app.crud.content import join_content
 
 def create_notification(cursor, type_n: str, user_id: str, creator_id: str, post_id: str = None, comment_id: str = None):
     # Don't notify if user interacts with themselves
@@ -6,57 +11,158 @@ def create_notification(cursor, type_n: str, user_id: str, creator_id: str, post
         return
         
     nid = str(uuid.uuid4())
-    # 0 = Unread, 1 = Read
-    sql = """
-        INSERT INTO notifications (id, type, user_id, creator_id, post_id, comment_id, read_status)
-        VALUES (:1, :2, :3, :4, :5, :6, 0)
-    """
-    cursor.execute(sql, (nid, type_n, user_id, creator_id, post_id, comment_id))
+    # Inserted (unread) by the write-behind queue once the caller's transaction commits
+    group_key = _group_key(type_n, user_id, post_id)
+    notification_queue.submit(cursor, (nid, type_n, user_id, creator_id, post_id, comment_id, group_key))
+
+# Only these types are aggregated ("Alice and 41 others liked your post");
+# every comment stays its own notification.
+_COALESCED_TYPES = ("LIKE", "FOLLOW")
+
+def _bucket(type_n: str) -> int | None:
+    window = settings.NOTIFICATION_COALESCE_WINDOW_SECONDS
+    if type_n not in _COALESCED_TYPES or window <= 0:
+        return None
+    return int(time.time() // window)
+
+def _group_key(type_n: str, user_id: str, post_id: str | None, bucket: int | None = None) -> str | None:
+    bucket = _bucket(type_n) if bucket is None else bucket
+    if bucket is None:
+        return None
+    return f"{type_n}:{user_id}:{post_id or ''}:{bucket}"
+
+def _notification_binds(type_n: str, creator_id: str, post_id: str = None, comment_id: str = None) -> dict:
+    """Binds for notification_delivery._outbox_sql(); :notif_outbox says whether the block writes the
+    outbox itself (NOTIFICATION_QUEUE_SIZE=0) or leaves delivery to _submit_notification."""
+    return {
+        "notif_id": str(uuid.uuid4()), "notif_type": type_n, "notif_creator_id": creator_id,
+        "notif_post_id": post_id, "notif_comment_id": comment_id, "notif_bucket": _bucket(type_n),
+        "notif_outbox": int(notification_queue.writes_outbox()),
+    }
 
-def get_notifications(cursor, user_id: str):
-    sql = """
+def _submit_notification(cursor, binds: dict, user_id: str):
+    """Delivers the event of a block that ran notification_delivery._outbox_sql(), notifying user_id."""
+    if user_id == binds["notif_creator_id"]:
+        return
+    type_n, post_id = binds["notif_type"], binds["notif_post_id"]
+    row = (
+        binds["notif_id"], type_n, user_id, binds["notif_creator_id"], post_id, binds["notif_comment_id"],
+        _group_key(type_n, user_id, post_id, binds["notif_bucket"]),
+    )
+    notification_queue.submit(cursor, row, in_outbox=bool(binds["notif_outbox"]))
+
+def _notifications_query(user_id: str, page: PageParams):
+    # Ordered by seq, not created_at: seq only grows, so a row that coalesces new
+    # activity moves to the head and is never listed twice, whereas created_at
+    # can move back (relayed events carry their spill time)
+    seek, params = seq_filter("n.seq", page)
+    sql = f"""
         SELECT n.id, n.type, n.read_status, n.created_at,
                c.id as creator_id, c.name, c.username, c.image,
-               p.id as post_id, p.content, p.image as post_image,
-               cm.id as comment_id, cm.content as comment_content
+               p.id as post_id, p.content_text, p.image as post_image,
+               cm.id as comment_id, cm.content_text as comment_content,
+               p.content as post_overflow, cm.content as comment_overflow,
+               n.actor_count, n.recent_actor_ids, n.seq
         FROM notifications n
         JOIN users c ON n.creator_id = c.id
         LEFT JOIN posts p ON n.post_id = p.id
         LEFT JOIN comments cm ON n.comment_id = cm.id
-        WHERE n.user_id = :1
-        ORDER BY n.created_at DESC
+        WHERE n.user_id = :user_id {"AND " + seek if seek else ""}
+        ORDER BY n.seq DESC
+        FETCH FIRST :limit ROWS ONLY
     """
-    cursor.execute(sql, (user_id,))
-    rows = cursor.fetchall()
-    
+    return sql, {**params, "user_id": user_id, "limit": page.limit + 1}
+
+def _notification_key(row):
+    return (row[17],)
+
+def _recent_actor_ids(rows) -> list[str]:
+    return sorted({actor_id for row in rows for actor_id in row[16].split(",")})
+
+def _actors_query(actor_ids):
+    bind_names = [f":a{i}" for i in range(len(actor_ids))]
+    sql = f"SELECT id, name, username, image FROM users WHERE id IN ({', '.join(bind_names)})"
+    return sql, {f"a{i}": actor_id for i, actor_id in enumerate(actor_ids)}
+
+def _format_actor(row):
+    return {"id": row[0], "name": row[1], "username": row[2], "image": row[3]}
+
+def _format_notifications(rows, actors_by_id):
     results = []
     for row in rows:
-        # Handle Oracle CLOBs if present
-        post_content = row[9].read() if row[9] and hasattr(row[9], 'read') else row[9]
-        comment_content = row[12].read() if row[12] and hasattr(row[12], 'read') else row[12]
+        post_content = join_content(row[9], row[13])
+        comment_content = join_content(row[12], row[14])
 
         results.append({
             "id": row[0],
             "type": row[1],
             "read": bool(row[2]),
             "createdAt": row[3],
-            "creator": {
-                "id": row[4], "name": row[5], "username": row[6], "image": row[7]
-            },
+            # Bumped whenever the row is written; the mark-all-read watermark
+            "seq": row[17],
+            # creator is the latest actor; actors holds the most recent few of actorCount
+            "creator": _format_actor(row[4:8]),
+            "actorCount": row[15],
+            "actors": [actors_by_id[a] for a in row[16].split(",") if a in actors_by_id],
             "post": {"id": row[8], "content": post_content, "image": row[10]} if row[8] else None,
             "comment": {"id": row[11], "content": comment_content} if row[11] else None
         })
     return results
 
+def get_notifications(cursor, user_id: str, page: PageParams):
+    """Returns (notifications, next_cursor), newest first."""
+    sql, params = _notifications_query(user_id, page)
+    cursor.execute(sql, params)
+    rows, next_cursor = split_page(cursor.fetchall(), page.limit, _notification_key, encode_seq_cursor)
+    actors_by_id = {}
+    actor_ids = _recent_actor_ids(rows)
+    if actor_ids:
+        cursor.execute(*_actors_query(actor_ids))
+        actors_by_id = {r[0]: _format_actor(r) for r in cursor}
+    return _format_notifications(rows, actors_by_id), next_cursor
+
+async def get_notifications_async(cursor, user_id: str, page: PageParams):
+    sql, params = _notifications_query(user_id, page)
+    # CLOBs come back as strings; AsyncLOB.read() would be a round trip per row
+    await cursor.execute(sql, params, fetch_lobs=False)
+    rows, next_cursor = split_page(await cursor.fetchall(), page.limit, _notification_key, encode_seq_cursor)
+    actors_by_id = {}
+    actor_ids = _recent_actor_ids(rows)
+    if actor_ids:
+        await cursor.execute(*_actors_query(actor_ids))
+        actors_by_id = {r[0]: _format_actor(r) for r in await cursor.fetchall()}
+    return _format_notifications(rows, actors_by_id), next_cursor
+
+# Answered from ix_notif_user_unread alone, without touching the table rows
+_UNREAD_COUNT_SQL = "SELECT COUNT(*) FROM notifications WHERE user_id = :1 AND read_status = 0"
+
+def get_unread_count(cursor, user_id: str) -> int:
+    cursor.execute(_UNREAD_COUNT_SQL, (user_id,))
+    return cursor.fetchone()[0]
+
+async def get_unread_count_async(cursor, user_id: str) -> int:
+    await cursor.execute(_UNREAD_COUNT_SQL, (user_id,))
+    return (await cursor.fetchone())[0]
+
 def mark_read(cursor, user_id: str, notification_ids: list[str]):
     if not notification_ids:
         return
-    
-    # Create binding string dynamically like :2, :3, :4
-    # :1 is reserved for user_id
-    bind_names = [f":{i+2}" for i in range(len(notification_ids))]
-    sql = f"UPDATE notifications SET read_status = 1 WHERE user_id = :1 AND id IN ({','.join(bind_names)})"
-    
-    # Combine user_id with the list of IDs for arguments
-    args = [user_id] + notification_ids
-    cursor.execute(sql, args)
\ No newline at end of file
+    # One statement text whatever the number of ids, executed as a single batch
+    cursor.executemany(
+        "UPDATE notifications SET read_status = 1 WHERE user_id = :1 AND id = :2",
+        [(user_id, nid) for nid in dict.fromkeys(notification_ids)],
+    )
+
+def mark_all_read(cursor, user_id: str, up_to: int | None = None) -> int:
+    """Marks unread notifications as read and returns how many changed.
+
+    `up_to` is the highest `seq` the client has shown. Every write, coalescing
+    included, takes a higher seq, so activity that arrived after it stays
+    unread. Without it, everything is marked."""
+    sql = "UPDATE notifications n SET read_status = 1 WHERE n.user_id = :user_id AND n.read_status = 0"
+    params = {"user_id": user_id}
+    if up_to is not None:
+        sql += " AND n.seq <= :up_to"
+        params["up_to"] = up_to
+    cursor.execute(sql, params)
+    return cursor.rowcount
@@ -0,0 +1,147 @@
+"""Statements behind the notification write-behind queue (app/core/notification_queue.py).
+
+Rows are (id, type, user_id, creator_id, post_id, comment_id, group_key). Each
+is a MERGE on its group_key, so repeated likes/follows coalesce into one row
+per recipient, post and time window. The actors of each group are recorded in
+`notification_actors` once their event has merged, so actor_count counts every
+actor once however often they act; prune_actors() drops rows older than two
+coalescing windows. Callers commit.
+"""
+from app.core.config import settings
+
+_COLUMNS = "id, type, user_id, creator_id, post_id, comment_id, group_key"
+_OUTBOX_SQL = f"INSERT INTO notification_outbox ({_COLUMNS}) VALUES (:1, :2, :3, :4, :5, :6, :7)"
+
+# Latest actors kept on a coalesced row, newest first. Ids are 36-char UUIDs, so
+# truncating the comma-separated list to this length keeps whole ids only.
+RECENT_ACTORS = 3
+RECENT_ACTORS_LEN = RECENT_ACTORS * 37 - 1
+
+def _merge_sql(source: str) -> str:
+    """Events with a group_key fold into the existing row for that key (resurfaced
+    as unread, one more actor unless notification_actors already has them or
+    an earlier event of the batch counts them: e.first_of_actor); events
+    without one (comments) always insert. Both take the next seq (the column
+    default on insert), which orders the listing. The actor moves to the front
+    of recent_actor_ids; ids are matched with their delimiters, so one can't
+    match inside another."""
+    return f"""
+        MERGE INTO notifications n
+        USING ({source}) e
+        ON (n.group_key = e.group_key)
+        WHEN MATCHED THEN UPDATE SET
+            n.actor_count = n.actor_count + CASE
+                WHEN e.first_of_actor = 1 AND NOT EXISTS (
+                    SELECT 1 FROM notification_actors a WHERE a.group_key = e.group_key AND a.actor_id = e.creator_id
+                ) THEN 1 ELSE 0 END,
+            n.recent_actor_ids = SUBSTR(
+                e.creator_id || RTRIM(REPLACE(',' || n.recent_actor_ids || ',', ',' || e.creator_id || ',', ','), ','),
+                1, {RECENT_ACTORS_LEN}
+            ),
+            n.creator_id = e.creator_id,
+            n.read_status = 0,
+            n.created_at = e.created_at,
+            n.seq = notification_seq.NEXTVAL
+        WHEN NOT MATCHED THEN INSERT
+            (id, type, user_id, creator_id, post_id, comment_id, group_key, actor_count, recent_actor_ids, read_status, created_at)
+        VALUES
+            (e.id, e.type, e.user_id, e.creator_id, e.post_id, e.comment_id, e.group_key, 1, e.creator_id, 0, e.created_at)
+    """
+
+_MERGE_SQL = _merge_sql("""
+    SELECT :1 AS id, :2 AS type, :3 AS user_id, :4 AS creator_id, :5 AS post_id,
+           :6 AS comment_id, :7 AS group_key, CURRENT_TIMESTAMP AS created_at, :8 AS first_of_actor
+    FROM dual
+""")
+_RELAY_SQL = _merge_sql(f"SELECT {_COLUMNS}, created_at, :2 AS first_of_actor FROM notification_outbox WHERE id = :1")
+
+_ACTOR_SQL = "INSERT INTO notification_actors (group_key, actor_id) VALUES (:1, :2)"
+_PRUNE_ACTORS_SQL = """
+    DELETE FROM notification_actors WHERE created_at < CURRENT_TIMESTAMP - NUMTODSINTERVAL(:1, 'SECOND')
+"""
+
+def _outbox_sql(recipient: str) -> str:
+    """PL/SQL writing the event described by notification._notification_binds()
+    to the outbox, for blocks that notify in their own round trip. `recipient`
+    is the PL/SQL expression for the user to notify; self-actions write nothing.
+    The group key is built like notification._group_key."""
+    return f"""
+    IF :notif_outbox = 1 AND {recipient} != :notif_creator_id THEN
+        INSERT INTO notification_outbox (id, type, user_id, creator_id, post_id, comment_id, group_key)
+        VALUES (
+            :notif_id, :notif_type, {recipient}, :notif_creator_id, :notif_post_id, :notif_comment_id,
+            CASE WHEN :notif_bucket IS NOT NULL
+                 THEN :notif_type || ':' || {recipient} || ':' || :notif_post_id || ':' || :notif_bucket END
+        );
+    END IF"""
+
+# ORA-00001: two workers created the same group at once; the retry merges into it
+_UNIQUE_VIOLATION = 1
+
+def _execute_batch(cursor, sql: str, rows: list, binds) -> tuple[list, list]:
+    """Returns (rows that went in, [(row, error)] for the ones that didn't)."""
+    cursor.executemany(sql, [binds(row) for row in rows], batcherrors=True)
+    errors = {error.offset: error for error in cursor.getbatcherrors()}
+    done = [row for i, row in enumerate(rows) if i not in errors]
+    return done, [(rows[i], error) for i, error in errors.items()]
+
+def _first_of_actor(rows: list) -> list[int]:
+    """0 for events whose actor already acted in the same group earlier in the batch."""
+    seen, flags = set(), []
+    for row in rows:
+        key = (row[6], row[3])
+        flags.append(0 if row[6] is not None and key in seen else 1)
+        seen.add(key)
+    return flags
+
+def _record_actors(cursor, rows: list):
+    actors = {(row[6], row[3]) for row in rows if row[6] is not None}
+    if actors:
+        # Another worker may have recorded the same actor meanwhile: the
+        # primary key rejects the duplicate and the rest go in
+        cursor.executemany(_ACTOR_SQL, list(actors), batcherrors=True)
+
+def _merge(cursor, sql: str, rows: list, binds) -> tuple[list, list]:
+    """Runs the MERGE for every row; binds(row, first_of_actor) gives its bind
+    values. Rows that lost a race to create the same group are retried once;
+    rows whose post/comment/user was deleted in the meantime fail their FK.
+    Actors are recorded for the rows that merged. Returns (rows written,
+    [(row, error message)])."""
+    items = list(zip(rows, _first_of_actor(rows)))
+    bind_item = lambda item: binds(*item)
+    done, failed = _execute_batch(cursor, sql, items, bind_item)
+    retry = [item for item, error in failed if error.code == _UNIQUE_VIOLATION]
+    if retry:
+        merged, failed_again = _execute_batch(cursor, sql, retry, bind_item)
+        done += merged
+        failed = [(item, error) for item, error in failed if error.code != _UNIQUE_VIOLATION] + failed_again
+    written = [row for row, _ in done]
+    _record_actors(cursor, written)
+    return written, [(row, error.message) for (row, _), error in failed]
+
+def write(cursor, rows: list[tuple]) -> tuple[list, list]:
+    return _merge(cursor, _MERGE_SQL, rows, binds=lambda row, first_of_actor: (*row, first_of_actor))
+
+def write_outbox(cursor, rows: list[tuple]):
+    cursor.executemany(_OUTBOX_SQL, rows)
+
+def relay_outbox_batch(cursor, limit: int) -> tuple[list, list, list]:
+    """Moves up to `limit` spilled events into notifications. Returns (rows taken
+    from the outbox, rows written, [(row, error message)])."""
+    # SKIP LOCKED lets every worker relay concurrently without double delivery
+    cursor.execute(f"SELECT {_COLUMNS} FROM notification_outbox WHERE ROWNUM <= :1 FOR UPDATE SKIP LOCKED", (limit,))
+    rows = cursor.fetchall()
+    if not rows:
+        return [], [], []
+    written, failed = _merge(cursor, _RELAY_SQL, rows, binds=lambda row, first_of_actor: (row[0], first_of_actor))
+    cursor.executemany("DELETE FROM notification_outbox WHERE id = :1", [(row[0],) for row in rows])
+    return rows, written, failed
+
+def prune_actors(cursor) -> int:
+    """Drops actors of groups whose window is over (a group takes events during
+    its window, plus outbox delays); returns the rows deleted."""
+    window = settings.NOTIFICATION_COALESCE_WINDOW_SECONDS
+    if window <= 0:
+        return 0
+    cursor.execute(_PRUNE_ACTORS_SQL, (2 * window,))
+    return cursor.rowcount
@@ -1,10 +1,26 @@
 import uuid
+import oracledb
 from collections import defaultdict
+from app.core.config import settings
+from app.core.pagination import PageParams, keyset_filter, split_page
+from app.crud import notification as notif_crud
+from app.crud.notification_delivery import _outbox_sql
+from app.crud import timeline as timeline_crud
+from app.crud import user as user_crud
+from app.crud.content import split_content, join_content
 
 def create_post(cursor, author_id: str, content: str, image: str | None):
     pid = str(uuid.uuid4())
-    sql = "INSERT INTO posts (id, author_id, content, image) VALUES (:1, :2, :3, :4)"
-    cursor.execute(sql, (pid, author_id, content, image))
+    sql = "INSERT INTO posts (id, author_id, content_text, content, image) VALUES (:1, :2, :3, :4, :5)"
+    cursor.execute(sql, (pid, author_id, *split_content(content), image))
+
+    follower_count = cursor.var(int)
+    cursor.execute(
+        "UPDATE users SET post_count = post_count + 1 WHERE id = :1 RETURNING follower_count INTO :2",
+        (author_id, follower_count),
+    )
+    timeline_crud.fan_out_post(cursor, pid, author_id, follower_count.getvalue()[0])
+    user_crud.invalidate_profile(cursor, author_id)  # post count changed
     return pid
 
 def get_post_by_id(cursor, post_id: str):
@@ -15,34 +31,113 @@ def get_post_by_id(cursor, post_id: str):
         return {"id": row[0], "author_id": row[1]}
     return None
 
+# Existence check, counter bump, insert and notification in one round trip. The
+# UPDATE locks the post, so it can't be deleted between the check and the insert.
+_CREATE_COMMENT_PLSQL = f"""
+BEGIN
+    UPDATE posts SET comment_count = comment_count + 1 WHERE id = :post_id
+    RETURNING author_id INTO :post_author_id;
+    IF SQL%ROWCOUNT > 0 THEN
+        INSERT INTO comments (id, author_id, post_id, content_text, content)
+        VALUES (:comment_id, :author_id, :post_id, :content_text, :content);
+        {_outbox_sql(":post_author_id")};
+    END IF;
+END;
+"""
+
 def create_comment(cursor, author_id: str, post_id: str, content: str):
+    """Adds the comment and notifies the post's author. Returns (comment_id,
+    post_author_id), or None if the post doesn't exist."""
     cid = str(uuid.uuid4())
-    sql = "INSERT INTO comments (id, author_id, post_id, content) VALUES (:1, :2, :3, :4)"
-    cursor.execute(sql, (cid, author_id, post_id, content))
-    return cid
+    content_text, overflow = split_content(content)
+    post_author_id = cursor.var(str)
+    notification = notif_crud._notification_binds("COMMENT", author_id, post_id, cid)
+    if overflow is not None:
+        # PL/SQL string binds stop at 32K; long text goes in as a temporary CLOB
+        cursor.setinputsizes(content=oracledb.DB_TYPE_CLOB)
+    cursor.execute(_CREATE_COMMENT_PLSQL, {
+        "post_id": post_id, "post_author_id": post_author_id, "comment_id": cid,
+        "author_id": author_id, "content_text": content_text, "content": overflow, **notification,
+    })
+    if post_author_id.getvalue() is None:
+        return None
+    notif_crud._submit_notification(cursor, notification, post_author_id.getvalue())
+    return cid, post_author_id.getvalue()
 
 def delete_post(cursor, post_id: str, author_id: str):
-    cursor.execute("SELECT author_id FROM posts WHERE id = :1", (post_id,))
-    row = cursor.fetchone()
-    if not row or row[0] != author_id:
+    # The author filter doubles as the ownership check
+    cursor.execute("DELETE FROM posts WHERE id = :1 AND author_id = :2", (post_id, author_id))
+    if cursor.rowcount == 0:
         return False
-    
-    cursor.execute("DELETE FROM posts WHERE id = :1", (post_id,))
+
+    cursor.execute("UPDATE users SET post_count = post_count - 1 WHERE id = :1", (author_id,))
+    user_crud.invalidate_profile(cursor, author_id)
     return True
 
+_POST_COLUMNS = """
+    SELECT p.id, p.content_text, p.image, p.created_at,
+           u.id as auth_id, u.name, u.username, u.image as auth_img,
+           p.like_count, p.comment_count, p.content as content_overflow
+"""
+
+def _post_key(row):
+    return row[3], row[0]
+
+def _liked_key(row):
+    # Liked posts are ordered by when the like happened (trailing l.created_at, l.id)
+    return row[11], row[12]
+
+# Everything a rendered post page depends on, minus the heavy parts (CLOBs,
+# comment previews): used to derive ETags without running the page query.
+_VERSION_COLUMNS = """
+    SELECT p.id, p.like_count, p.comment_count, u.updated_at
+"""
+
+def _feed_query(page: PageParams, columns=_POST_COLUMNS):
+    seek, params = keyset_filter("p.created_at", "p.id", page)
+    sql = f"""
+        {columns}
+        FROM posts p
+        JOIN users u ON p.author_id = u.id
+        {"WHERE " + seek if seek else ""}
+        ORDER BY p.created_at DESC, p.id DESC
+        FETCH FIRST :limit ROWS ONLY
+    """
+    return sql, {**params, "limit": page.limit + 1}
+
+def _posts_by_author_query(author_id: str, page: PageParams, columns=_POST_COLUMNS):
+    seek, params = keyset_filter("p.created_at", "p.id", page)
+    sql = f"""
+        {columns}
+        FROM posts p
+        JOIN users u ON p.author_id = u.id
+        WHERE p.author_id = :author_id {"AND " + seek if seek else ""}
+        ORDER BY p.created_at DESC, p.id DESC
+        FETCH FIRST :limit ROWS ONLY
+    """
+    return sql, {**params, "author_id": author_id, "limit": page.limit + 1}
+
+def _posts_liked_by_user_query(user_id: str, page: PageParams):
+    seek, params = keyset_filter("l.created_at", "l.id", page)
+    sql = f"""
+        {_POST_COLUMNS}, l.created_at as liked_at, l.id as like_id
+        FROM posts p
+        JOIN users u ON p.author_id = u.id
+        JOIN likes l ON l.post_id = p.id
+        WHERE l.user_id = :user_id {"AND " + seek if seek else ""}
+        ORDER BY l.created_at DESC, l.id DESC
+        FETCH FIRST :limit ROWS ONLY
+    """
+    return sql, {**params, "user_id": user_id, "limit": page.limit + 1}
+
 def _format_posts(rows, comments_by_post_id):
     """Helper to convert database tuples into clean dictionaries."""
     results = []
     for row in rows:
         post_id = row[0]
-        # Handle Oracle CLOB objects if they exist
-        post_content = row[1]
-        if post_content and hasattr(post_content, "read"):
-            post_content = post_content.read()
-
         results.append({
             "id": post_id,
-            "content": post_content,
+            "content": join_content(row[1], row[10]),
             "image": row[2],
             "createdAt": row[3],
             "author": {
@@ -50,109 +145,269 @@ def _format_posts(rows, comments_by_post_id):
             },
             "_count": {"likes": row[8], "comments": row[9]},
             "likes": [], # We can implement fetching these if needed
-            "comments": comments_by_post_id.get(post_id, []) 
+            "comments": comments_by_post_id.get(post_id, [])
         })
     return results
 
-def _fetch_and_group_comments(cursor, post_ids):
-    """Fetches all comments for a list of post IDs and groups them."""
-    if not post_ids:
-        return defaultdict(list)
-
-    # Create bind placeholders like :1, :2, :3
-    bind_names = [f":{i+1}" for i in range(len(post_ids))]
-    
-    comments_sql = f"""
-        SELECT c.id, c.content, c.created_at, c.post_id, 
-               u.id as author_id, u.name, u.username, u.image
-        FROM comments c
+# Oracle rejects IN lists longer than 1000 elements
+_MAX_IN_LIST = 1000
+
+def _chunks(ids, size=_MAX_IN_LIST):
+    for i in range(0, len(ids), size):
+        yield ids[i:i + size]
+
+def _comment_previews_query(post_ids):
+    """Latest COMMENT_PREVIEW_COUNT comments per post, oldest first within a post.
+    The window runs over the (post_id, created_at, id) index; only surviving rows
+    are joined to users and have their CLOB fetched."""
+    bind_names = [f":p{i}" for i in range(len(post_ids))]
+    sql = f"""
+        SELECT c.id, c.content_text, c.created_at, c.post_id,
+               u.id as author_id, u.name, u.username, u.image, c.content as content_overflow
+        FROM (
+            SELECT id, ROW_NUMBER() OVER (PARTITION BY post_id ORDER BY created_at DESC, id DESC) as rn
+            FROM comments
+            WHERE post_id IN ({','.join(bind_names)})
+        ) latest
+        JOIN comments c ON c.id = latest.id
         JOIN users u ON c.author_id = u.id
-        WHERE c.post_id IN ({','.join(bind_names)})
-        ORDER BY c.created_at ASC
+        WHERE latest.rn <= :preview_count
+        ORDER BY c.post_id, c.created_at ASC, c.id ASC
     """
-    cursor.execute(comments_sql, post_ids)
-    
+    params = {f"p{i}": post_id for i, post_id in enumerate(post_ids)}
+    params["preview_count"] = settings.COMMENT_PREVIEW_COUNT
+    return sql, params
+
+def _format_comment(comment_row):
+    return {
+        "id": comment_row[0],
+        "content": join_content(comment_row[1], comment_row[8]),
+        "createdAt": comment_row[2],
+        "author": {
+            "id": comment_row[4],
+            "name": comment_row[5],
+            "username": comment_row[6],
+            "image": comment_row[7]
+        }
+    }
+
+def _group_comments(comment_rows, comments_by_post_id=None):
+    if comments_by_post_id is None:
+        comments_by_post_id = defaultdict(list)
+    for comment_row in comment_rows:
+        comments_by_post_id[comment_row[3]].append(_format_comment(comment_row))
+    return comments_by_post_id
+
+def _fetch_and_group_comments(cursor, post_ids):
+    """Fetches the comment previews for a list of post IDs and groups them."""
     comments_by_post_id = defaultdict(list)
-    for comment_row in cursor.fetchall():
-        # Handle CLOB for comment content
-        comment_content = comment_row[1]
-        if comment_content and hasattr(comment_content, "read"):
-            comment_content = comment_content.read()
-
-        comments_by_post_id[comment_row[3]].append({
-            "id": comment_row[0],
-            "content": comment_content,
-            "createdAt": comment_row[2],
-            "author": {
-                "id": comment_row[4],
-                "name": comment_row[5],
-                "username": comment_row[6],
-                "image": comment_row[7]
-            }
-        })
+    if settings.COMMENT_PREVIEW_COUNT <= 0:
+        return comments_by_post_id
+
+    for chunk in _chunks(post_ids):
+        cursor.execute(*_comment_previews_query(chunk))
+        _group_comments(cursor.fetchall(), comments_by_post_id)
+    return comments_by_post_id
+
+async def _fetch_and_group_comments_async(cursor, post_ids):
+    comments_by_post_id = defaultdict(list)
+    if settings.COMMENT_PREVIEW_COUNT <= 0:
+        return comments_by_post_id
+
+    for chunk in _chunks(post_ids):
+        sql, params = _comment_previews_query(chunk)
+        await cursor.execute(sql, params, fetch_lobs=False)
+        _group_comments(await cursor.fetchall(), comments_by_post_id)
     return comments_by_post_id
 
-def _fetch_posts_and_comments(cursor, sql, params=()):
-    """A generic function to fetch posts, their comments, and format them."""
+def _comments_page_query(post_id: str, page: PageParams):
+    # Oldest first, so the seek moves forward in time
+    seek, params = keyset_filter("c.created_at", "c.id", page, op=">")
+    sql = f"""
+        SELECT c.id, c.content_text, c.created_at, c.post_id,
+               u.id as author_id, u.name, u.username, u.image, c.content as content_overflow
+        FROM comments c
+        JOIN users u ON c.author_id = u.id
+        WHERE c.post_id = :post_id {"AND " + seek if seek else ""}
+        ORDER BY c.created_at ASC, c.id ASC
+        FETCH FIRST :limit ROWS ONLY
+    """
+    return sql, {**params, "post_id": post_id, "limit": page.limit + 1}
+
+def _comment_key(row):
+    return row[2], row[0]
+
+def get_comments(cursor, post_id: str, page: PageParams):
+    """Returns (comments, next_cursor) for one post."""
+    cursor.execute(*_comments_page_query(post_id, page))
+    rows, next_cursor = split_page(cursor.fetchall(), page.limit, _comment_key)
+    return [_format_comment(row) for row in rows], next_cursor
+
+async def get_comments_async(cursor, post_id: str, page: PageParams):
+    sql, params = _comments_page_query(post_id, page)
+    await cursor.execute(sql, params, fetch_lobs=False)
+    rows, next_cursor = split_page(await cursor.fetchall(), page.limit, _comment_key)
+    return [_format_comment(row) for row in rows], next_cursor
+
+def _home_timeline_query(user_id: str, page: PageParams):
+    """Materialized timeline rows UNION posts of followed celebrity authors
+    (fan-out-on-read); each branch is bounded before the merge."""
+    timeline_seek, params = keyset_filter("t.created_at", "t.post_id", page)
+    celebrity_seek, _ = keyset_filter("p.created_at", "p.id", page)
+    sql = f"""
+        {_POST_COLUMNS}
+        FROM (
+            SELECT post_id, created_at FROM (
+                SELECT post_id, created_at FROM (
+                    SELECT t.post_id, t.created_at FROM timelines t
+                    WHERE t.user_id = :user_id {"AND " + timeline_seek if timeline_seek else ""}
+                    ORDER BY t.created_at DESC, t.post_id DESC
+                    FETCH FIRST :limit ROWS ONLY
+                )
+                UNION
+                SELECT post_id, created_at FROM (
+                    SELECT p.id as post_id, p.created_at FROM follows f
+                    JOIN users a ON a.id = f.following_id
+                    JOIN posts p ON p.author_id = f.following_id
+                    WHERE f.follower_id = :user_id AND a.follower_count > :fanout_max
+                    {"AND " + celebrity_seek if celebrity_seek else ""}
+                    ORDER BY p.created_at DESC, p.id DESC
+                    FETCH FIRST :limit ROWS ONLY
+                )
+            )
+            ORDER BY created_at DESC, post_id DESC
+            FETCH FIRST :limit ROWS ONLY
+        ) tl
+        JOIN posts p ON p.id = tl.post_id
+        JOIN users u ON p.author_id = u.id
+        ORDER BY tl.created_at DESC, tl.post_id DESC
+    """
+    return sql, {
+        **params,
+        "user_id": user_id,
+        "fanout_max": settings.TIMELINE_FANOUT_MAX_FOLLOWERS,
+        "limit": page.limit + 1,
+    }
+
+def _fetch_posts_and_comments(cursor, query, limit, key=_post_key):
+    """A generic function to fetch a page of posts, their comments, and format them.
+    Returns (posts, next_cursor)."""
+    sql, params = query
     cursor.execute(sql, params)
-    post_rows = cursor.fetchall()
+    post_rows, next_cursor = split_page(cursor.fetchall(), limit, key)
 
     if not post_rows:
-        return []
+        return [], None
 
     post_ids = [row[0] for row in post_rows]
     comments_by_post_id = _fetch_and_group_comments(cursor, post_ids)
-    
-    return _format_posts(post_rows, comments_by_post_id)
-
-def get_feed(cursor):
-    sql = """
-        SELECT p.id, p.content, p.image, p.created_at,
-               u.id as auth_id, u.name, u.username, u.image as auth_img,
-               (SELECT COUNT(*) FROM likes WHERE post_id = p.id) as likes,
-               (SELECT COUNT(*) FROM comments WHERE post_id = p.id) as comments
-        FROM posts p
-        JOIN users u ON p.author_id = u.id
-        ORDER BY p.created_at DESC
-        FETCH FIRST 20 ROWS ONLY
-    """
-    return _fetch_posts_and_comments(cursor, sql)
-
-def get_posts_by_author(cursor, author_id: str):
-    sql = """
-        SELECT p.id, p.content, p.image, p.created_at,
-               u.id as auth_id, u.name, u.username, u.image as auth_img,
-               (SELECT COUNT(*) FROM likes WHERE post_id = p.id) as likes,
-               (SELECT COUNT(*) FROM comments WHERE post_id = p.id) as comments
-        FROM posts p
-        JOIN users u ON p.author_id = u.id
-        WHERE p.author_id = :1
-        ORDER BY p.created_at DESC
-    """
-    return _fetch_posts_and_comments(cursor, sql, (author_id,))
-
-def get_posts_liked_by_user(cursor, user_id: str):
-    sql = """
-        SELECT p.id, p.content, p.image, p.created_at,
-               u.id as auth_id, u.name, u.username, u.image as auth_img,
-               (SELECT COUNT(*) FROM likes WHERE post_id = p.id) as likes,
-               (SELECT COUNT(*) FROM comments WHERE post_id = p.id) as comments
-        FROM posts p
-        JOIN users u ON p.author_id = u.id
-        JOIN likes l ON l.post_id = p.id
-        WHERE l.user_id = :1
-        ORDER BY l.created_at DESC
-    """
-    return _fetch_posts_and_comments(cursor, sql, (user_id,))
-
-def toggle_like(cursor, user_id: str, post_id: str):
-    check_sql = "SELECT id FROM likes WHERE user_id = :1 AND post_id = :2"
-    cursor.execute(check_sql, (user_id, post_id))
-    
-    if cursor.fetchone():
-        cursor.execute("DELETE FROM likes WHERE user_id = :1 AND post_id = :2", (user_id, post_id))
-        return False # Unliked
-    else:
-        lid = str(uuid.uuid4())
-        cursor.execute("INSERT INTO likes (id, user_id, post_id) VALUES (:1, :2, :3)", (lid, user_id, post_id))
-        return True # Liked
\ No newline at end of file
+
+    return _format_posts(post_rows, comments_by_post_id), next_cursor
+
+def get_feed(cursor, page: PageParams):
+    return _fetch_posts_and_comments(cursor, _feed_query(page), page.limit)
+
+def get_home_timeline(cursor, user_id: str, page: PageParams):
+    return _fetch_posts_and_comments(cursor, _home_timeline_query(user_id, page), page.limit)
+
+def get_posts_by_author(cursor, author_id: str, page: PageParams):
+    return _fetch_posts_and_comments(cursor, _posts_by_author_query(author_id, page), page.limit)
+
+def get_posts_liked_by_user(cursor, user_id: str, page: PageParams):
+    return _fetch_posts_and_comments(cursor, _posts_liked_by_user_query(user_id, page), page.limit, _liked_key)
+
+# --- Async variants (python-oracledb AsyncCursor) ---
+# CLOBs are fetched inline as strings (fetch_lobs=False) because AsyncLOB.read()
+# would cost an extra awaited round trip per row.
+
+async def _fetch_posts_and_comments_async(cursor, query, limit, key=_post_key):
+    sql, params = query
+    await cursor.execute(sql, params, fetch_lobs=False)
+    post_rows, next_cursor = split_page(await cursor.fetchall(), limit, key)
+
+    if not post_rows:
+        return [], None
+
+    post_ids = [row[0] for row in post_rows]
+    comments_by_post_id = await _fetch_and_group_comments_async(cursor, post_ids)
+
+    return _format_posts(post_rows, comments_by_post_id), next_cursor
+
+async def get_feed_async(cursor, page: PageParams):
+    return await _fetch_posts_and_comments_async(cursor, _feed_query(page), page.limit)
+
+async def get_feed_version_async(cursor, page: PageParams):
+    """Cheap (id, like_count, comment_count, author updated_at) rows for the feed page."""
+    sql, params = _feed_query(page, _VERSION_COLUMNS)
+    await cursor.execute(sql, params)
+    return await cursor.fetchall()
+
+async def get_posts_by_author_version_async(cursor, author_id: str, page: PageParams):
+    sql, params = _posts_by_author_query(author_id, page, _VERSION_COLUMNS)
+    await cursor.execute(sql, params)
+    return await cursor.fetchall()
+
+async def get_home_timeline_async(cursor, user_id: str, page: PageParams):
+    return await _fetch_posts_and_comments_async(cursor, _home_timeline_query(user_id, page), page.limit)
+
+async def get_posts_by_author_async(cursor, author_id: str, page: PageParams):
+    return await _fetch_posts_and_comments_async(cursor, _posts_by_author_query(author_id, page), page.limit)
+
+async def get_posts_liked_by_user_async(cursor, user_id: str, page: PageParams):
+    return await _fetch_posts_and_comments_async(
+        cursor, _posts_liked_by_user_query(user_id, page), page.limit, _liked_key
+    )
+
+# :mode 0 toggles, 1 likes, -1 unlikes. A duplicate like (double click, retried
+# PUT, concurrent request) hits uq_like_user_post and becomes a no-op.
+# The post row is locked up front (the like_count UPDATE would lock it anyway),
+# so it can't be deleted between the lookup and the likes INSERT. A new like
+# writes the author's notification in the same round trip.
+_SET_LIKE_PLSQL = f"""
+BEGIN
+    SELECT author_id INTO :post_author_id FROM posts WHERE id = :post_id FOR UPDATE;
+    :changed := 0;
+    IF :mode <= 0 THEN
+        DELETE FROM likes WHERE user_id = :user_id AND post_id = :post_id;
+        IF SQL%ROWCOUNT > 0 THEN
+            UPDATE posts SET like_count = like_count - 1 WHERE id = :post_id;
+            :liked := 0;
+            :changed := 1;
+            RETURN;
+        END IF;
+        IF :mode < 0 THEN
+            :liked := 0;
+            RETURN;
+        END IF;
+    END IF;
+    BEGIN
+        INSERT INTO likes (id, user_id, post_id) VALUES (:like_id, :user_id, :post_id);
+        UPDATE posts SET like_count = like_count + 1 WHERE id = :post_id;
+        {_outbox_sql(":post_author_id")};
+        :changed := 1;
+    EXCEPTION WHEN DUP_VAL_ON_INDEX THEN
+        NULL;
+    END;
+    :liked := 1;
+EXCEPTION WHEN NO_DATA_FOUND THEN
+    :post_author_id := NULL;
+END;
+"""
+
+def set_like(cursor, user_id: str, post_id: str, liked: bool | None = None):
+    """Likes (True), unlikes (False) or toggles (None) in one round trip, and
+    notifies the post's author of a new like.
+
+    Returns (post_author_id, liked, changed); post_author_id is None when the
+    post doesn't exist, and changed is False when the like was already in the
+    requested state."""
+    post_author_id, now_liked, changed = cursor.var(str), cursor.var(int), cursor.var(int)
+    notification = notif_crud._notification_binds("LIKE", user_id, post_id)
+    cursor.execute(_SET_LIKE_PLSQL, {
+        "post_id": post_id, "user_id": user_id, "like_id": str(uuid.uuid4()),
+        "mode": {None: 0, True: 1, False: -1}[liked],
+        "post_author_id": post_author_id, "liked": now_liked, "changed": changed, **notification,
+    })
+    if now_liked.getvalue() and changed.getvalue():
+        notif_crud._submit_notification(cursor, notification, post_author_id.getvalue())
+    return post_author_id.getvalue(), bool(now_liked.getvalue()), bool(changed.getvalue())
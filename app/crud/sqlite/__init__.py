@@ -0,0 +1,6 @@
+"""SQLite implementation of the app/crud modules (DB_BACKEND=sqlite).
+
+Same functions and return shapes as the Oracle modules; row formatting and the
+caches are shared with them, only the SQL differs. The *_async variants run
+the synchronous sqlite3 calls (see app/core/sqlite_db.py).
+"""
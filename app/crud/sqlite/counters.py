@@ -0,0 +1,38 @@
+# UPDATE ... FROM in place of Oracle's MERGE; same single grouped pass per table
+_RECONCILE_POSTS_SQL = """
+    UPDATE posts SET like_count = s.like_count, comment_count = s.comment_count
+    FROM (
+        SELECT p2.id, COALESCE(l.cnt, 0) as like_count, COALESCE(c.cnt, 0) as comment_count
+        FROM posts p2
+        LEFT JOIN (SELECT post_id, COUNT(*) cnt FROM likes GROUP BY post_id) l ON l.post_id = p2.id
+        LEFT JOIN (SELECT post_id, COUNT(*) cnt FROM comments GROUP BY post_id) c ON c.post_id = p2.id
+    ) s
+    WHERE posts.id = s.id AND (posts.like_count != s.like_count OR posts.comment_count != s.comment_count)
+"""
+
+_RECONCILE_USERS_SQL = """
+    UPDATE users
+    SET follower_count = s.follower_count, following_count = s.following_count, post_count = s.post_count
+    FROM (
+        SELECT u2.id,
+               COALESCE(fr.cnt, 0) as follower_count,
+               COALESCE(fg.cnt, 0) as following_count,
+               COALESCE(p.cnt, 0) as post_count
+        FROM users u2
+        LEFT JOIN (SELECT following_id, COUNT(*) cnt FROM follows GROUP BY following_id) fr ON fr.following_id = u2.id
+        LEFT JOIN (SELECT follower_id, COUNT(*) cnt FROM follows GROUP BY follower_id) fg ON fg.follower_id = u2.id
+        LEFT JOIN (SELECT author_id, COUNT(*) cnt FROM posts GROUP BY author_id) p ON p.author_id = u2.id
+    ) s
+    WHERE users.id = s.id
+      AND (users.follower_count != s.follower_count
+           OR users.following_count != s.following_count
+           OR users.post_count != s.post_count)
+"""
+
+def reconcile_post_counters(cursor) -> int:
+    cursor.execute(_RECONCILE_POSTS_SQL)
+    return cursor.rowcount
+
+def reconcile_user_counters(cursor) -> int:
+    cursor.execute(_RECONCILE_USERS_SQL)
+    return cursor.rowcount
@@ -0,0 +1,57 @@
+# Same rows as app/crud/export.py; sqlite3 cursors stream in arraysize batches too
+from app.core.config import settings
+from app.crud.content import join_content
+
+def _stream(cursor, sql, params):
+    cursor.arraysize = settings.EXPORT_ARRAYSIZE
+    cursor.execute(sql, params)
+    while rows := cursor.fetchmany():
+        yield from rows
+
+def iter_posts(cursor, author_id: str):
+    sql = """
+        SELECT id, content_text, image, like_count, comment_count, created_at, content
+        FROM posts WHERE author_id = ?
+        ORDER BY created_at, id
+    """
+    for row in _stream(cursor, sql, (author_id,)):
+        yield {
+            "type": "post",
+            "id": row[0],
+            "content": join_content(row[1], row[6]),
+            "image": row[2],
+            "_count": {"likes": row[3], "comments": row[4]},
+            "createdAt": row[5],
+        }
+
+def iter_likes(cursor, user_id: str):
+    sql = """
+        SELECT post_id, created_at FROM likes WHERE user_id = ?
+        ORDER BY created_at, id
+    """
+    for row in _stream(cursor, sql, (user_id,)):
+        yield {"type": "like", "postId": row[0], "createdAt": row[1]}
+
+def iter_notifications(cursor, user_id: str):
+    sql = """
+        SELECT id, type, read_status, creator_id, post_id, comment_id, created_at, actor_count
+        FROM notifications WHERE user_id = ?
+        ORDER BY created_at, id
+    """
+    for row in _stream(cursor, sql, (user_id,)):
+        yield {
+            "type": "notification",
+            "id": row[0],
+            "notificationType": row[1],
+            "read": bool(row[2]),
+            "creatorId": row[3],
+            "postId": row[4],
+            "commentId": row[5],
+            "createdAt": row[6],
+            "actorCount": row[7],
+        }
+
+def iter_user_export(cursor, user_id: str):
+    yield from iter_posts(cursor, user_id)
+    yield from iter_likes(cursor, user_id)
+    yield from iter_notifications(cursor, user_id)
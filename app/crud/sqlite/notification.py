@@ -0,0 +1,64 @@
+# create_notification goes through the write-behind queue and is shared as is
+from app.core.pagination import PageParams, encode_seq_cursor, seq_filter, split_page
+from app.crud.notification import (
+    _actors_query, _format_actor, _format_notifications, _notification_key, _recent_actor_ids,
+    create_notification,
+)
+
+def _notifications_query(user_id: str, page: PageParams):
+    seek, params = seq_filter("n.seq", page)
+    sql = f"""
+        SELECT n.id, n.type, n.read_status, n.created_at,
+               c.id as creator_id, c.name, c.username, c.image,
+               p.id as post_id, p.content_text, p.image as post_image,
+               cm.id as comment_id, cm.content_text as comment_content,
+               p.content as post_overflow, cm.content as comment_overflow,
+               n.actor_count, n.recent_actor_ids, n.seq
+        FROM notifications n
+        JOIN users c ON n.creator_id = c.id
+        LEFT JOIN posts p ON n.post_id = p.id
+        LEFT JOIN comments cm ON n.comment_id = cm.id
+        WHERE n.user_id = :user_id {"AND " + seek if seek else ""}
+        ORDER BY n.seq DESC
+        LIMIT :limit
+    """
+    return sql, {**params, "user_id": user_id, "limit": page.limit + 1}
+
+def get_notifications(cursor, user_id: str, page: PageParams):
+    """Returns (notifications, next_cursor), newest first."""
+    cursor.execute(*_notifications_query(user_id, page))
+    rows, next_cursor = split_page(cursor.fetchall(), page.limit, _notification_key, encode_seq_cursor)
+    actors_by_id = {}
+    actor_ids = _recent_actor_ids(rows)
+    if actor_ids:
+        cursor.execute(*_actors_query(actor_ids))
+        actors_by_id = {r[0]: _format_actor(r) for r in cursor}
+    return _format_notifications(rows, actors_by_id), next_cursor
+
+async def get_notifications_async(cursor, user_id: str, page: PageParams):
+    return get_notifications(cursor, user_id, page)
+
+def get_unread_count(cursor, user_id: str) -> int:
+    cursor.execute("SELECT COUNT(*) FROM notifications WHERE user_id = ? AND read_status = 0", (user_id,))
+    return cursor.fetchone()[0]
+
+async def get_unread_count_async(cursor, user_id: str) -> int:
+    return get_unread_count(cursor, user_id)
+
+def mark_read(cursor, user_id: str, notification_ids: list[str]):
+    if not notification_ids:
+        return
+    cursor.executemany(
+        "UPDATE notifications SET read_status = 1 WHERE user_id = ? AND id = ?",
+        [(user_id, nid) for nid in dict.fromkeys(notification_ids)],
+    )
+
+def mark_all_read(cursor, user_id: str, up_to: int | None = None) -> int:
+    """Marks unread notifications as read and returns how many changed; see app/crud/notification.py."""
+    sql = "UPDATE notifications AS n SET read_status = 1 WHERE n.user_id = :user_id AND n.read_status = 0"
+    params = {"user_id": user_id}
+    if up_to is not None:
+        sql += " AND n.seq <= :up_to"
+        params["up_to"] = up_to
+    cursor.execute(sql, params)
+    return cursor.rowcount
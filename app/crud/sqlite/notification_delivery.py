@@ -0,0 +1,75 @@
+"""SQLite statements behind the notification write-behind queue.
+
+An UPSERT on group_key takes the place of the Oracle MERGE, with the same
+coalescing rules (see app/crud/notification_delivery.py). SQLite has a single
+writer, so there is no create race to retry; rows fail only on a foreign key.
+"""
+import sqlite3
+from datetime import timedelta
+from app.core.config import settings
+from app.core.sqlite_db import now
+from app.crud.notification_delivery import _COLUMNS, RECENT_ACTORS_LEN
+
+# ?8 is created_at: now for new events, the spill time for relayed ones. Rows
+# go in one at a time and record their actor right after, so no first_of_actor
+_UPSERT_SQL = f"""
+    INSERT INTO notifications
+        (id, type, user_id, creator_id, post_id, comment_id, group_key, actor_count, recent_actor_ids, read_status, created_at)
+    VALUES (?1, ?2, ?3, ?4, ?5, ?6, ?7, 1, ?4, 0, ?8)
+    ON CONFLICT (group_key) DO UPDATE SET
+        actor_count = actor_count + NOT EXISTS (
+            SELECT 1 FROM notification_actors a WHERE a.group_key = excluded.group_key AND a.actor_id = excluded.creator_id
+        ),
+        recent_actor_ids = SUBSTR(
+            excluded.creator_id
+                || RTRIM(REPLACE(',' || recent_actor_ids || ',', ',' || excluded.creator_id || ',', ','), ','),
+            1, {RECENT_ACTORS_LEN}
+        ),
+        creator_id = excluded.creator_id,
+        read_status = 0,
+        created_at = excluded.created_at,
+        seq = (SELECT MAX(seq) + 1 FROM notifications)
+"""
+
+def _upsert(cursor, rows: list, created_at) -> tuple[list, list]:
+    done, failed = [], []
+    for row in rows:
+        try:
+            cursor.execute(_UPSERT_SQL, (*row[:7], created_at(row)))
+        except sqlite3.IntegrityError as e:
+            failed.append((row[:7], str(e)))
+            continue
+        if row[6] is not None:
+            cursor.execute(
+                "INSERT OR IGNORE INTO notification_actors (group_key, actor_id) VALUES (?, ?)", (row[6], row[3])
+            )
+        done.append(row[:7])
+    return done, failed
+
+def write(cursor, rows: list[tuple]) -> tuple[list, list]:
+    written_at = now()
+    return _upsert(cursor, rows, lambda row: written_at)
+
+def write_outbox(cursor, rows: list[tuple]):
+    cursor.executemany(
+        f"INSERT INTO notification_outbox ({_COLUMNS}, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        [(*row, now()) for row in rows],
+    )
+
+def relay_outbox_batch(cursor, limit: int) -> tuple[list, list, list]:
+    """Moves up to `limit` spilled events into notifications. Returns (rows taken
+    from the outbox, rows written, [(row, error message)])."""
+    cursor.execute(f"SELECT {_COLUMNS}, created_at FROM notification_outbox ORDER BY created_at LIMIT ?", (limit,))
+    rows = cursor.fetchall()
+    if not rows:
+        return [], [], []
+    written, failed = _upsert(cursor, rows, lambda row: row[7])
+    cursor.executemany("DELETE FROM notification_outbox WHERE id = ?", [(row[0],) for row in rows])
+    return [row[:7] for row in rows], written, failed
+
+def prune_actors(cursor) -> int:
+    window = settings.NOTIFICATION_COALESCE_WINDOW_SECONDS
+    if window <= 0:
+        return 0
+    cursor.execute("DELETE FROM notification_actors WHERE created_at < ?", (now() - timedelta(seconds=2 * window),))
+    return cursor.rowcount
@@ -0,0 +1,243 @@
+# Row shapes match app/crud/post.py, whose formatters and comment-preview query are reused
+import uuid
+from collections import defaultdict
+from app.core.config import settings
+from app.core.pagination import PageParams, split_page
+from app.core.sqlite_db import keyset_filter, now
+from app.crud.content import split_content
+from app.crud.post import (
+    _POST_COLUMNS, _VERSION_COLUMNS, _chunks, _comment_key, _comment_previews_query, _format_comment,
+    _format_posts, _group_comments, _liked_key, _post_key,
+)
+from app.crud.sqlite import notification as notif_crud
+from app.crud.sqlite import timeline as timeline_crud
+from app.crud.sqlite import user as user_crud
+
+def create_post(cursor, author_id: str, content: str, image: str | None):
+    pid = str(uuid.uuid4())
+    sql = "INSERT INTO posts (id, author_id, content_text, content, image, created_at) VALUES (?, ?, ?, ?, ?, ?)"
+    cursor.execute(sql, (pid, author_id, *split_content(content), image, now()))
+
+    cursor.execute(
+        "UPDATE users SET post_count = post_count + 1 WHERE id = ? RETURNING follower_count", (author_id,)
+    )
+    follower_count = cursor.fetchone()[0]
+    timeline_crud.fan_out_post(cursor, pid, author_id, follower_count)
+    user_crud.invalidate_profile(cursor, author_id)  # post count changed
+    return pid
+
+def get_post_by_id(cursor, post_id: str):
+    cursor.execute("SELECT id, author_id FROM posts WHERE id = ?", (post_id,))
+    row = cursor.fetchone()
+    if row:
+        return {"id": row[0], "author_id": row[1]}
+    return None
+
+def create_comment(cursor, author_id: str, post_id: str, content: str):
+    """Adds the comment and notifies the post's author. Returns (comment_id,
+    post_author_id), or None if the post doesn't exist."""
+    cursor.execute(
+        "UPDATE posts SET comment_count = comment_count + 1 WHERE id = ? RETURNING author_id", (post_id,)
+    )
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    cid = str(uuid.uuid4())
+    cursor.execute(
+        "INSERT INTO comments (id, author_id, post_id, content_text, content, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+        (cid, author_id, post_id, *split_content(content), now()),
+    )
+    notif_crud.create_notification(cursor, "COMMENT", row[0], author_id, post_id, cid)
+    return cid, row[0]
+
+def delete_post(cursor, post_id: str, author_id: str):
+    cursor.execute("DELETE FROM posts WHERE id = ? AND author_id = ?", (post_id, author_id))
+    if cursor.rowcount == 0:
+        return False
+
+    cursor.execute("UPDATE users SET post_count = post_count - 1 WHERE id = ?", (author_id,))
+    user_crud.invalidate_profile(cursor, author_id)
+    return True
+
+def _feed_query(page: PageParams, columns=_POST_COLUMNS):
+    seek, params = keyset_filter("p.created_at", "p.id", page)
+    sql = f"""
+        {columns}
+        FROM posts p
+        JOIN users u ON p.author_id = u.id
+        {"WHERE " + seek if seek else ""}
+        ORDER BY p.created_at DESC, p.id DESC
+        LIMIT :limit
+    """
+    return sql, {**params, "limit": page.limit + 1}
+
+def _posts_by_author_query(author_id: str, page: PageParams, columns=_POST_COLUMNS):
+    seek, params = keyset_filter("p.created_at", "p.id", page)
+    sql = f"""
+        {columns}
+        FROM posts p
+        JOIN users u ON p.author_id = u.id
+        WHERE p.author_id = :author_id {"AND " + seek if seek else ""}
+        ORDER BY p.created_at DESC, p.id DESC
+        LIMIT :limit
+    """
+    return sql, {**params, "author_id": author_id, "limit": page.limit + 1}
+
+def _posts_liked_by_user_query(user_id: str, page: PageParams):
+    seek, params = keyset_filter("l.created_at", "l.id", page)
+    sql = f"""
+        {_POST_COLUMNS}, l.created_at as liked_at, l.id as like_id
+        FROM posts p
+        JOIN users u ON p.author_id = u.id
+        JOIN likes l ON l.post_id = p.id
+        WHERE l.user_id = :user_id {"AND " + seek if seek else ""}
+        ORDER BY l.created_at DESC, l.id DESC
+        LIMIT :limit
+    """
+    return sql, {**params, "user_id": user_id, "limit": page.limit + 1}
+
+def _home_timeline_query(user_id: str, page: PageParams):
+    timeline_seek, params = keyset_filter("t.created_at", "t.post_id", page)
+    celebrity_seek, _ = keyset_filter("p.created_at", "p.id", page)
+    sql = f"""
+        {_POST_COLUMNS}
+        FROM (
+            SELECT post_id, created_at FROM (
+                SELECT post_id, created_at FROM (
+                    SELECT t.post_id, t.created_at FROM timelines t
+                    WHERE t.user_id = :user_id {"AND " + timeline_seek if timeline_seek else ""}
+                    ORDER BY t.created_at DESC, t.post_id DESC
+                    LIMIT :limit
+                )
+                UNION
+                SELECT post_id, created_at FROM (
+                    SELECT p.id as post_id, p.created_at FROM follows f
+                    JOIN users a ON a.id = f.following_id
+                    JOIN posts p ON p.author_id = f.following_id
+                    WHERE f.follower_id = :user_id AND a.follower_count > :fanout_max
+                    {"AND " + celebrity_seek if celebrity_seek else ""}
+                    ORDER BY p.created_at DESC, p.id DESC
+                    LIMIT :limit
+                )
+            )
+            ORDER BY created_at DESC, post_id DESC
+            LIMIT :limit
+        ) tl
+        JOIN posts p ON p.id = tl.post_id
+        JOIN users u ON p.author_id = u.id
+        ORDER BY tl.created_at DESC, tl.post_id DESC
+    """
+    return sql, {
+        **params,
+        "user_id": user_id,
+        "fanout_max": settings.TIMELINE_FANOUT_MAX_FOLLOWERS,
+        "limit": page.limit + 1,
+    }
+
+def _comments_page_query(post_id: str, page: PageParams):
+    seek, params = keyset_filter("c.created_at", "c.id", page, op=">")
+    sql = f"""
+        SELECT c.id, c.content_text, c.created_at, c.post_id,
+               u.id as author_id, u.name, u.username, u.image, c.content as content_overflow
+        FROM comments c
+        JOIN users u ON c.author_id = u.id
+        WHERE c.post_id = :post_id {"AND " + seek if seek else ""}
+        ORDER BY c.created_at ASC, c.id ASC
+        LIMIT :limit
+    """
+    return sql, {**params, "post_id": post_id, "limit": page.limit + 1}
+
+def _fetch_and_group_comments(cursor, post_ids):
+    comments_by_post_id = defaultdict(list)
+    if settings.COMMENT_PREVIEW_COUNT <= 0:
+        return comments_by_post_id
+
+    for chunk in _chunks(post_ids):
+        cursor.execute(*_comment_previews_query(chunk))
+        _group_comments(cursor.fetchall(), comments_by_post_id)
+    return comments_by_post_id
+
+def _fetch_posts_and_comments(cursor, query, limit, key=_post_key):
+    cursor.execute(*query)
+    post_rows, next_cursor = split_page(cursor.fetchall(), limit, key)
+
+    if not post_rows:
+        return [], None
+
+    comments_by_post_id = _fetch_and_group_comments(cursor, [row[0] for row in post_rows])
+    return _format_posts(post_rows, comments_by_post_id), next_cursor
+
+def get_comments(cursor, post_id: str, page: PageParams):
+    """Returns (comments, next_cursor) for one post."""
+    cursor.execute(*_comments_page_query(post_id, page))
+    rows, next_cursor = split_page(cursor.fetchall(), page.limit, _comment_key)
+    return [_format_comment(row) for row in rows], next_cursor
+
+def get_feed(cursor, page: PageParams):
+    return _fetch_posts_and_comments(cursor, _feed_query(page), page.limit)
+
+def get_home_timeline(cursor, user_id: str, page: PageParams):
+    return _fetch_posts_and_comments(cursor, _home_timeline_query(user_id, page), page.limit)
+
+def get_posts_by_author(cursor, author_id: str, page: PageParams):
+    return _fetch_posts_and_comments(cursor, _posts_by_author_query(author_id, page), page.limit)
+
+def get_posts_liked_by_user(cursor, user_id: str, page: PageParams):
+    return _fetch_posts_and_comments(cursor, _posts_liked_by_user_query(user_id, page), page.limit, _liked_key)
+
+# --- Async variants: same statements on the plain cursor (see app/core/sqlite_db.py) ---
+
+async def get_comments_async(cursor, post_id: str, page: PageParams):
+    return get_comments(cursor, post_id, page)
+
+async def get_feed_async(cursor, page: PageParams):
+    return get_feed(cursor, page)
+
+async def get_feed_version_async(cursor, page: PageParams):
+    """Cheap (id, like_count, comment_count, author updated_at) rows for the feed page."""
+    cursor.execute(*_feed_query(page, _VERSION_COLUMNS))
+    return cursor.fetchall()
+
+async def get_posts_by_author_version_async(cursor, author_id: str, page: PageParams):
+    cursor.execute(*_posts_by_author_query(author_id, page, _VERSION_COLUMNS))
+    return cursor.fetchall()
+
+async def get_home_timeline_async(cursor, user_id: str, page: PageParams):
+    return get_home_timeline(cursor, user_id, page)
+
+async def get_posts_by_author_async(cursor, author_id: str, page: PageParams):
+    return get_posts_by_author(cursor, author_id, page)
+
+async def get_posts_liked_by_user_async(cursor, user_id: str, page: PageParams):
+    return get_posts_liked_by_user(cursor, user_id, page)
+
+def set_like(cursor, user_id: str, post_id: str, liked: bool | None = None):
+    """Likes (True), unlikes (False) or toggles (None), and notifies the post's
+    author of a new like.
+
+    Returns (post_author_id, liked, changed); post_author_id is None when the
+    post doesn't exist."""
+    # A no-op UPDATE, not a SELECT, so the transaction takes the write lock
+    # before the lookup and the post can't be deleted before the likes INSERT
+    cursor.execute("UPDATE posts SET like_count = like_count WHERE id = ? RETURNING author_id", (post_id,))
+    row = cursor.fetchone()
+    if row is None:
+        return None, False, False
+
+    if liked is not True:
+        cursor.execute("DELETE FROM likes WHERE user_id = ? AND post_id = ?", (user_id, post_id))
+        if cursor.rowcount > 0:
+            cursor.execute("UPDATE posts SET like_count = like_count - 1 WHERE id = ?", (post_id,))
+            return row[0], False, True
+        if liked is False:
+            return row[0], False, False
+    # uq_like_user_post turns a duplicate like into a no-op
+    cursor.execute(
+        "INSERT INTO likes (id, user_id, post_id, created_at) VALUES (?, ?, ?, ?) ON CONFLICT DO NOTHING",
+        (str(uuid.uuid4()), user_id, post_id, now()),
+    )
+    changed = cursor.rowcount > 0
+    if changed:
+        cursor.execute("UPDATE posts SET like_count = like_count + 1 WHERE id = ?", (post_id,))
+        notif_crud.create_notification(cursor, "LIKE", row[0], user_id, post_id)
+    return row[0], True, changed
@@ -0,0 +1,95 @@
+# The cache, its invalidation and the formatter are shared with the Oracle module
+from datetime import timedelta
+from app.core.config import settings
+from app.core.sqlite_db import now
+from app.crud.suggestion import (
+    _POPULAR_KEY, _format_suggestion, _sample, _suggestion_cache, cached_suggestions, clear_cache,
+    invalidate_suggestions,
+)
+
+_REFRESH_SQL = """
+    INSERT INTO follow_suggestions (user_id, suggested_id, mutual_count, position, computed_at)
+    SELECT user_id, suggested_id, mutual_count, rn, :now
+    FROM (
+        SELECT c.user_id, c.suggested_id, c.mutual_count,
+               ROW_NUMBER() OVER (
+                   PARTITION BY c.user_id ORDER BY c.mutual_count DESC, u.follower_count DESC, c.suggested_id
+               ) rn
+        FROM (
+            SELECT user_id, suggested_id, SUM(score) mutual_count
+            FROM (
+                SELECT f1.follower_id user_id, f2.following_id suggested_id, 1 score
+                FROM follows f1
+                JOIN follows f2 ON f2.follower_id = f1.following_id
+                UNION ALL
+                SELECT u2.id, p.id, 0
+                FROM users u2
+                CROSS JOIN (SELECT id FROM users ORDER BY follower_count DESC, id LIMIT :popular) p
+            )
+            GROUP BY user_id, suggested_id
+        ) c
+        JOIN users u ON u.id = c.suggested_id
+        WHERE c.user_id != c.suggested_id
+          AND NOT EXISTS (
+              SELECT 1 FROM follows f WHERE f.follower_id = c.user_id AND f.following_id = c.suggested_id
+          )
+    )
+    WHERE rn <= :top_k
+"""
+
+def refresh(cursor, max_age_seconds: float | None = None) -> int | None:
+    # Take the write lock before the freshness check, like Oracle's LOCK TABLE
+    if not cursor.connection.in_transaction:
+        cursor.execute("BEGIN IMMEDIATE")
+    if max_age_seconds is not None and is_fresh(cursor, max_age_seconds):
+        return None
+    cursor.execute("DELETE FROM follow_suggestions")
+    cursor.execute(_REFRESH_SQL, {"popular": settings.SUGGESTIONS_POPULAR_CANDIDATES,
+                                  "top_k": settings.SUGGESTIONS_TOP_K, "now": now()})
+    return cursor.rowcount
+
+def is_fresh(cursor, max_age_seconds: float) -> bool:
+    cursor.execute(
+        "SELECT 1 FROM follow_suggestions WHERE computed_at > ? LIMIT 1",
+        (now() - timedelta(seconds=max_age_seconds),),
+    )
+    return cursor.fetchone() is not None
+
+_USER_SUGGESTIONS_SQL = """
+    SELECT u.id, u.name, u.username, u.image, u.follower_count
+    FROM follow_suggestions s
+    JOIN users u ON u.id = s.suggested_id
+    WHERE s.user_id = :user_id
+      AND NOT EXISTS (
+          SELECT 1 FROM follows f WHERE f.follower_id = s.user_id AND f.following_id = s.suggested_id
+      )
+    ORDER BY s.position
+"""
+
+_POPULAR_NOT_FOLLOWED_SQL = """
+    SELECT u.id, u.name, u.username, u.image, u.follower_count
+    FROM users u
+    WHERE u.id != :user_id
+      AND NOT EXISTS (SELECT 1 FROM follows f WHERE f.follower_id = :user_id AND f.following_id = u.id)
+    ORDER BY u.follower_count DESC, u.id
+    LIMIT :top_k
+"""
+
+async def get_suggestions_async(cursor, user_id: str | None, count: int = settings.SUGGESTIONS_COUNT):
+    if user_id is None:
+        cursor.execute(
+            "SELECT id, name, username, image, follower_count FROM users ORDER BY follower_count DESC, id LIMIT ?",
+            (settings.SUGGESTIONS_POPULAR_CANDIDATES,),
+        )
+        pool = [_format_suggestion(r) for r in cursor.fetchall()]
+        _suggestion_cache.set(_POPULAR_KEY, pool)
+        return _sample(pool, count)
+
+    cursor.execute(_USER_SUGGESTIONS_SQL, {"user_id": user_id})
+    rows = cursor.fetchall()
+    if not rows:
+        cursor.execute(_POPULAR_NOT_FOLLOWED_SQL, {"user_id": user_id, "top_k": settings.SUGGESTIONS_TOP_K})
+        rows = cursor.fetchall()
+    suggestions = [_format_suggestion(r) for r in rows]
+    _suggestion_cache.set(user_id, suggestions)
+    return suggestions[:count]
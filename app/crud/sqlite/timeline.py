@@ -0,0 +1,59 @@
+# TRIM_SQL and the helpers are portable; the rest swaps dual/FETCH FIRST for SQLite syntax
+from app.crud.timeline import TRIM_SQL, backfill_params, is_fanned_out
+
+_FAN_OUT_SQL = """
+    INSERT INTO timelines (user_id, post_id, author_id, created_at)
+    SELECT r.user_id, p.id, p.author_id, p.created_at
+    FROM posts p
+    CROSS JOIN (
+        SELECT :author_id as user_id
+        UNION
+        SELECT follower_id FROM follows WHERE following_id = :author_id
+    ) r
+    WHERE p.id = :post_id
+"""
+
+_SELF_ONLY_SQL = """
+    INSERT INTO timelines (user_id, post_id, author_id, created_at)
+    SELECT author_id, id, author_id, created_at FROM posts WHERE id = :post_id
+"""
+
+BACKFILL_SQL = """
+    INSERT INTO timelines (user_id, post_id, author_id, created_at)
+    SELECT :follower_id, recent.id, recent.author_id, recent.created_at
+    FROM (
+        SELECT id, author_id, created_at FROM posts
+        WHERE author_id = :following_id
+        ORDER BY created_at DESC, id DESC
+        LIMIT :backfill
+    ) recent
+    WHERE NOT EXISTS (
+        SELECT 1 FROM timelines t WHERE t.user_id = :follower_id AND t.post_id = recent.id
+    )
+    AND (SELECT follower_count FROM users WHERE id = :following_id) <= :fanout_max
+"""
+
+def fan_out_post(cursor, post_id: str, author_id: str, follower_count: int):
+    if is_fanned_out(follower_count):
+        cursor.execute(_FAN_OUT_SQL, {"post_id": post_id, "author_id": author_id})
+    else:
+        cursor.execute(_SELF_ONLY_SQL, {"post_id": post_id})
+
+def rebuild(cursor):
+    cursor.execute("""
+        INSERT INTO timelines (user_id, post_id, author_id, created_at)
+        SELECT r.user_id, p.id, p.author_id, p.created_at
+        FROM (
+            SELECT id as user_id, id as author_id FROM users
+            UNION
+            SELECT f.follower_id, f.following_id FROM follows f
+            JOIN users u ON u.id = f.following_id
+            WHERE u.follower_count <= :fanout_max
+        ) r
+        JOIN (
+            SELECT id, author_id, created_at,
+                   ROW_NUMBER() OVER (PARTITION BY author_id ORDER BY created_at DESC, id DESC) as rn
+            FROM posts
+        ) p ON p.author_id = r.author_id AND p.rn <= :backfill
+        WHERE NOT EXISTS (SELECT 1 FROM timelines t WHERE t.user_id = r.user_id AND t.post_id = p.id)
+    """, backfill_params())
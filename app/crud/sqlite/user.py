@@ -0,0 +1,137 @@
+# Caches, formatters and the follow-count SQL are shared with the Oracle module
+from app.core.security import get_password_hash
+from app.core.sqlite_db import now
+from app.crud.user import (
+    _ADJUST_FOLLOW_COUNTS_SQL, _PROFILE_FIELDS, _cache_public_profile, _format_profile, _new_user_row,
+    _profile_cache, invalidate_profile,
+)
+from app.crud.sqlite import notification as notif_crud
+from app.crud.sqlite import timeline as timeline_crud
+from app.crud.suggestion import invalidate_suggestions
+from app.schemas.user import UserCreate, UserUpdate
+
+def get_session_version(cursor, user_id: str) -> int | None:
+    cursor.execute("SELECT session_version FROM users WHERE id = ?", (user_id,))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+async def get_session_version_async(cursor, user_id: str) -> int | None:
+    return get_session_version(cursor, user_id)
+
+def bump_session_version(cursor, user_id: str) -> int:
+    cursor.execute(
+        "UPDATE users SET session_version = session_version + 1 WHERE id = ? RETURNING session_version",
+        (user_id,),
+    )
+    return cursor.fetchone()[0]
+
+_USER_BY_IDENTIFIER_SQL = "SELECT id, password_hash, session_version FROM users WHERE email = ? OR username = ?"
+
+def get_user_by_email_or_username(cursor, identifier: str):
+    cursor.execute(_USER_BY_IDENTIFIER_SQL, (identifier, identifier))
+    return cursor.fetchone()
+
+async def get_user_by_email_or_username_async(cursor, identifier: str):
+    return get_user_by_email_or_username(cursor, identifier)
+
+_CREATE_USER_SQL = """
+    INSERT INTO users (id, email, username, password_hash, name, image)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+def create_user(cursor, user: UserCreate):
+    row = _new_user_row(user, get_password_hash(user.password))
+    cursor.execute(_CREATE_USER_SQL, row)
+    return row[0]
+
+async def create_user_async(cursor, user: UserCreate, hashed_pw: str):
+    row = _new_user_row(user, hashed_pw)
+    cursor.execute(_CREATE_USER_SQL, row)
+    return row[0]
+
+async def update_password_hash_async(cursor, user_id: str, hashed_pw: str):
+    cursor.execute("UPDATE users SET password_hash = ? WHERE id = ?", (hashed_pw, user_id))
+
+def get_user_profile(cursor, user_id: str):
+    profile = _profile_cache.get(("id", user_id))
+    if profile:
+        return profile
+    cursor.execute(f"SELECT {', '.join(_PROFILE_FIELDS)} FROM users WHERE id = ?", (user_id,))
+    row = cursor.fetchone()
+    if row:
+        profile = dict(zip(_PROFILE_FIELDS, row))
+        _profile_cache.set(("id", user_id), profile)
+        return profile
+    return None
+
+async def get_user_profile_async(cursor, user_id: str):
+    return get_user_profile(cursor, user_id)
+
+def update_user_profile(cursor, user_id: str, data: UserUpdate):
+    update_data = data.model_dump(exclude_unset=True)
+    if not update_data:
+        return
+    set_clauses = [f"{key} = :{key}" for key in update_data]
+    sql = f"UPDATE users SET {', '.join(set_clauses)}, updated_at = :now WHERE id = :user_id"
+    cursor.execute(sql, {**update_data, "user_id": user_id, "now": now()})
+    invalidate_profile(cursor, user_id)
+
+_PROFILE_BY_USERNAME_SQL = """
+    SELECT u.id, u.name, u.username, u.email, u.image, u.bio, u.location, u.website, u.created_at,
+           u.follower_count, u.following_count, u.post_count
+    FROM users u
+    WHERE u.username = ?
+"""
+
+def get_profile_by_username(cursor, username: str):
+    profile = _profile_cache.get(("username", username))
+    if profile:
+        return profile
+    cursor.execute(_PROFILE_BY_USERNAME_SQL, (username,))
+    row = cursor.fetchone()
+    if row:
+        profile = _format_profile(row)
+        _cache_public_profile(profile)
+        return profile
+    return None
+
+async def get_profile_by_username_async(cursor, username: str):
+    return get_profile_by_username(cursor, username)
+
+def set_follow(cursor, follower_id: str, following_id: str, following: bool | None = None):
+    cursor.execute("SELECT 1 FROM users WHERE id = ?", (following_id,))
+    if cursor.fetchone() is None:
+        return None, False
+    params = {"follower_id": follower_id, "following_id": following_id, **timeline_crud.backfill_params()}
+
+    changed = False
+    if following is not True:
+        cursor.execute("DELETE FROM follows WHERE follower_id = ? AND following_id = ?", (follower_id, following_id))
+        if cursor.rowcount > 0:
+            cursor.execute(_ADJUST_FOLLOW_COUNTS_SQL.format(delta=-1), params)
+            cursor.execute(timeline_crud.TRIM_SQL, params)
+            now_following, changed = False, True
+        elif following is False:
+            return False, False
+    if not changed:
+        cursor.execute(
+            "INSERT INTO follows (follower_id, following_id, created_at) VALUES (?, ?, ?) ON CONFLICT DO NOTHING",
+            (follower_id, following_id, now()),
+        )
+        if cursor.rowcount > 0:
+            cursor.execute(_ADJUST_FOLLOW_COUNTS_SQL.format(delta=1), params)
+            cursor.execute(timeline_crud.BACKFILL_SQL, params)
+            changed = True
+        now_following = True
+
+    if changed:
+        invalidate_profile(cursor, follower_id)
+        invalidate_profile(cursor, following_id)
+        invalidate_suggestions(cursor, follower_id)
+        if now_following:
+            notif_crud.create_notification(cursor, "FOLLOW", following_id, follower_id)
+    return now_following, changed
+
+def is_following(cursor, follower_id: str, following_id: str):
+    cursor.execute("SELECT 1 FROM follows WHERE follower_id = ? AND following_id = ?", (follower_id, following_id))
+    return cursor.fetchone() is not None
@@ -0,0 +1,156 @@
+"""Precomputed "who to follow" recommendations.
+
+refresh() rebuilds `follow_suggestions` in bulk: for every user, accounts
+followed by the people they follow (friends of friends, scored by how many of
+their follows lead there) plus the SUGGESTIONS_POPULAR_CANDIDATES most-followed
+accounts, minus themselves and whoever they already follow, keeping the top
+SUGGESTIONS_TOP_K. It runs periodically (app/core/suggestions.py) and from
+app/refresh_suggestions.py.
+
+Refreshes are serialized by a table lock, so workers refreshing at the same
+time run one after the other, and the later one can skip a refresh that just
+happened.
+
+Requests read a user's list from a per-worker cache (cached_suggestions) and
+only need a cursor on a miss. Follows made since the last refresh are filtered
+out when the list is loaded, and set_follow evicts the follower's entry. Users
+without precomputed rows (signed up since the last refresh) get popular
+accounts they don't follow. Anonymous requests get a random sample from a
+cached pool of popular accounts.
+"""
+import random
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core import invalidation
+
+# user_id -> top-K suggestion dicts; ("popular",) -> the anonymous pool
+_suggestion_cache = TTLCache("suggestions", settings.SUGGESTIONS_CACHE_SIZE, settings.SUGGESTIONS_CACHE_TTL_SECONDS)
+_POPULAR_KEY = ("popular",)
+
+invalidation.register_handler("suggestions", _suggestion_cache.pop)
+
+def invalidate_suggestions(cursor, user_id: str):
+    """Drops user_id's cached suggestions here and, via the channel, in other workers."""
+    invalidation.publish(cursor, "suggestions", user_id)
+
+def clear_cache():
+    """Call after a refresh has committed."""
+    _suggestion_cache.clear()
+
+def cached_suggestions(user_id: str | None, count: int = settings.SUGGESTIONS_COUNT) -> list | None:
+    """The answer from this worker's cache, or None when the database is needed."""
+    if user_id is None:
+        pool = _suggestion_cache.get(_POPULAR_KEY)
+        return None if pool is None else _sample(pool, count)
+    cached = _suggestion_cache.get(user_id)
+    return None if cached is None else cached[:count]
+
+def _format_suggestion(row):
+    return {"id": row[0], "name": row[1], "username": row[2], "image": row[3], "_count": {"followers": row[4]}}
+
+def _sample(pool: list, count: int) -> list:
+    return random.sample(pool, min(count, len(pool)))
+
+# One pass over follows: a friend-of-friend path scores 1, a popular account 0.
+# Ties go to the account with more followers.
+_REFRESH_SQL = """
+    INSERT INTO follow_suggestions (user_id, suggested_id, mutual_count, position)
+    SELECT user_id, suggested_id, mutual_count, rn
+    FROM (
+        SELECT c.user_id, c.suggested_id, c.mutual_count,
+               ROW_NUMBER() OVER (
+                   PARTITION BY c.user_id ORDER BY c.mutual_count DESC, u.follower_count DESC, c.suggested_id
+               ) rn
+        FROM (
+            SELECT user_id, suggested_id, SUM(score) mutual_count
+            FROM (
+                SELECT f1.follower_id user_id, f2.following_id suggested_id, 1 score
+                FROM follows f1
+                JOIN follows f2 ON f2.follower_id = f1.following_id
+                UNION ALL
+                SELECT u2.id, p.id, 0
+                FROM users u2
+                CROSS JOIN (
+                    SELECT id FROM users ORDER BY follower_count DESC, id FETCH FIRST :popular ROWS ONLY
+                ) p
+            )
+            GROUP BY user_id, suggested_id
+        ) c
+        JOIN users u ON u.id = c.suggested_id
+        WHERE c.user_id != c.suggested_id
+          AND NOT EXISTS (
+              SELECT 1 FROM follows f WHERE f.follower_id = c.user_id AND f.following_id = c.suggested_id
+          )
+    )
+    WHERE rn <= :top_k
+"""
+
+def refresh(cursor, max_age_seconds: float | None = None) -> int | None:
+    """Replaces every user's suggestions; returns the rows written, or None when
+    they were already computed within max_age_seconds. Readers see the previous
+    lists, and other refreshes wait, until the caller commits."""
+    # Queries still read the table; a concurrent refresh waits here
+    cursor.execute("LOCK TABLE follow_suggestions IN EXCLUSIVE MODE")
+    if max_age_seconds is not None and is_fresh(cursor, max_age_seconds):
+        return None
+    cursor.execute("DELETE FROM follow_suggestions")
+    cursor.execute(_REFRESH_SQL, {"popular": settings.SUGGESTIONS_POPULAR_CANDIDATES,
+                                  "top_k": settings.SUGGESTIONS_TOP_K})
+    return cursor.rowcount
+
+def is_fresh(cursor, max_age_seconds: float) -> bool:
+    """True if suggestions were computed within the last max_age_seconds."""
+    cursor.execute(
+        """
+        SELECT 1 FROM follow_suggestions
+        WHERE computed_at > CURRENT_TIMESTAMP - NUMTODSINTERVAL(:1, 'SECOND')
+        FETCH FIRST 1 ROWS ONLY
+        """,
+        (max_age_seconds,),
+    )
+    return cursor.fetchone() is not None
+
+# Follows made since the refresh drop out here
+_USER_SUGGESTIONS_SQL = """
+    SELECT u.id, u.name, u.username, u.image, u.follower_count
+    FROM follow_suggestions s
+    JOIN users u ON u.id = s.suggested_id
+    WHERE s.user_id = :user_id
+      AND NOT EXISTS (
+          SELECT 1 FROM follows f WHERE f.follower_id = s.user_id AND f.following_id = s.suggested_id
+      )
+    ORDER BY s.position
+"""
+
+_POPULAR_NOT_FOLLOWED_SQL = """
+    SELECT u.id, u.name, u.username, u.image, u.follower_count
+    FROM users u
+    WHERE u.id != :user_id
+      AND NOT EXISTS (SELECT 1 FROM follows f WHERE f.follower_id = :user_id AND f.following_id = u.id)
+    ORDER BY u.follower_count DESC, u.id
+    FETCH FIRST :top_k ROWS ONLY
+"""
+
+_POPULAR_SQL = """
+    SELECT id, name, username, image, follower_count
+    FROM users
+    ORDER BY follower_count DESC, id
+    FETCH FIRST :popular ROWS ONLY
+"""
+
+async def get_suggestions_async(cursor, user_id: str | None, count: int = settings.SUGGESTIONS_COUNT):
+    """Loads into the cache what cached_suggestions didn't have."""
+    if user_id is None:
+        await cursor.execute(_POPULAR_SQL, {"popular": settings.SUGGESTIONS_POPULAR_CANDIDATES})
+        pool = [_format_suggestion(r) for r in await cursor.fetchall()]
+        _suggestion_cache.set(_POPULAR_KEY, pool)
+        return _sample(pool, count)
+
+    await cursor.execute(_USER_SUGGESTIONS_SQL, {"user_id": user_id})
+    rows = await cursor.fetchall()
+    if not rows:
+        await cursor.execute(_POPULAR_NOT_FOLLOWED_SQL, {"user_id": user_id, "top_k": settings.SUGGESTIONS_TOP_K})
+        rows = await cursor.fetchall()
+    suggestions = [_format_suggestion(r) for r in rows]
+    _suggestion_cache.set(user_id, suggestions)
+    return suggestions[:count]
@@ -0,0 +1,84 @@
+"""Write side of the materialized home timeline.
+
+Each user's `timelines` rows point at the posts they should see (their own plus
+those of followed authors). Posts are fanned out on write, except for authors
+above TIMELINE_FANOUT_MAX_FOLLOWERS, whose posts are merged in on read by
+post.get_home_timeline. Deleting a post removes its rows through
+fk_timeline_post ON DELETE CASCADE.
+"""
+from app.core.config import settings
+
+# Single INSERT ... SELECT: the follower list never leaves the database
+_FAN_OUT_SQL = """
+    INSERT INTO timelines (user_id, post_id, author_id, created_at)
+    SELECT r.user_id, p.id, p.author_id, p.created_at
+    FROM posts p
+    CROSS JOIN (
+        SELECT :author_id as user_id FROM dual
+        UNION
+        SELECT follower_id FROM follows WHERE following_id = :author_id
+    ) r
+    WHERE p.id = :post_id
+"""
+
+_SELF_ONLY_SQL = """
+    INSERT INTO timelines (user_id, post_id, author_id, created_at)
+    SELECT author_id, id, author_id, created_at FROM posts WHERE id = :post_id
+"""
+
+# New follower: copy the followed author's latest posts (unless they are read-merged)
+BACKFILL_SQL = """
+    INSERT INTO timelines (user_id, post_id, author_id, created_at)
+    SELECT :follower_id, recent.id, recent.author_id, recent.created_at
+    FROM (
+        SELECT id, author_id, created_at FROM posts
+        WHERE author_id = :following_id
+        ORDER BY created_at DESC, id DESC
+        FETCH FIRST :backfill ROWS ONLY
+    ) recent
+    WHERE NOT EXISTS (
+        SELECT 1 FROM timelines t WHERE t.user_id = :follower_id AND t.post_id = recent.id
+    )
+    AND (SELECT follower_count FROM users WHERE id = :following_id) <= :fanout_max
+"""
+
+# Unfollow: remove the author's posts (never the user's own)
+TRIM_SQL = """
+    DELETE FROM timelines
+    WHERE user_id = :follower_id AND author_id = :following_id AND author_id != user_id
+"""
+
+def is_fanned_out(follower_count: int) -> bool:
+    return follower_count <= settings.TIMELINE_FANOUT_MAX_FOLLOWERS
+
+def fan_out_post(cursor, post_id: str, author_id: str, follower_count: int):
+    """Pushes a new post into the author's and (unless they are a celebrity) their followers' timelines."""
+    if is_fanned_out(follower_count):
+        cursor.execute(_FAN_OUT_SQL, {"post_id": post_id, "author_id": author_id})
+    else:
+        cursor.execute(_SELF_ONLY_SQL, {"post_id": post_id})
+
+def backfill_params() -> dict:
+    """Binds BACKFILL_SQL needs besides :follower_id and :following_id."""
+    return {"backfill": settings.TIMELINE_BACKFILL_POSTS, "fanout_max": settings.TIMELINE_FANOUT_MAX_FOLLOWERS}
+
+def rebuild(cursor):
+    """Fills every user's timeline from scratch-loaded data (bulk import): their
+    own and fanned-out followed authors' latest TIMELINE_BACKFILL_POSTS posts."""
+    cursor.execute("""
+        INSERT INTO timelines (user_id, post_id, author_id, created_at)
+        SELECT r.user_id, p.id, p.author_id, p.created_at
+        FROM (
+            SELECT id as user_id, id as author_id FROM users
+            UNION
+            SELECT f.follower_id, f.following_id FROM follows f
+            JOIN users u ON u.id = f.following_id
+            WHERE u.follower_count <= :fanout_max
+        ) r
+        JOIN (
+            SELECT id, author_id, created_at,
+                   ROW_NUMBER() OVER (PARTITION BY author_id ORDER BY created_at DESC, id DESC) as rn
+            FROM posts
+        ) p ON p.author_id = r.author_id AND p.rn <= :backfill
+        WHERE NOT EXISTS (SELECT 1 FROM timelines t WHERE t.user_id = r.user_id AND t.post_id = p.id)
+    """, backfill_params())
@@ -1,34 +1,119 @@
 import uuid
 from app.core.security import get_password_hash
 from app.schemas.user import UserCreate, UserUpdate
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core import invalidation
+from app.crud import notification as notif_crud
+from app.crud.notification_delivery import _outbox_sql
+from app.crud import timeline as timeline_crud
+
+# Keys: ("id", user_id) -> /auth/me profile, ("username", username) -> public
+# profile with counts, ("alias", user_id) -> username so both can be evicted by id.
+_profile_cache = TTLCache("profiles", settings.PROFILE_CACHE_SIZE, settings.PROFILE_CACHE_TTL_SECONDS)
+
+def _evict_profile(user_id: str):
+    _profile_cache.pop(("id", user_id))
+    username = _profile_cache.pop(("alias", user_id))
+    if username:
+        _profile_cache.pop(("username", username))
+
+invalidation.register_handler("profiles", _evict_profile)
+
+def invalidate_profile(cursor, user_id: str):
+    """Drops cached profiles of user_id here and, via the channel, in other workers."""
+    invalidation.publish(cursor, "profiles", user_id)
+
+def _cache_public_profile(profile):
+    _profile_cache.set(("username", profile["username"]), profile)
+    _profile_cache.set(("alias", profile["id"]), profile["username"])
+
+_USER_BY_IDENTIFIER_SQL = "SELECT id, password_hash, session_version FROM users WHERE email = :1 OR username = :2"
 
 def get_user_by_email_or_username(cursor, identifier: str):
-    sql = "SELECT id, password_hash FROM users WHERE email = :1 OR username = :2"
-    cursor.execute(sql, (identifier, identifier))
+    cursor.execute(_USER_BY_IDENTIFIER_SQL, (identifier, identifier))
     return cursor.fetchone()
 
-def create_user(cursor, user: UserCreate):
+async def get_user_by_email_or_username_async(cursor, identifier: str):
+    await cursor.execute(_USER_BY_IDENTIFIER_SQL, (identifier, identifier))
+    return await cursor.fetchone()
+
+_SESSION_VERSION_SQL = "SELECT session_version FROM users WHERE id = :1"
+
+def get_session_version(cursor, user_id: str) -> int | None:
+    """None when the user doesn't exist (see app/core/sessions.py)."""
+    cursor.execute(_SESSION_VERSION_SQL, (user_id,))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+async def get_session_version_async(cursor, user_id: str) -> int | None:
+    await cursor.execute(_SESSION_VERSION_SQL, (user_id,))
+    row = await cursor.fetchone()
+    return row[0] if row else None
+
+def bump_session_version(cursor, user_id: str) -> int:
+    """Increments the user's session version; returns the new value."""
+    new_version = cursor.var(int)
+    cursor.execute(
+        "UPDATE users SET session_version = session_version + 1 WHERE id = :1 RETURNING session_version INTO :2",
+        (user_id, new_version),
+    )
+    return new_version.getvalue()[0]
+
+_CREATE_USER_SQL = """
+    INSERT INTO users (id, email, username, password_hash, name, image)
+    VALUES (:1, :2, :3, :4, :5, :6)
+"""
+
+def _new_user_row(user: UserCreate, hashed_pw: str):
     user_id = str(uuid.uuid4())
-    hashed_pw = get_password_hash(user.password)
     # Ensure image_url is not None to avoid DB errors
     image_url = f"https://api.dicebear.com/9.x/initials/svg?seed={user.username}"
-    
-    sql = """
-        INSERT INTO users (id, email, username, password_hash, name, image)
-        VALUES (:1, :2, :3, :4, :5, :6)
-    """
-    cursor.execute(sql, (user_id, user.email, user.username, hashed_pw, user.name, image_url))
-    return user_id
+    return (user_id, user.email, user.username, hashed_pw, user.name, image_url)
+
+def create_user(cursor, user: UserCreate):
+    row = _new_user_row(user, get_password_hash(user.password))
+    cursor.execute(_CREATE_USER_SQL, row)
+    return row[0]
+
+async def create_user_async(cursor, user: UserCreate, hashed_pw: str):
+    """The caller hashes the password (see security.get_password_hash_async)."""
+    row = _new_user_row(user, hashed_pw)
+    await cursor.execute(_CREATE_USER_SQL, row)
+    return row[0]
+
+async def update_password_hash_async(cursor, user_id: str, hashed_pw: str):
+    await cursor.execute("UPDATE users SET password_hash = :1 WHERE id = :2", (hashed_pw, user_id))
+
+_PROFILE_FIELDS = ["id", "name", "username", "email", "image", "bio", "location", "website"]
+
+_USER_PROFILE_SQL = """
+    SELECT id, name, username, email, image, bio, location, website 
+    FROM users WHERE id = :1
+"""
 
 def get_user_profile(cursor, user_id: str):
-    sql = """
-        SELECT id, name, username, email, image, bio, location, website 
-        FROM users WHERE id = :1
-    """
-    cursor.execute(sql, (user_id,))
+    profile = _profile_cache.get(("id", user_id))
+    if profile:
+        return profile
+    cursor.execute(_USER_PROFILE_SQL, (user_id,))
     row = cursor.fetchone()
     if row:
-        return dict(zip(["id", "name", "username", "email", "image", "bio", "location", "website"], row))
+        profile = dict(zip(_PROFILE_FIELDS, row))
+        _profile_cache.set(("id", user_id), profile)
+        return profile
+    return None
+
+async def get_user_profile_async(cursor, user_id: str):
+    profile = _profile_cache.get(("id", user_id))
+    if profile:
+        return profile
+    await cursor.execute(_USER_PROFILE_SQL, (user_id,))
+    row = await cursor.fetchone()
+    if row:
+        profile = dict(zip(_PROFILE_FIELDS, row))
+        _profile_cache.set(("id", user_id), profile)
+        return profile
     return None
 
 def update_user_profile(cursor, user_id: str, data: UserUpdate):
@@ -40,80 +125,139 @@ def update_user_profile(cursor, user_id: str, data: UserUpdate):
     params = update_data
     params['user_id'] = user_id
     
-    sql = f"UPDATE users SET {', '.join(set_clauses)} WHERE id = :user_id"
+    # updated_at feeds the ETags of posts rendered with this author
+    sql = f"UPDATE users SET {', '.join(set_clauses)}, updated_at = CURRENT_TIMESTAMP WHERE id = :user_id"
     
     cursor.execute(sql, params)
+    invalidate_profile(cursor, user_id)
+
+# Counts are denormalized onto users (see app/crud/counters.py)
+_PROFILE_BY_USERNAME_SQL = """
+    SELECT u.id, u.name, u.username, u.email, u.image, u.bio, u.location, u.website, u.created_at,
+           u.follower_count, u.following_count, u.post_count
+    FROM users u
+    WHERE u.username = :1
+"""
+
+def _format_profile(row):
+    return {
+        "id": row[0], 
+        "name": row[1], 
+        "username": row[2], 
+        "email": row[3],
+        "image": row[4], 
+        "bio": row[5], 
+        "location": row[6], 
+        "website": row[7],
+        "createdAt": row[8],
+        "_count": {
+            "followers": row[9], 
+            "following": row[10], 
+            "posts": row[11]
+        }
+    }
 
 def get_profile_by_username(cursor, username: str):
-    # Subqueries to get follower/following/post counts
-    sql = """
-        SELECT u.id, u.name, u.username, u.email, u.image, u.bio, u.location, u.website, u.created_at,
-               (SELECT COUNT(*) FROM follows WHERE following_id = u.id) as followers,
-               (SELECT COUNT(*) FROM follows WHERE follower_id = u.id) as following,
-               (SELECT COUNT(*) FROM posts WHERE author_id = u.id) as posts
-        FROM users u
-        WHERE u.username = :1
-    """
-    cursor.execute(sql, (username,))
+    profile = _profile_cache.get(("username", username))
+    if profile:
+        return profile
+    cursor.execute(_PROFILE_BY_USERNAME_SQL, (username,))
     row = cursor.fetchone()
     if row:
-        return {
-            "id": row[0], 
-            "name": row[1], 
-            "username": row[2], 
-            "email": row[3],
-            "image": row[4], 
-            "bio": row[5], 
-            "location": row[6], 
-            "website": row[7],
-            "createdAt": row[8],
-            "_count": {
-                "followers": row[9], 
-                "following": row[10], 
-                "posts": row[11]
-            }
-        }
+        profile = _format_profile(row)
+        _cache_public_profile(profile)
+        return profile
     return None
 
-def get_random_users(cursor, exclude_user_id: str = None):
-    # Fetch 3 random users. 
-    # Since Oracle SAMPLE can be tricky with complex WHERE clauses, we just fetch rows where ID != current
-    sql = """
-        SELECT id, name, username, image, 
-               (SELECT COUNT(*) FROM follows WHERE following_id = users.id) as followers
-        FROM users
-        WHERE id != :1
-        ORDER BY DBMS_RANDOM.VALUE
-        FETCH FIRST 3 ROWS ONLY
-    """
-    # If no user logged in, pass a dummy ID that won't match any UUID
-    uid = exclude_user_id if exclude_user_id else "0"
-    cursor.execute(sql, (uid,))
-    rows = cursor.fetchall()
-    
-    results = []
-    for r in rows:
-        results.append({
-            "id": r[0], 
-            "name": r[1], 
-            "username": r[2], 
-            "image": r[3], 
-            "_count": {"followers": r[4]}
-        })
-    return results
-
-def toggle_follow(cursor, follower_id: str, following_id: str):
-    check_sql = "SELECT 1 FROM follows WHERE follower_id = :1 AND following_id = :2"
-    cursor.execute(check_sql, (follower_id, following_id))
-    
-    if cursor.fetchone():
-        # Unfollow
-        cursor.execute("DELETE FROM follows WHERE follower_id = :1 AND following_id = :2", (follower_id, following_id))
-        return False
-    else:
-        # Follow
-        cursor.execute("INSERT INTO follows (follower_id, following_id) VALUES (:1, :2)", (follower_id, following_id))
-        return True
+async def get_profile_by_username_async(cursor, username: str):
+    profile = _profile_cache.get(("username", username))
+    if profile:
+        return profile
+    await cursor.execute(_PROFILE_BY_USERNAME_SQL, (username,))
+    row = await cursor.fetchone()
+    if row:
+        profile = _format_profile(row)
+        _cache_public_profile(profile)
+        return profile
+    return None
+
+# One statement updates both sides of the relationship
+_ADJUST_FOLLOW_COUNTS_SQL = """
+    UPDATE users
+    SET follower_count = follower_count + CASE WHEN id = :following_id THEN {delta} ELSE 0 END,
+        following_count = following_count + CASE WHEN id = :follower_id THEN {delta} ELSE 0 END
+    WHERE id IN (:follower_id, :following_id)
+"""
+
+# Both profiles' follower/following counts and the follower's suggestions change
+_FOLLOW_INVALIDATIONS = (("profiles", ":follower_id"), ("profiles", ":following_id"), ("suggestions", ":follower_id"))
+
+# :mode 0 toggles, 1 follows, -1 unfollows; counters, the follower's timeline,
+# cache invalidation rows and the FOLLOW notification are written in the same
+# round trip. :following is NULL for an unknown user.
+_SET_FOLLOW_PLSQL = f"""
+DECLARE
+    v_exists NUMBER;
+BEGIN
+    SELECT COUNT(*) INTO v_exists FROM users WHERE id = :following_id;
+    :changed := 0;
+    IF v_exists = 0 THEN
+        :following := NULL;
+        RETURN;
+    END IF;
+    IF :mode <= 0 THEN
+        DELETE FROM follows WHERE follower_id = :follower_id AND following_id = :following_id;
+        IF SQL%ROWCOUNT > 0 THEN
+            {_ADJUST_FOLLOW_COUNTS_SQL.format(delta=-1)};
+            {timeline_crud.TRIM_SQL};
+            {invalidation.invalidations_sql(*_FOLLOW_INVALIDATIONS)};
+            :following := 0;
+            :changed := 1;
+            RETURN;
+        END IF;
+        IF :mode < 0 THEN
+            :following := 0;
+            RETURN;
+        END IF;
+    END IF;
+    BEGIN
+        INSERT INTO follows (follower_id, following_id) VALUES (:follower_id, :following_id);
+        {_ADJUST_FOLLOW_COUNTS_SQL.format(delta=1)};
+        {timeline_crud.BACKFILL_SQL};
+        {invalidation.invalidations_sql(*_FOLLOW_INVALIDATIONS)};
+        {_outbox_sql(":following_id")};
+        :changed := 1;
+    EXCEPTION WHEN DUP_VAL_ON_INDEX THEN
+        NULL;  -- already following
+    END;
+    :following := 1;
+END;
+"""
+
+def set_follow(cursor, follower_id: str, following_id: str, following: bool | None = None):
+    """Follows (True), unfollows (False) or toggles (None) in one round trip, and
+    notifies the followed user of a new follow.
+
+    Returns (following, changed); following is None when the target user doesn't exist."""
+    now_following, changed = cursor.var(int), cursor.var(int)
+    notification = notif_crud._notification_binds("FOLLOW", follower_id)
+    cursor.execute(_SET_FOLLOW_PLSQL, {
+        "follower_id": follower_id, "following_id": following_id,
+        "mode": {None: 0, True: 1, False: -1}[following],
+        "following": now_following, "changed": changed,
+        "broadcast": int(invalidation.broadcasting()),
+        **timeline_crud.backfill_params(), **notification,
+    })
+    if now_following.getvalue() is None:
+        return None, False
+    if changed.getvalue():
+        # The rows for other workers went in with the block
+        invalidation.evict(cursor, "profiles", follower_id)
+        invalidation.evict(cursor, "profiles", following_id)
+        invalidation.evict(cursor, "suggestions", follower_id)
+        if now_following.getvalue():
+            notif_crud._submit_notification(cursor, notification, following_id)
+    return bool(now_following.getvalue()), bool(changed.getvalue())
 
 def is_following(cursor, follower_id: str, following_id: str):
     sql = "SELECT 1 FROM follows WHERE follower_id = :1 AND following_id = :2"
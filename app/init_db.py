@@ -6,6 +6,7 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.core.config import settings
+from app.migrate import mark_all_applied
 
 def init_db():
     print(f"Connecting to database: {settings.DB_DSN}")
@@ -19,7 +20,7 @@ def init_db():
         print("Connected successfully.")
 
         # List of tables to drop (to start fresh)
-        tables = ["notifications", "follows", "likes", "comments", "posts", "users"]
+        tables = ["schema_migrations", "follow_suggestions", "notification_actors", "notification_outbox", "cache_invalidations", "timelines", "notifications", "follows", "likes", "comments", "posts", "users"]
         
         for table in tables:
             try:
@@ -31,6 +32,14 @@ def init_db():
                 if error.code != 942:
                     raise
 
+        try:
+            cursor.execute("DROP SEQUENCE notification_seq")
+        except oracledb.DatabaseError as e:
+            # ORA-02289: sequence does not exist
+            error, = e.args
+            if error.code != 2289:
+                raise
+
         # Create Tables
         print("Creating tables...")
         
@@ -45,6 +54,10 @@ def init_db():
             image VARCHAR2(4000), -- CHANGED FROM 1000 TO 4000
             location VARCHAR2(255),
             website VARCHAR2(255),
+            follower_count NUMBER DEFAULT 0 NOT NULL,
+            following_count NUMBER DEFAULT 0 NOT NULL,
+            post_count NUMBER DEFAULT 0 NOT NULL,
+            session_version NUMBER DEFAULT 0 NOT NULL,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )""")
@@ -54,8 +67,11 @@ def init_db():
         CREATE TABLE posts (
             id VARCHAR2(36) PRIMARY KEY NOT NULL,
             author_id VARCHAR2(36) NOT NULL,
-            content CLOB,
+            content_text VARCHAR2(4000),  -- short content inline
+            content CLOB,                 -- overflow for long content
             image VARCHAR2(4000), -- CHANGED FROM 1000 TO 4000
+            like_count NUMBER DEFAULT 0 NOT NULL,
+            comment_count NUMBER DEFAULT 0 NOT NULL,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             CONSTRAINT fk_post_author FOREIGN KEY (author_id) REFERENCES users(id) ON DELETE CASCADE
@@ -64,7 +80,8 @@ def init_db():
         cursor.execute("""
         CREATE TABLE comments (
             id VARCHAR2(36) PRIMARY KEY NOT NULL,
-            content CLOB NOT NULL,
+            content_text VARCHAR2(4000),  -- short content inline
+            content CLOB,                 -- overflow for long content
             author_id VARCHAR2(36) NOT NULL,
             post_id VARCHAR2(36) NOT NULL,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
@@ -93,6 +110,8 @@ def init_db():
             CONSTRAINT fk_follow_following FOREIGN KEY (following_id) REFERENCES users(id) ON DELETE CASCADE
         )""")
 
+        # Orders notifications by latest activity: every insert and coalescing update takes the next value
+        cursor.execute("CREATE SEQUENCE notification_seq")
         cursor.execute("""
         CREATE TABLE notifications (
             id VARCHAR2(36) PRIMARY KEY NOT NULL,
@@ -102,6 +121,11 @@ def init_db():
             read_status NUMBER(1) DEFAULT 0,
             post_id VARCHAR2(36),
             comment_id VARCHAR2(36),
+            -- LIKE/FOLLOW events for one recipient, post and time window share a row
+            group_key VARCHAR2(120),
+            actor_count NUMBER DEFAULT 1 NOT NULL,
+            recent_actor_ids VARCHAR2(400) NOT NULL,  -- newest first, comma-separated
+            seq NUMBER DEFAULT notification_seq.NEXTVAL NOT NULL,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             CONSTRAINT fk_notif_user FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
             CONSTRAINT fk_notif_creator FOREIGN KEY (creator_id) REFERENCES users(id) ON DELETE CASCADE,
@@ -109,6 +133,94 @@ def init_db():
             CONSTRAINT fk_notif_comment FOREIGN KEY (comment_id) REFERENCES comments(id) ON DELETE CASCADE
         )""")
 
+        cursor.execute("""
+        CREATE TABLE timelines (
+            user_id VARCHAR2(36) NOT NULL,
+            post_id VARCHAR2(36) NOT NULL,
+            author_id VARCHAR2(36) NOT NULL,
+            created_at TIMESTAMP NOT NULL,
+            PRIMARY KEY (user_id, post_id),
+            CONSTRAINT fk_timeline_user FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+            CONSTRAINT fk_timeline_post FOREIGN KEY (post_id) REFERENCES posts(id) ON DELETE CASCADE
+        )""")
+
+        cursor.execute("""
+        CREATE TABLE cache_invalidations (
+            id NUMBER GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+            cache_name VARCHAR2(50) NOT NULL,
+            cache_key VARCHAR2(255) NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )""")
+        cursor.execute("CREATE INDEX ix_cache_inval_created ON cache_invalidations (created_at)")
+
+        # Notifications the write-behind queue couldn't insert directly (no FKs: the
+        # relay re-checks them when moving rows into notifications)
+        cursor.execute("""
+        CREATE TABLE notification_outbox (
+            id VARCHAR2(36) PRIMARY KEY NOT NULL,
+            type VARCHAR2(20) NOT NULL,
+            user_id VARCHAR2(36) NOT NULL,
+            creator_id VARCHAR2(36) NOT NULL,
+            post_id VARCHAR2(36),
+            comment_id VARCHAR2(36),
+            group_key VARCHAR2(120),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )""")
+
+        # Who acted in each coalesced notification group, so actor_count counts them once
+        cursor.execute("""
+        CREATE TABLE notification_actors (
+            group_key VARCHAR2(120) NOT NULL,
+            actor_id VARCHAR2(36) NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (group_key, actor_id)
+        )""")
+
+        # Precomputed "who to follow" lists (app/crud/suggestion.py)
+        cursor.execute("""
+        CREATE TABLE follow_suggestions (
+            user_id VARCHAR2(36) NOT NULL,
+            suggested_id VARCHAR2(36) NOT NULL,
+            mutual_count NUMBER NOT NULL,
+            position NUMBER NOT NULL,
+            computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (user_id, suggested_id),
+            CONSTRAINT fk_suggestion_user FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+            CONSTRAINT fk_suggestion_suggested FOREIGN KEY (suggested_id) REFERENCES users(id) ON DELETE CASCADE
+        )""")
+
+        # Composite indexes matching the keyset-paginated listings
+        print("Creating indexes...")
+        cursor.execute("CREATE INDEX ix_posts_created ON posts (created_at, id)")
+        cursor.execute("CREATE INDEX ix_posts_author_created ON posts (author_id, created_at, id)")
+        cursor.execute("CREATE INDEX ix_likes_user_created ON likes (user_id, created_at, id)")
+        cursor.execute("CREATE INDEX ix_comments_post_created ON comments (post_id, created_at, id)")
+        cursor.execute("CREATE INDEX ix_notif_user_created ON notifications (user_id, created_at, id)")
+        cursor.execute("CREATE INDEX ix_notif_user_seq ON notifications (user_id, seq)")
+        # Like counts by post and ON DELETE CASCADE from posts/comments
+        cursor.execute("CREATE INDEX ix_likes_post ON likes (post_id)")
+        cursor.execute("CREATE INDEX ix_notif_post ON notifications (post_id)")
+        cursor.execute("CREATE INDEX ix_notif_comment ON notifications (comment_id)")
+        # Unread badge count
+        cursor.execute("CREATE INDEX ix_notif_user_unread ON notifications (user_id, read_status)")
+        # Coalescing MERGE target; rows without a group_key aren't indexed
+        cursor.execute("CREATE UNIQUE INDEX ux_notif_group ON notifications (group_key)")
+        # Recent-notification polling for PUSH_BROKER=database
+        cursor.execute("CREATE INDEX ix_notif_created ON notifications (created_at)")
+        cursor.execute("CREATE INDEX ix_notif_actors_created ON notification_actors (created_at)")
+        cursor.execute("CREATE INDEX ix_timelines_user_created ON timelines (user_id, created_at, post_id)")
+        cursor.execute("CREATE INDEX ix_timelines_user_author ON timelines (user_id, author_id)")
+        cursor.execute("CREATE INDEX ix_timelines_post ON timelines (post_id)")
+        # Fan-out reads followers of an author
+        cursor.execute("CREATE INDEX ix_follows_following ON follows (following_id, follower_id)")
+        # Popular accounts for suggestions; cascade and freshness check on follow_suggestions
+        cursor.execute("CREATE INDEX ix_users_follower_count ON users (follower_count)")
+        cursor.execute("CREATE INDEX ix_suggestions_suggested ON follow_suggestions (suggested_id)")
+        cursor.execute("CREATE INDEX ix_suggestions_computed ON follow_suggestions (computed_at)")
+
+        # The schema above is the latest: later changes come from app/migrate.py
+        mark_all_applied(cursor)
+
         conn.commit()
         print("All tables created successfully.")
         cursor.close()
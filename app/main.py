@@ -1,8 +1,39 @@
+from contextlib import asynccontextmanager
+from anyio import to_thread
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from app.api.v1.router import api_router
+from app.core.config import settings
+from app.core.database import init_pool, close_pool, init_async_pool, close_async_pool, pool_stats
+from app.core.cache import cache_stats
+from app.core import invalidation, metrics, notification_queue, push, suggestions
+from app.core.instrumentation import MetricsMiddleware
+from app.core.profiling import ServerTimingMiddleware
+from app.core.security import start_password_hasher, shutdown_password_hasher, password_hasher_stats
 
-app = FastAPI(title="Socially Oracle API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Sync endpoints run in the anyio threadpool; match it to the pool size so
+    # a worker thread never sits blocked waiting for a connection.
+    to_thread.current_default_thread_limiter().total_tokens = settings.DB_POOL_MAX
+    init_pool()
+    init_async_pool()
+    invalidation.start_listener()
+    start_password_hasher()
+    push.start()
+    notification_queue.start()
+    suggestions.start()
+    yield
+    suggestions.stop()
+    notification_queue.stop()
+    push.stop()
+    shutdown_password_hasher()
+    invalidation.stop_listener()
+    await close_async_pool()
+    close_pool()
+
+app = FastAPI(title="Socially Oracle API", lifespan=lifespan)
 
 # CORS
 app.add_middleware(
@@ -12,10 +43,33 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Added last = outermost: MetricsMiddleware sets up the per-request stats
+app.add_middleware(ServerTimingMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 # Include Routes
 app.include_router(api_router, prefix="/api/v1")
 
 @app.get("/health")
 def health_check():
-    return {"status": "ok", "db": "oracle"}
\ No newline at end of file
+    return {"status": "ok", "db": settings.DB_BACKEND}
+
+@app.get("/health/pool")
+def pool_health():
+    return pool_stats()
+
+@app.get("/health/cache")
+def cache_health():
+    return cache_stats()
+
+@app.get("/health/auth")
+def auth_health():
+    return password_hasher_stats()
+
+@app.get("/health/notifications")
+def notifications_health():
+    return {**notification_queue.queue_stats(), "push": push.push_stats()}
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
@@ -0,0 +1,244 @@
+"""Applies pending schema migrations (app/migrations.py) without touching data.
+
+Applied versions are recorded in `schema_migrations`; each run applies the
+ones missing, in order, and stops at the first failure with exit status 1.
+A step whose object already exists counts as applied only if the existing
+object matches it. Databases created by init_db start with every current
+version recorded.
+
+    python -m app.migrate                 # apply pending migrations
+    python -m app.migrate --status        # list versions and whether they ran
+    python -m app.migrate --check-plans   # EXPLAIN the hot queries, report full scans
+"""
+import argparse
+import oracledb
+import re
+import sys
+import os
+
+# Add backend directory to python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.core.pagination import PageParams
+from app.crud import notification as notification_crud
+from app.crud import post as post_crud
+from app.crud import suggestion as suggestion_crud
+from app.migrations import MIGRATIONS, Migration
+
+_VERSION_TABLE_SQL = """
+    CREATE TABLE schema_migrations (
+        version NUMBER PRIMARY KEY,
+        name VARCHAR2(100) NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )"""
+
+# Re-running a step whose object is already there: name already used (955),
+# column already exists (1430), column list already indexed (1408), column
+# already NOT NULL / NULL (1442 / 1451), key already exists (2260, 2261)
+_ALREADY_DONE = {955, 1408, 1430, 1442, 1451, 2260, 2261}
+
+_CREATE_INDEX = re.compile(r"CREATE\s+(UNIQUE\s+)?INDEX\s+(\w+)\s+ON\s+(\w+)\s*\(([^)]*)\)", re.I)
+_CREATE_TABLE = re.compile(r"CREATE\s+TABLE\s+(\w+)\s*\((.*)\)", re.I | re.S)
+_CREATE_SEQUENCE = re.compile(r"CREATE\s+SEQUENCE\s+(\w+)", re.I)
+_TABLE_CONSTRAINTS = {"PRIMARY", "CONSTRAINT", "UNIQUE", "FOREIGN", "CHECK"}
+
+def ensure_version_table(cursor):
+    try:
+        cursor.execute(_VERSION_TABLE_SQL)
+    except oracledb.DatabaseError as e:
+        error, = e.args
+        if error.code != 955:
+            raise
+
+def applied_versions(cursor) -> set[int]:
+    cursor.execute("SELECT version FROM schema_migrations")
+    return {row[0] for row in cursor.fetchall()}
+
+def pending(migrations: list[Migration], applied: set[int]) -> list[Migration]:
+    versions = [m.version for m in migrations]
+    if versions != sorted(set(versions)):
+        raise ValueError("Migration versions must be unique and increasing")
+    return [m for m in migrations if m.version not in applied]
+
+def _split_top_level(body: str) -> list[str]:
+    """Splits a CREATE TABLE body on the commas outside parentheses."""
+    parts, depth, start = [], 0, 0
+    for i, char in enumerate(body):
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "," and depth == 0:
+            parts.append(body[start:i])
+            start = i + 1
+    parts.append(body[start:])
+    return [p.strip() for p in parts if p.strip()]
+
+def _existing_index_matches(cursor, unique: bool, name: str, table: str, columns: list[str]) -> bool:
+    cursor.execute("SELECT table_name, uniqueness FROM user_indexes WHERE index_name = :1", (name,))
+    row = cursor.fetchone()
+    if row is None or row[0] != table or (row[1] == "UNIQUE") != unique:
+        return False
+    cursor.execute("SELECT column_name FROM user_ind_columns WHERE index_name = :1 ORDER BY column_position", (name,))
+    return [r[0] for r in cursor.fetchall()] == columns
+
+def _existing_table_matches(cursor, name: str, columns: list[str]) -> bool:
+    cursor.execute("SELECT object_type FROM user_objects WHERE object_name = :1", (name,))
+    if [r[0] for r in cursor.fetchall()] != ["TABLE"]:
+        return False
+    cursor.execute("SELECT column_name FROM user_tab_columns WHERE table_name = :1", (name,))
+    return set(columns) <= {r[0] for r in cursor.fetchall()}
+
+def matches_existing(cursor, step: str) -> bool:
+    """After ORA-00955: whether the object holding the name is the one `step`
+    creates (same table and columns, same indexed columns and uniqueness, or a
+    sequence)."""
+    m = _CREATE_INDEX.search(step)
+    if m:
+        unique, name, table, columns = m.groups()
+        return _existing_index_matches(cursor, bool(unique), name.upper(), table.upper(),
+                                       [c.strip().upper() for c in columns.split(",")])
+    m = _CREATE_TABLE.search(step)
+    if m:
+        name, body = m.groups()
+        columns = [part.split()[0].upper() for part in _split_top_level(body)
+                   if part.split()[0].upper() not in _TABLE_CONSTRAINTS]
+        return _existing_table_matches(cursor, name.upper(), columns)
+    m = _CREATE_SEQUENCE.search(step)
+    if m:
+        cursor.execute("SELECT object_type FROM user_objects WHERE object_name = :1", (m.group(1).upper(),))
+        return [r[0] for r in cursor.fetchall()] == ["SEQUENCE"]
+    return False
+
+def _run_step(cursor, step):
+    if callable(step):
+        step(cursor)
+        return
+    try:
+        cursor.execute(step)
+    except oracledb.DatabaseError as e:
+        error, = e.args
+        if error.code not in _ALREADY_DONE:
+            raise
+        if error.code == 955 and not matches_existing(cursor, step):
+            raise RuntimeError(f"A different object already uses the name in: {' '.join(step.split())[:200]}") from e
+        print(f"    skipped (ORA-{error.code:05d}: already applied)")
+
+def _record(cursor, migration: Migration):
+    cursor.execute("INSERT INTO schema_migrations (version, name) VALUES (:1, :2)", (migration.version, migration.name))
+
+def apply(conn, migrations: list[Migration] = MIGRATIONS) -> list[int]:
+    """Applies every pending migration; returns the versions applied."""
+    cursor = conn.cursor()
+    ensure_version_table(cursor)
+    done = []
+    for migration in pending(migrations, applied_versions(cursor)):
+        print(f"Applying {migration.version}: {migration.name}")
+        for step in migration.steps:
+            _run_step(cursor, step)
+        _record(cursor, migration)
+        conn.commit()
+        done.append(migration.version)
+    cursor.close()
+    return done
+
+def mark_all_applied(cursor, migrations: list[Migration] = MIGRATIONS):
+    """For a schema created from scratch at the latest version (init_db)."""
+    ensure_version_table(cursor)
+    for migration in pending(migrations, applied_versions(cursor)):
+        _record(cursor, migration)
+
+# --- Plan check ---
+
+# A page past the first one, so the plans include the keyset seek predicate
+_SAMPLE_PAGE = PageParams(20, ("2024-01-01 00:00:00.000000", "00000000-0000-0000-0000-000000000000"))
+_SAMPLE_SEQ_PAGE = PageParams(20, (1,))
+_SAMPLE_ID = "00000000-0000-0000-0000-000000000000"
+
+def hot_queries() -> dict[str, str]:
+    """The listing queries the API runs on every page view, by name."""
+    return {
+        "feed": post_crud._feed_query(_SAMPLE_PAGE)[0],
+        "posts_by_author": post_crud._posts_by_author_query(_SAMPLE_ID, _SAMPLE_PAGE)[0],
+        "posts_liked_by_user": post_crud._posts_liked_by_user_query(_SAMPLE_ID, _SAMPLE_PAGE)[0],
+        "home_timeline": post_crud._home_timeline_query(_SAMPLE_ID, _SAMPLE_PAGE)[0],
+        "comments_page": post_crud._comments_page_query(_SAMPLE_ID, _SAMPLE_PAGE)[0],
+        "comment_previews": post_crud._comment_previews_query([_SAMPLE_ID] * 20)[0],
+        "notifications": notification_crud._notifications_query(_SAMPLE_ID, _SAMPLE_SEQ_PAGE)[0],
+        "unread_count": notification_crud._UNREAD_COUNT_SQL,
+        "suggestions": suggestion_crud._USER_SUGGESTIONS_SQL,
+        "popular_suggestions": suggestion_crud._POPULAR_SQL,
+    }
+
+def full_scans(cursor, name: str, sql: str) -> list[str]:
+    """EXPLAIN PLANs `sql` (binds stay unbound) and returns the tables it reads
+    with TABLE ACCESS FULL."""
+    statement_id = f"migrate_{name}"[:30]
+    cursor.execute("DELETE FROM plan_table WHERE statement_id = :1", (statement_id,))
+    cursor.execute(f"EXPLAIN PLAN SET STATEMENT_ID = '{statement_id}' FOR {sql}")
+    cursor.execute(
+        """
+        SELECT object_name FROM plan_table
+        WHERE statement_id = :1 AND operation = 'TABLE ACCESS' AND options = 'FULL'
+        ORDER BY id
+        """,
+        (statement_id,),
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+def check_plans(conn) -> dict[str, list[str]]:
+    """Returns {query name: [fully scanned tables]} for the queries that have any.
+    Plans depend on optimizer statistics: run against realistic data."""
+    cursor = conn.cursor()
+    found = {}
+    for name, sql in hot_queries().items():
+        tables = full_scans(cursor, name, sql)
+        print(f"  {name}: {'FULL SCAN of ' + ', '.join(tables) if tables else 'ok'}")
+        if tables:
+            found[name] = tables
+    conn.rollback()
+    cursor.close()
+    return found
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply pending schema migrations")
+    parser.add_argument("--status", action="store_true", help="List migrations and exit")
+    parser.add_argument("--check-plans", action="store_true",
+                        help="Report hot queries whose plan full-scans a table (exit code 1 if any)")
+    args = parser.parse_args()
+
+    print(f"Connecting to database: {settings.DB_DSN}")
+    try:
+        conn = oracledb.connect(
+            user=settings.DB_USER,
+            password=settings.DB_PASSWORD,
+            dsn=settings.DB_DSN
+        )
+        print("Connected successfully.")
+
+        if args.status:
+            cursor = conn.cursor()
+            ensure_version_table(cursor)
+            applied = applied_versions(cursor)
+            for migration in MIGRATIONS:
+                state = "applied" if migration.version in applied else "pending"
+                print(f"  {migration.version:>4} {migration.name:<30} {state}")
+            cursor.close()
+        elif args.check_plans:
+            print("Checking query plans...")
+            if check_plans(conn):
+                conn.close()
+                sys.exit(1)
+        else:
+            done = apply(conn)
+            print(f"Applied {len(done)} migration(s)." if done else "Schema is up to date.")
+        conn.close()
+
+    except Exception as e:
+        print(f"Error: {e}")
+        # Deploy scripts rely on the exit status
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""Schema changes, in the order they are applied by app/migrate.py.
+
+Versions only ever go forward: to change something that already shipped, add
+a new migration. A step is either a SQL statement or a function taking the
+cursor (for data backfills). DDL commits implicitly in Oracle, so a migration
+that fails halfway is not rolled back; steps are written so that re-running
+them is harmless ("already exists" errors are skipped by the runner).
+
+The first migrations bring a database created by the original init_db (six
+tables, no secondary indexes) up to the schema init_db creates today, which
+records every version below as applied.
+"""
+from typing import Callable, NamedTuple, Union
+from app.crud import counters as counters_crud
+from app.crud import suggestion as suggestion_crud
+from app.crud import timeline as timeline_crud
+
+Step = Union[str, Callable]
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    steps: list[Step]
+
+def _reconcile_counters(cursor):
+    counters_crud.reconcile_post_counters(cursor)
+    counters_crud.reconcile_user_counters(cursor)
+
+# Short existing content moves inline. 1000 characters are at most 4000 bytes in
+# AL32UTF8, so the VARCHAR2 can't overflow; longer text stays in the CLOB, which
+# join_content() reads just the same.
+_INLINE_CONTENT_SQL = """
+    UPDATE {table} SET content_text = DBMS_LOB.SUBSTR(content, 1000, 1), content = NULL
+    WHERE content_text IS NULL AND content IS NOT NULL AND DBMS_LOB.GETLENGTH(content) <= 1000
+"""
+
+MIGRATIONS = [
+    Migration(1, "listing_indexes", [
+        # Keyset listings: WHERE <owner> = :x ORDER BY created_at DESC, id DESC
+        "CREATE INDEX ix_posts_created ON posts (created_at, id)",
+        "CREATE INDEX ix_posts_author_created ON posts (author_id, created_at, id)",
+        "CREATE INDEX ix_likes_user_created ON likes (user_id, created_at, id)",
+        "CREATE INDEX ix_comments_post_created ON comments (post_id, created_at, id)",
+        "CREATE INDEX ix_notif_user_created ON notifications (user_id, created_at, id)",
+        "CREATE INDEX ix_follows_following ON follows (following_id, follower_id)",
+    ]),
+    Migration(2, "foreign_key_indexes", [
+        # Like counts by post and ON DELETE CASCADE from posts/comments
+        "CREATE INDEX ix_likes_post ON likes (post_id)",
+        "CREATE INDEX ix_notif_post ON notifications (post_id)",
+        "CREATE INDEX ix_notif_comment ON notifications (comment_id)",
+    ]),
+    Migration(3, "counter_columns", [
+        "ALTER TABLE users ADD (follower_count NUMBER DEFAULT 0 NOT NULL)",
+        "ALTER TABLE users ADD (following_count NUMBER DEFAULT 0 NOT NULL)",
+        "ALTER TABLE users ADD (post_count NUMBER DEFAULT 0 NOT NULL)",
+        "ALTER TABLE users ADD (session_version NUMBER DEFAULT 0 NOT NULL)",
+        "ALTER TABLE posts ADD (like_count NUMBER DEFAULT 0 NOT NULL)",
+        "ALTER TABLE posts ADD (comment_count NUMBER DEFAULT 0 NOT NULL)",
+        _reconcile_counters,
+    ]),
+    Migration(4, "timelines", [
+        """
+        CREATE TABLE timelines (
+            user_id VARCHAR2(36) NOT NULL,
+            post_id VARCHAR2(36) NOT NULL,
+            author_id VARCHAR2(36) NOT NULL,
+            created_at TIMESTAMP NOT NULL,
+            PRIMARY KEY (user_id, post_id),
+            CONSTRAINT fk_timeline_user FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+            CONSTRAINT fk_timeline_post FOREIGN KEY (post_id) REFERENCES posts(id) ON DELETE CASCADE
+        )""",
+        "CREATE INDEX ix_timelines_user_created ON timelines (user_id, created_at, post_id)",
+        "CREATE INDEX ix_timelines_user_author ON timelines (user_id, author_id)",
+        "CREATE INDEX ix_timelines_post ON timelines (post_id)",
+        timeline_crud.rebuild,
+    ]),
+    Migration(5, "cache_invalidations", [
+        """
+        CREATE TABLE cache_invalidations (
+            id NUMBER GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+            cache_name VARCHAR2(50) NOT NULL,
+            cache_key VARCHAR2(255) NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )""",
+        "CREATE INDEX ix_cache_inval_created ON cache_invalidations (created_at)",
+    ]),
+    Migration(6, "inline_content", [
+        "ALTER TABLE posts ADD (content_text VARCHAR2(4000))",
+        "ALTER TABLE comments ADD (content_text VARCHAR2(4000))",
+        "ALTER TABLE comments MODIFY (content NULL)",
+        _INLINE_CONTENT_SQL.format(table="posts"),
+        _INLINE_CONTENT_SQL.format(table="comments"),
+    ]),
+    Migration(7, "notification_outbox", [
+        """
+        CREATE TABLE notification_outbox (
+            id VARCHAR2(36) PRIMARY KEY NOT NULL,
+            type VARCHAR2(20) NOT NULL,
+            user_id VARCHAR2(36) NOT NULL,
+            creator_id VARCHAR2(36) NOT NULL,
+            post_id VARCHAR2(36),
+            comment_id VARCHAR2(36),
+            group_key VARCHAR2(120),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )""",
+    ]),
+    Migration(8, "notification_coalescing", [
+        "ALTER TABLE notifications ADD (group_key VARCHAR2(120))",
+        "ALTER TABLE notifications ADD (actor_count NUMBER DEFAULT 1 NOT NULL)",
+        "ALTER TABLE notifications ADD (recent_actor_ids VARCHAR2(400))",
+        "UPDATE notifications SET recent_actor_ids = creator_id WHERE recent_actor_ids IS NULL",
+        "ALTER TABLE notifications MODIFY (recent_actor_ids NOT NULL)",
+        # Existing rows keep a NULL group_key: history isn't merged retroactively
+        "CREATE UNIQUE INDEX ux_notif_group ON notifications (group_key)",
+    ]),
+    Migration(9, "notification_read_indexes", [
+        # Unread badge count, and recent-notification polling for PUSH_BROKER=database
+        "CREATE INDEX ix_notif_user_unread ON notifications (user_id, read_status)",
+        "CREATE INDEX ix_notif_created ON notifications (created_at)",
+    ]),
+    Migration(10, "follow_suggestions", [
+        """
+        CREATE TABLE follow_suggestions (
+            user_id VARCHAR2(36) NOT NULL,
+            suggested_id VARCHAR2(36) NOT NULL,
+            mutual_count NUMBER NOT NULL,
+            position NUMBER NOT NULL,
+            computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (user_id, suggested_id),
+            CONSTRAINT fk_suggestion_user FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+            CONSTRAINT fk_suggestion_suggested FOREIGN KEY (suggested_id) REFERENCES users(id) ON DELETE CASCADE
+        )""",
+        # Popular accounts for anonymous and fallback suggestions
+        "CREATE INDEX ix_users_follower_count ON users (follower_count)",
+        # ON DELETE CASCADE from users, and the freshness check
+        "CREATE INDEX ix_suggestions_suggested ON follow_suggestions (suggested_id)",
+        "CREATE INDEX ix_suggestions_computed ON follow_suggestions (computed_at)",
+        suggestion_crud.refresh,
+    ]),
+    Migration(11, "notification_actors", [
+        """
+        CREATE TABLE notification_actors (
+            group_key VARCHAR2(120) NOT NULL,
+            actor_id VARCHAR2(36) NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (group_key, actor_id)
+        )""",
+        "CREATE INDEX ix_notif_actors_created ON notification_actors (created_at)",
+        # Open groups only know their latest actor; earlier ones may be counted once more
+        """
+        INSERT INTO notification_actors (group_key, actor_id)
+        SELECT group_key, creator_id FROM notifications n
+        WHERE group_key IS NOT NULL
+          AND NOT EXISTS (
+              SELECT 1 FROM notification_actors a WHERE a.group_key = n.group_key AND a.actor_id = n.creator_id
+          )""",
+    ]),
+    Migration(12, "notification_seq", [
+        "CREATE SEQUENCE notification_seq",
+        "ALTER TABLE notifications ADD (seq NUMBER)",
+        # Existing rows keep their created_at order, below every value the sequence hands out
+        """
+        MERGE INTO notifications n
+        USING (
+            SELECT id, ROW_NUMBER() OVER (ORDER BY created_at, id) - COUNT(*) OVER () AS seq
+            FROM notifications WHERE seq IS NULL
+        ) s
+        ON (n.id = s.id)
+        WHEN MATCHED THEN UPDATE SET n.seq = s.seq""",
+        "ALTER TABLE notifications MODIFY (seq DEFAULT notification_seq.NEXTVAL NOT NULL)",
+        "CREATE INDEX ix_notif_user_seq ON notifications (user_id, seq)",
+    ]),
+]
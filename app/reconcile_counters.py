@@ -0,0 +1,36 @@
+import sys
+import os
+
+# Add backend directory to python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.core.database import get_db_connection
+from app.repository import counters as counters_crud
+
+def reconcile_counters():
+    print(f"Connecting to database: {settings.SQLITE_PATH if settings.DB_BACKEND == 'sqlite' else settings.DB_DSN}")
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        print("Connected successfully.")
+
+        print("Recomputing post counters...")
+        fixed_posts = counters_crud.reconcile_post_counters(cursor)
+        print(f"Repaired {fixed_posts} post(s)")
+
+        print("Recomputing user counters...")
+        fixed_users = counters_crud.reconcile_user_counters(cursor)
+        print(f"Repaired {fixed_users} user(s)")
+
+        conn.commit()
+        cursor.close()
+        conn.close()
+
+    except Exception as e:
+        print(f"Error: {e}")
+        # Callers rely on the exit status
+        sys.exit(1)
+
+if __name__ == "__main__":
+    reconcile_counters()
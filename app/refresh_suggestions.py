@@ -0,0 +1,30 @@
+import sys
+import os
+
+# Add backend directory to python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import repository
+from app.core.config import settings
+from app.core.database import get_db_connection
+
+def refresh_suggestions():
+    print(f"Connecting to database: {settings.SQLITE_PATH if settings.DB_BACKEND == 'sqlite' else settings.DB_DSN}")
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        print("Connected successfully.")
+
+        print("Recomputing follow suggestions...")
+        written = repository.suggestion.refresh(cursor)
+        print(f"Stored {written} suggestion(s)")
+
+        conn.commit()
+        cursor.close()
+        conn.close()
+
+    except Exception as e:
+        print(f"Error: {e}")
+
+if __name__ == "__main__":
+    refresh_suggestions()
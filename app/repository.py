@@ -0,0 +1,18 @@
+"""Data-access modules for the configured storage backend.
+
+The modules in app/crud are the Oracle implementation; app/crud/sqlite has the
+same public functions, with the same signatures and return shapes, over the
+embedded SQLite schema (test/test_repository.py keeps the two in step).
+Endpoints and core modules import from here, so DB_BACKEND alone decides
+which one serves a process:
+
+    from app.repository import post as post_crud
+"""
+from app.core.config import settings
+
+if settings.DB_BACKEND == "sqlite":
+    from app.crud.sqlite import counters, export, notification, notification_delivery, post, suggestion, timeline, user
+else:
+    from app.crud import counters, export, notification, notification_delivery, post, suggestion, timeline, user
+
+MODULES = ("counters", "export", "notification", "notification_delivery", "post", "suggestion", "timeline", "user")
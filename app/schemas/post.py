@@ -1,10 +1,11 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List
+from app.core.config import settings
 from .user import UserOut
 
 class PostCreate(BaseModel):
-    content: str
+    content: str = Field(max_length=settings.CONTENT_MAX_CHARS)
     image: Optional[str] = None
 
 class CommentCreate(BaseModel):
-    content: str
\ No newline at end of file
+    content: str = Field(max_length=settings.CONTENT_MAX_CHARS)
\ No newline at end of file
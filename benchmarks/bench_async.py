@@ -0,0 +1,82 @@
+"""Sync (threadpool) vs async data path for the feed query.
+
+Runs the same number of concurrent feed reads two ways, the way FastAPI would
+serve them: sync get_feed on the anyio threadpool, and get_feed_async on the
+event loop. Needs a reachable database configured through .env.
+
+    python -m benchmarks.bench_async --requests 2000 --concurrency 500
+"""
+import argparse
+import asyncio
+import time
+
+import anyio
+from anyio import to_thread
+
+from app.core.config import settings
+from app.core.database import (
+    init_pool, close_pool, init_async_pool, close_async_pool, get_db_connection, get_async_db_connection,
+)
+from app.core.pagination import PageParams, DEFAULT_PAGE_SIZE
+from app.crud import post as post_crud
+
+FIRST_PAGE = PageParams(DEFAULT_PAGE_SIZE, None)
+
+def _sync_feed():
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        post_crud.get_feed(cursor, FIRST_PAGE)
+        cursor.close()
+    finally:
+        conn.close()
+
+async def _async_feed():
+    conn = await get_async_db_connection()
+    try:
+        cursor = conn.cursor()
+        await post_crud.get_feed_async(cursor, FIRST_PAGE)
+        cursor.close()
+    finally:
+        await conn.close()
+
+async def _run(label, call, requests, concurrency):
+    gate = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with gate:
+            start = time.perf_counter()
+            await call()
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+    print(f"{label:<6} {requests / elapsed:8.1f} req/s   p50 {p50:7.1f} ms   p99 {p99:7.1f} ms")
+
+async def main(requests, concurrency):
+    to_thread.current_default_thread_limiter().total_tokens = settings.DB_POOL_MAX
+    init_pool()
+    init_async_pool()
+    try:
+        # Warm both pools so connection setup isn't measured
+        await _run("warmup", _async_feed, settings.DB_POOL_MAX, settings.DB_POOL_MAX)
+        await _run("warmup", lambda: to_thread.run_sync(_sync_feed), settings.DB_POOL_MAX, settings.DB_POOL_MAX)
+
+        await _run("sync", lambda: to_thread.run_sync(_sync_feed), requests, concurrency)
+        await _run("async", _async_feed, requests, concurrency)
+    finally:
+        await close_async_pool()
+        close_pool()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=500)
+    args = parser.parse_args()
+    anyio.run(main, args.requests, args.concurrency)
@@ -0,0 +1,61 @@
+"""Cost of serializing feed pages: FastAPI's default path vs render_json.
+
+Builds posts (each with comment previews) from synthetic rows through the same
+formatters the endpoints use, checks both paths produce identical bytes, and
+reports the time per 1k posts. No database needed.
+
+    python -m benchmarks.bench_serialization --posts 1000 --rounds 50
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.core.http_cache import render_json
+from app.crud import post as post_crud
+
+def _rows(count):
+    base = datetime(2025, 1, 1, 12, 0, 0, 123456)
+    post_rows, comment_rows = [], []
+    for i in range(count):
+        post_id = f"post-{i:06d}"
+        post_rows.append((
+            post_id, f"Post number {i} — with some non-ASCII text ✓", None, base - timedelta(seconds=i),
+            f"user-{i % 50}", f"User {i % 50}", f"user{i % 50}", None, i % 17, 3, None,
+        ))
+        for j in range(3):
+            comment_rows.append((
+                f"comment-{i}-{j}", f"Comment {j}", base - timedelta(seconds=i, milliseconds=j), post_id,
+                f"user-{j}", f"User {j}", f"user{j}", None, None,
+            ))
+    return post_rows, comment_rows
+
+def _default_path(data) -> bytes:
+    return JSONResponse(jsonable_encoder(data)).body
+
+def _measure(label, render, data, rounds, per):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        render(data)
+    elapsed = (time.perf_counter() - start) / rounds
+    print(f"{label:<10} {elapsed * 1000 * 1000 / per:8.2f} ms per 1k posts")
+
+def main(posts, rounds):
+    post_rows, comment_rows = _rows(posts)
+    data = {
+        "posts": post_crud._format_posts(post_rows, post_crud._group_comments(comment_rows)),
+        "nextCursor": None,
+    }
+    assert render_json(data) == _default_path(data), "fast path output differs from JSONResponse"
+
+    _measure("default", _default_path, data, rounds, posts)
+    _measure("fast", render_json, data, rounds, posts)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--posts", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+    main(args.posts, args.rounds)
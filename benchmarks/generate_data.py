@@ -0,0 +1,236 @@
+"""Seeded synthetic dataset with power-law shape, bulk-loaded into the database.
+
+Popularity follows a Zipf distribution everywhere it does in real social data:
+a few celebrity accounts get most follows and post most often, a few viral
+posts get most likes, and comment threads are concentrated on a few posts
+(some of them long). Ids and choices derive from the seed and the row's
+position (timestamps are relative to now), so the same arguments produce the
+same data, load_test.py can address users and posts without querying for them,
+and re-running a load skips rows that are already there.
+
+Rows go through app.bulk_import (executemany batches, constraints off during
+the load, counters, timelines and follow suggestions recomputed at the end).
+Load into a schema created by init_db, or with DB_BACKEND=sqlite into
+SQLITE_PATH, whose schema is created on first use. Every user's password is
+PASSWORD.
+
+    python -m benchmarks.generate_data --users 100000 --posts 1000000 --seed 42
+"""
+import argparse
+import bisect
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from app import bulk_import
+from app.core.config import settings
+from app.core.database import get_db_connection
+from app.core.security import get_password_hash
+
+PASSWORD = "benchmark-password"
+
+_NAMESPACE = uuid.UUID("6f1c1d3e-0c1a-4c7e-9a57-3b9d1d7b2a10")
+
+_WORDS = (
+    "the a to and of in is it you that for on with this was are be at have not "
+    "just so great new today love what time think really day post people good "
+    "why here more about when now one like all out get can make see know"
+).split()
+
+def entity_id(kind: str, index: int) -> str:
+    return str(uuid.uuid5(_NAMESPACE, f"{kind}:{index}"))
+
+def username(index: int) -> str:
+    return f"user{index}"
+
+class Zipf:
+    """Samples indexes 0..n-1 with P(i) proportional to 1 / (i + 1) ** alpha:
+    index 0 is the most popular."""
+
+    def __init__(self, n: int, alpha: float):
+        self.cumulative = []
+        total = 0.0
+        for i in range(n):
+            total += 1.0 / (i + 1) ** alpha
+            self.cumulative.append(total)
+
+    def sample(self, rng: random.Random) -> int:
+        return bisect.bisect_left(self.cumulative, rng.random() * self.cumulative[-1])
+
+class Dataset:
+    def __init__(self, users: int = 10_000, posts: int = 100_000, follows_per_user: int = 50,
+                 likes: int = 500_000, comments: int = 200_000, days: int = 90,
+                 alpha: float = 1.1, seed: int = 42):
+        self.n_users = users
+        self.n_posts = posts
+        self.follows_per_user = follows_per_user
+        self.n_likes = likes
+        self.n_comments = comments
+        self.seed = seed
+        self.end = datetime.utcnow().replace(microsecond=0)
+        self.start = self.end - timedelta(days=days)
+        self.user_rank = Zipf(users, alpha)
+        self.post_rank = Zipf(posts, alpha)
+        # Threads are more concentrated than likes
+        self.thread_rank = Zipf(posts, alpha + 0.3)
+        self.password_hash = get_password_hash(PASSWORD)  # one bcrypt for everyone
+        self._post_authors: list[int] | None = None
+        self._post_times: list[datetime] | None = None
+
+    def _rng(self, table: str) -> random.Random:
+        # One independent stream per table, so each can be replayed on its own
+        return random.Random(f"{self.seed}:{table}")
+
+    def _text(self, rng: random.Random, long_ratio: float = 0.01) -> str:
+        # Mostly short; now and then long enough to overflow into the CLOB
+        count = rng.randint(800, 1500) if rng.random() < long_ratio else rng.randint(3, 40)
+        return " ".join(rng.choice(_WORDS) for _ in range(count))
+
+    def _after(self, rng: random.Random, moment: datetime) -> datetime:
+        # Interactions cluster in the hours after a post, bounded by "now"
+        return min(self.end, moment + timedelta(seconds=rng.expovariate(1 / 7200)))
+
+    def _index_posts(self):
+        if self._post_authors is None:
+            rng = self._rng("posts")
+            span = (self.end - self.start).total_seconds()
+            self._post_authors, self._post_times = [], []
+            for _ in range(self.n_posts):
+                self._post_authors.append(self.user_rank.sample(rng))
+                self._post_times.append(self.start + timedelta(seconds=rng.random() * span))
+
+    def users(self):
+        rng = self._rng("users")
+        for i in range(self.n_users):
+            yield {
+                "id": entity_id("user", i),
+                "email": f"{username(i)}@example.com",
+                "username": username(i),
+                "password_hash": self.password_hash,
+                "name": f"User {i}",
+                "bio": self._text(rng, long_ratio=0)[:1000],
+                "created_at": self.start,
+            }
+
+    def posts(self):
+        self._index_posts()
+        rng = self._rng("post-text")  # author and time come from _index_posts
+        for i in range(self.n_posts):
+            yield {
+                "id": entity_id("post", i),
+                "author_id": entity_id("user", self._post_authors[i]),
+                "content": self._text(rng),
+                "created_at": self._post_times[i],
+            }
+
+    def follows(self):
+        """Each user follows ~follows_per_user accounts (exponentially spread),
+        picked by popularity."""
+        rng = self._rng("follows")
+        for follower in range(self.n_users):
+            count = min(self.n_users - 1, int(rng.expovariate(1 / self.follows_per_user)))
+            targets = set()
+            for _ in range(count * 3):  # popular targets repeat; don't loop forever
+                if len(targets) >= count:
+                    break
+                target = self.user_rank.sample(rng)
+                if target != follower:
+                    targets.add(target)
+            for target in sorted(targets):
+                yield {
+                    "follower_id": entity_id("user", follower),
+                    "following_id": entity_id("user", target),
+                    "created_at": self.start,
+                }
+
+    def likes(self):
+        """Viral posts by rank; a repeated (user, post) pair is skipped by the loader."""
+        self._index_posts()
+        rng = self._rng("likes")
+        for i in range(self.n_likes):
+            post = self.post_rank.sample(rng)
+            yield {
+                "id": entity_id("like", i),
+                "user_id": entity_id("user", rng.randrange(self.n_users)),
+                "post_id": entity_id("post", post),
+                "created_at": self._after(rng, self._post_times[post]),
+                "_recipient": self._post_authors[post],
+            }
+
+    def comments(self):
+        self._index_posts()
+        rng = self._rng("comments")
+        for i in range(self.n_comments):
+            post = self.thread_rank.sample(rng)
+            yield {
+                "id": entity_id("comment", i),
+                "author_id": entity_id("user", rng.randrange(self.n_users)),
+                "post_id": entity_id("post", post),
+                "content": self._text(rng),
+                "created_at": self._after(rng, self._post_times[post]),
+                "_recipient": self._post_authors[post],
+            }
+
+    def _events(self):
+        for like in self.likes():
+            yield ("LIKE", entity_id("user", like["_recipient"]), like["user_id"],
+                   like["post_id"], None, like["created_at"])
+        for comment in self.comments():
+            yield ("COMMENT", entity_id("user", comment["_recipient"]), comment["author_id"],
+                   comment["post_id"], comment["id"], comment["created_at"])
+        for follow in self.follows():
+            yield ("FOLLOW", follow["following_id"], follow["follower_id"], None, None, follow["created_at"])
+
+    def notifications(self):
+        """One per like, comment and follow on someone else, addressed like the app would."""
+        for n, (type_n, user_id, creator_id, post_id, comment_id, created_at) in enumerate(self._events()):
+            if user_id == creator_id:
+                continue
+            yield {
+                "id": entity_id("notification", n),
+                "user_id": user_id,
+                "creator_id": creator_id,
+                "type": type_n,
+                # Anything older than a day has been seen
+                "read_status": 1 if created_at < self.end - timedelta(days=1) else 0,
+                "post_id": post_id,
+                "comment_id": comment_id,
+                "created_at": created_at,
+            }
+
+    def sources(self, tables: list[str] | None = None) -> list[tuple[str, object]]:
+        return [(t, getattr(self, t)()) for t in bulk_import.TABLES if not tables or t in tables]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--posts", type=int, default=100_000)
+    parser.add_argument("--follows-per-user", type=int, default=50)
+    parser.add_argument("--likes", type=int, default=500_000)
+    parser.add_argument("--comments", type=int, default=200_000)
+    parser.add_argument("--days", type=int, default=90, help="Spread of post timestamps")
+    parser.add_argument("--alpha", type=float, default=1.1, help="Zipf exponent (higher = more skew)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--tables", help="Comma-separated subset of: " + ", ".join(bulk_import.TABLES))
+    args = parser.parse_args()
+
+    dataset = Dataset(args.users, args.posts, args.follows_per_user, args.likes, args.comments,
+                      args.days, args.alpha, args.seed)
+    print(f"Connecting to database: {settings.SQLITE_PATH if settings.DB_BACKEND == 'sqlite' else settings.DB_DSN}")
+    try:
+        conn = get_db_connection()
+        start = time.perf_counter()
+        results = bulk_import.load(conn, dataset.sources(args.tables.split(",") if args.tables else None),
+                                   args.batch_size)
+        print(f"Generated {sum(results.values())} rows in {time.perf_counter() - start:.1f}s")
+        conn.close()
+    except Exception as e:
+        print(f"Error: {e}")
+        # Callers rely on the exit status
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""HTTP load test against a running server, with per-endpoint latency percentiles.
+
+Concurrent httpx clients log in as users of a generate_data.py dataset (pass
+the same --users/--posts/--seed/--alpha) and issue a weighted mix of the read
+endpoints for --duration seconds, picking popular profiles and viral posts as
+often as real traffic would. Results (p50/p95/p99, mean, max, throughput and
+errors per endpoint) are written to --output as JSON; --compare prints the
+change against an earlier result file.
+
+    uvicorn app.main:app --workers 4 &
+    python -m benchmarks.load_test --concurrency 100 --duration 60 --output results.json
+    python -m benchmarks.load_test --concurrency 100 --duration 60 --compare results.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+
+import httpx
+
+from benchmarks.generate_data import PASSWORD, Zipf, entity_id, username
+
+API = "/api/v1"
+
+# name: (weight, needs a token, path for a popular user index and a viral post index)
+SCENARIOS = {
+    "feed": (30, False, lambda user, post: f"{API}/posts/"),
+    "home_timeline": (20, True, lambda user, post: f"{API}/posts/timeline"),
+    "profile": (15, False, lambda user, post: f"{API}/users/{username(user)}"),
+    "user_posts": (10, False, lambda user, post: f"{API}/users/{entity_id('user', user)}/posts"),
+    "comments": (10, False, lambda user, post: f"{API}/posts/{entity_id('post', post)}/comments"),
+    "notifications": (10, True, lambda user, post: f"{API}/notifications/"),
+    "unread_count": (5, True, lambda user, post: f"{API}/notifications/unread-count"),
+}
+
+def percentile(values: list[float], p: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not values:
+        return 0.0
+    rank = max(1, min(len(values), math.ceil(p / 100 * len(values))))
+    return values[rank - 1]
+
+def summarize(latencies: list[float], errors: int, seconds: float) -> dict:
+    values = sorted(latencies)
+    return {
+        "requests": len(values),
+        "errors": errors,
+        "throughput_rps": round(len(values) / seconds, 1) if seconds else 0.0,
+        "p50_ms": round(percentile(values, 50) * 1000, 2),
+        "p95_ms": round(percentile(values, 95) * 1000, 2),
+        "p99_ms": round(percentile(values, 99) * 1000, 2),
+        "mean_ms": round(sum(values) / len(values) * 1000, 2) if values else 0.0,
+        "max_ms": round(values[-1] * 1000, 2) if values else 0.0,
+    }
+
+async def _login(client: httpx.AsyncClient, user: int) -> str:
+    response = await client.post(f"{API}/auth/token", data={"username": username(user), "password": PASSWORD})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+async def run(base_url: str, concurrency: int, duration: float, users: int, posts: int,
+              logins: int, alpha: float, seed: int) -> dict:
+    rng = random.Random(seed)
+    user_rank, post_rank = Zipf(users, alpha), Zipf(posts, alpha)
+    names = list(SCENARIOS)
+    weights = [SCENARIOS[name][0] for name in names]
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        # Logins are bcrypt-bound; do them up front so they aren't measured
+        me = rng.sample(range(users), min(logins, users))
+        tokens = await asyncio.gather(*(_login(client, user) for user in me))
+
+        async def worker(worker_rng: random.Random, deadline: float):
+            while time.perf_counter() < deadline:
+                name = worker_rng.choices(names, weights)[0]
+                _, authenticated, path = SCENARIOS[name]
+                token = worker_rng.choice(tokens)
+                url = path(user_rank.sample(worker_rng), post_rank.sample(worker_rng))
+                headers = {"Authorization": f"Bearer {token}"} if authenticated else {}
+                start = time.perf_counter()
+                try:
+                    response = await client.get(url, headers=headers)
+                    failed = response.status_code >= 400
+                except httpx.HTTPError:
+                    failed = True
+                if failed:
+                    errors[name] += 1
+                else:
+                    latencies[name].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        deadline = start + duration
+        await asyncio.gather(*(worker(random.Random(rng.random()), deadline) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    every = [latency for values in latencies.values() for latency in values]
+    return {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "base_url": base_url, "concurrency": concurrency, "duration": duration,
+            "users": users, "posts": posts, "logins": logins, "alpha": alpha, "seed": seed,
+        },
+        "endpoints": {name: summarize(latencies[name], errors[name], elapsed) for name in names},
+        "total": summarize(every, sum(errors.values()), elapsed),
+    }
+
+def compare(current: dict, previous: dict) -> list[str]:
+    """One line per endpoint: metric now, and the change from `previous` in %."""
+    lines = []
+    rows = {**current["endpoints"], "total": current["total"]}
+    before = {**previous.get("endpoints", {}), "total": previous.get("total", {})}
+    for name, stats in rows.items():
+        cells = []
+        for metric in ("p50_ms", "p95_ms", "p99_ms", "throughput_rps"):
+            old = before.get(name, {}).get(metric)
+            change = f" ({(stats[metric] - old) / old * 100:+.0f}%)" if old else ""
+            cells.append(f"{metric} {stats[metric]:>8}{change:<8}")
+        lines.append(f"{name:<14} " + "  ".join(cells))
+    return lines
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=30, help="Seconds of load")
+    parser.add_argument("--logins", type=int, default=50, help="Distinct users to log in as")
+    parser.add_argument("--users", type=int, default=10_000, help="Dataset size, as generated")
+    parser.add_argument("--posts", type=int, default=100_000, help="Dataset size, as generated")
+    parser.add_argument("--alpha", type=float, default=1.1)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="Earlier JSON result to compare against")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args.base_url, args.concurrency, args.duration, args.users, args.posts,
+                             args.logins, args.alpha, args.seed))
+    previous = {}
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            previous = json.load(f)
+    for line in compare(result, previous):
+        print(line)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,14 @@
 # backend/tests/conftest.py
+import os
+import tempfile
+# Run against a throwaway embedded database unless DB_BACKEND=oracle is set
+os.environ.setdefault("DB_BACKEND", "sqlite")
+os.environ.setdefault("SQLITE_PATH", os.path.join(tempfile.mkdtemp(), "test.db"))
+# Tests read their own writes through the feed; don't serve micro-cached pages
+os.environ.setdefault("FEED_MICROCACHE_TTL_SECONDS", "0")
+# Suggestions are refreshed explicitly by the tests that need them
+os.environ.setdefault("SUGGESTIONS_REFRESH_SECONDS", "0")
+
 import pytest
 from fastapi.testclient import TestClient
 from app.main import app
@@ -10,12 +20,7 @@ def client():
     with TestClient(app) as c:
         yield c
 
-@pytest.fixture(scope="module")
-def random_user(client):
-    """
-    Registers a random user and returns the credentials + token.
-    This runs once per module.
-    """
+def _register_and_login(client):
     unique_id = str(uuid.uuid4())[:8]
     username = f"user_{unique_id}"
     email = f"user_{unique_id}@test.com"
@@ -45,4 +50,21 @@ def random_user(client):
         "password": password,
         "token": token,
         "headers": {"Authorization": f"Bearer {token}"}
-    }
\ No newline at end of file
+    }
+
+@pytest.fixture(scope="module")
+def random_user(client):
+    """
+    Registers a random user and returns the credentials + token.
+    This runs once per module.
+    """
+    return _register_and_login(client)
+
+@pytest.fixture(scope="module")
+def other_user(client):
+    """A second registered user, for follow/notification scenarios."""
+    return _register_and_login(client)
+
+@pytest.fixture(scope="module")
+def third_user(client):
+    return _register_and_login(client)
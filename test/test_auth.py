@@ -1,11 +1,15 @@
 # backend/tests/test_auth.py
 import uuid
+import pytest
+from app.api.v1.endpoints import auth
+from app.core import deps
+from app.core.config import settings
 
 def test_health_check(client):
     # FIXED: Changed URL from /api/v1/health to /health
     response = client.get("/health")
     assert response.status_code == 200
-    assert response.json() == {"status": "ok", "db": "oracle"}
+    assert response.json() == {"status": "ok", "db": settings.DB_BACKEND}
 
 def test_register_duplicate_fail(client, random_user):
     """Try to register the same user created in conftest.py"""
@@ -29,4 +33,47 @@ def test_get_current_user_profile(client, random_user):
 def test_unauthorized_access(client):
     """Try to access /me without a token"""
     response = client.get("/api/v1/auth/me")
-    assert response.status_code == 401
\ No newline at end of file
+    assert response.status_code == 401
+
+@pytest.mark.skipif(settings.DB_BACKEND != "oracle", reason="SQLite connections are not pooled")
+def test_pool_stats(client):
+    response = client.get("/health/pool")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["enabled"] is True
+    assert {"busy", "open", "waits", "timeouts"} <= data.keys()
+
+def test_logout_revokes_token(client, other_user):
+    assert client.get("/api/v1/auth/me", headers=other_user["headers"]).status_code == 200
+    assert client.post("/api/v1/auth/logout", headers=other_user["headers"]).status_code == 200
+    assert client.get("/api/v1/auth/me", headers=other_user["headers"]).status_code == 401
+
+def test_no_connection_is_held_while_hashing(client, monkeypatch):
+    checked_out = []
+    connect = deps.get_async_db_connection
+
+    async def counted_connection():
+        conn = await connect()
+        checked_out.append(conn)
+        close = conn.close
+
+        async def counted_close():
+            checked_out.remove(conn)
+            await close()
+
+        conn.close = counted_close
+        return conn
+
+    hash_password = auth.get_password_hash_async
+
+    async def checked_hash(password):
+        assert checked_out == []
+        return await hash_password(password)
+
+    monkeypatch.setattr(deps, "get_async_db_connection", counted_connection)
+    monkeypatch.setattr(auth, "get_password_hash_async", checked_hash)
+    name = f"hash_{uuid.uuid4().hex[:8]}"
+    res = client.post("/api/v1/auth/register", json={
+        "email": f"{name}@example.com", "username": name, "password": "password123", "name": name,
+    })
+    assert res.status_code == 201
@@ -0,0 +1,41 @@
+# backend/tests/test_benchmarks.py
+import random
+import pytest
+from benchmarks import generate_data
+from benchmarks.generate_data import Dataset, Zipf
+from benchmarks.load_test import percentile, summarize
+
+def test_percentile_nearest_rank():
+    values = [i / 1000 for i in range(1, 101)]  # 1..100 ms
+    assert percentile(values, 50) == 0.05
+    assert percentile(values, 99) == 0.099
+    assert percentile([], 99) == 0.0
+    stats = summarize(values, errors=2, seconds=10)
+    assert stats["requests"] == 100 and stats["errors"] == 2
+    assert stats["p95_ms"] == 95.0 and stats["throughput_rps"] == 10.0
+
+def test_zipf_favours_low_ranks():
+    zipf, rng = Zipf(1000, 1.1), random.Random(1)
+    samples = [zipf.sample(rng) for _ in range(10_000)]
+    assert samples.count(0) > samples.count(999) * 50
+
+def test_dataset_is_deterministic():
+    def build():
+        data = Dataset(users=50, posts=200, follows_per_user=5, likes=300, comments=100, seed=7)
+        return {table: list(records) for table, records in data.sources(["posts", "follows", "notifications"])}
+    first, second = build(), build()
+    assert [p["id"] for p in first["posts"]] == [p["id"] for p in second["posts"]]
+    # Timestamps are relative to now; everything else repeats exactly
+    pairs = lambda rows: [(f["follower_id"], f["following_id"]) for f in rows]
+    assert pairs(first["follows"]) == pairs(second["follows"])
+    assert all(f["follower_id"] != f["following_id"] for f in first["follows"])
+    assert all(n["user_id"] != n["creator_id"] for n in first["notifications"])
+
+def test_generate_data_exits_non_zero_on_failure(monkeypatch):
+    monkeypatch.setattr("sys.argv", ["generate_data", "--users", "2", "--posts", "1"])
+    def refuse():
+        raise RuntimeError("database unavailable")
+    monkeypatch.setattr(generate_data, "get_db_connection", refuse)
+    with pytest.raises(SystemExit) as exc:
+        generate_data.main()
+    assert exc.value.code == 1
@@ -0,0 +1,78 @@
+# backend/tests/test_bulk_import.py
+import json
+import sqlite3
+from datetime import datetime
+import pytest
+from app import bulk_import
+from app.core import sqlite_db
+
+def _dump(tmp_path):
+    with open(tmp_path / "users.jsonl", "w") as f:
+        for i in range(5):
+            f.write(json.dumps({
+                "id": f"u{i}", "email": f"u{i}@example.com", "username": f"user{i}",
+                "password": "$2b$12$hash", "name": f"User {i}", "createdAt": "2024-01-02T03:04:05.678Z",
+            }) + "\n")
+    with open(tmp_path / "posts.csv", "w") as f:
+        f.write("id,authorId,content,image,createdAt\n")
+        for i in range(7):
+            f.write(f"p{i},u{i % 5},Post {i},,2024-02-01T00:00:00Z\n")
+
+def _connect():
+    conn = sqlite_db.connect(":memory:")
+    sqlite_db.create_schema(conn)
+    return conn
+
+def test_loads_json_and_csv_dumps(tmp_path):
+    _dump(tmp_path)
+    conn = _connect()
+
+    results = bulk_import.bulk_import(conn, str(tmp_path), batch_size=2, checkpoint_path=str(tmp_path / "cp.json"))
+
+    assert results == {"users": 5, "posts": 7}
+    row = conn.execute("SELECT author_id, content_text, content, image, created_at FROM posts WHERE id = 'p6'").fetchone()
+    assert row == ("u1", "Post 6", None, None, datetime(2024, 2, 1))
+    assert conn.execute("SELECT password_hash FROM users WHERE id = 'u0'").fetchone() == ("$2b$12$hash",)
+
+def test_resumes_from_checkpoint(tmp_path):
+    _dump(tmp_path)
+    conn = _connect()
+    checkpoint = tmp_path / "cp.json"
+    # A previous run committed the users and the first 4 posts, plus part of
+    # the next batch whose checkpoint was never written
+    bulk_import.bulk_import(conn, str(tmp_path), batch_size=2, checkpoint_path=str(checkpoint), tables=["users"])
+    conn.execute("INSERT INTO posts (id, author_id) VALUES ('p0', 'u0'), ('p1', 'u1'), ('p2', 'u2'), ('p3', 'u3'), ('p4', 'u4')")
+    conn.commit()
+    checkpoint.write_text(json.dumps({"users": 5, "posts": 4}))
+
+    results = bulk_import.bulk_import(conn, str(tmp_path), batch_size=2, checkpoint_path=str(checkpoint))
+
+    assert results == {"users": 0, "posts": 2}
+    assert conn.execute("SELECT COUNT(*) FROM posts").fetchone() == (7,)
+
+def test_reports_unique_violations_that_are_not_reruns(tmp_path):
+    _dump(tmp_path)
+    conn = _connect()
+    bulk_import.bulk_import(conn, str(tmp_path), tables=["users"])
+    # Same email as u0 under a new id: not a row a previous run loaded
+    with open(tmp_path / "users.jsonl", "a") as f:
+        f.write(json.dumps({"id": "u9", "email": "u0@example.com", "username": "user9", "password": "x"}) + "\n")
+
+    with pytest.raises(sqlite3.IntegrityError, match="row 5"):
+        bulk_import.bulk_import(conn, str(tmp_path), batch_size=10, tables=["users"])
+
+def test_main_uses_the_configured_backend(tmp_path, monkeypatch, capsys):
+    _dump(tmp_path)
+    monkeypatch.setattr(bulk_import, "get_db_connection", _connect)
+    monkeypatch.setattr("sys.argv", ["bulk_import", str(tmp_path), "--checkpoint", str(tmp_path / "cp.json")])
+    bulk_import.main()
+    assert "Imported 12 rows" in capsys.readouterr().out
+
+def test_main_exits_non_zero_on_failure(tmp_path, monkeypatch):
+    monkeypatch.setattr("sys.argv", ["bulk_import", str(tmp_path / "missing.jsonl"), "--tables", "users"])
+    def refuse():
+        raise RuntimeError("database unavailable")
+    monkeypatch.setattr(bulk_import, "get_db_connection", refuse)
+    with pytest.raises(SystemExit) as exc:
+        bulk_import.main()
+    assert exc.value.code == 1
@@ -0,0 +1,69 @@
+# backend/tests/test_cache.py
+from app.core import database, invalidation
+from app.core.cache import TTLCache, cache_stats
+from app.core.config import settings
+
+class _RecordingCursor:
+    def __init__(self):
+        self.statements = []
+
+    def execute(self, sql, params=None):
+        self.statements.append(sql)
+
+def test_lru_eviction_keeps_recently_used():
+    cache = TTLCache("test-lru", maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1   # "a" is now most recently used
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("app.core.cache.time.monotonic", lambda: now[0])
+    cache = TTLCache("test-ttl", maxsize=10, ttl=5)
+    cache.set("k", "v")
+    cache.set("short", "v", ttl=1)
+
+    now[0] += 2
+    assert cache.get("k") == "v"
+    assert cache.get("short") is None
+
+    now[0] += 4
+    assert cache.get("k") is None
+    assert cache.stats()["expirations"] == 2
+
+def test_stats_are_registered_by_name():
+    cache = TTLCache("test-stats", maxsize=10, ttl=60)
+    cache.get("missing")
+    cache.set("k", 1)
+    cache.get("k")
+    assert cache_stats()["test-stats"] == {
+        "size": 1, "maxsize": 10, "hits": 1, "misses": 1, "evictions": 0, "expirations": 0,
+    }
+
+def test_publish_evicts_again_after_commit(monkeypatch):
+    monkeypatch.setattr("app.core.invalidation._polling", lambda: False)
+    cache = TTLCache("test-publish", maxsize=10, ttl=60)
+    invalidation.register_handler("test-publish", cache.pop)
+    cursor = object()
+    cache.set("k", "old")
+    invalidation.publish(cursor, "test-publish", "k")
+    assert cache.get("k") is None
+
+    cache.set("k", "old")  # a concurrent reader reloaded before the commit
+    for hook in database.pop_commit_hooks(cursor):
+        hook()
+    assert cache.get("k") is None
+
+def test_publish_writes_no_row_when_polling_is_off(monkeypatch):
+    monkeypatch.setattr(settings, "DB_BACKEND", "oracle")
+    monkeypatch.setattr(settings, "CACHE_INVALIDATION_POLL_SECONDS", 0)
+    invalidation.register_handler("test-no-row", lambda key: None)
+    cursor = _RecordingCursor()
+    invalidation.publish(cursor, "test-no-row", "k")
+    database.pop_commit_hooks(cursor)
+    assert cursor.statements == []
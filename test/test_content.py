@@ -0,0 +1,22 @@
+# backend/tests/test_content.py
+from app.crud.content import split_content, join_content
+
+class _FakeLob:
+    def __init__(self, text):
+        self.text = text
+
+    def read(self):
+        return self.text
+
+def test_short_content_stays_inline():
+    assert split_content("hello") == ("hello", None)
+    assert join_content("hello", None) == "hello"
+
+def test_long_content_overflows_to_clob():
+    text = "é" * 2001  # 4002 bytes in UTF-8, although only 2001 characters
+    assert split_content(text) == (None, text)
+    assert join_content(None, text) == text
+
+def test_join_reads_lob_locators():
+    assert join_content(None, _FakeLob("from lob")) == "from lob"
+    assert join_content(None, None) is None
@@ -0,0 +1,48 @@
+# backend/tests/test_http_cache.py
+import asyncio
+from datetime import date, datetime
+from decimal import Decimal
+from fastapi.responses import JSONResponse
+from fastapi.encoders import jsonable_encoder
+from starlette.requests import Request
+from app.core.cache import SingleFlight
+from app.core.http_cache import make_etag, etag_matches, render_json
+
+def _request(headers):
+    scope = {"type": "http", "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()]}
+    return Request(scope)
+
+def test_etag_is_stable_and_content_sensitive():
+    assert make_etag("feed", [("p1", 3, 0)]) == make_etag("feed", [("p1", 3, 0)])
+    assert make_etag("feed", [("p1", 3, 0)]) != make_etag("feed", [("p1", 4, 0)])
+
+def test_if_none_match_accepts_lists_and_weak_tags():
+    etag = make_etag("x")
+    assert etag_matches(_request({"If-None-Match": f'"other", W/{etag}'}), etag)
+    assert etag_matches(_request({"If-None-Match": "*"}), etag)
+    assert not etag_matches(_request({"If-None-Match": '"other"'}), etag)
+    assert not etag_matches(_request({}), etag)
+
+def test_render_json_matches_default_response():
+    data = {"posts": [{"content": "héllo", "createdAt": datetime(2025, 1, 1, 12, 0, 0, 5)}], "nextCursor": None}
+    assert render_json(data) == JSONResponse(jsonable_encoder(data)).body
+
+def test_render_json_handles_dates_and_decimals_like_jsonable_encoder():
+    data = {"day": date(2025, 1, 2), "count": Decimal("3"), "ratio": Decimal("0.5"), "tags": ("a", "b"), "x": [None, True]}
+    assert render_json(data) == JSONResponse(jsonable_encoder(data)).body
+
+def test_single_flight_shares_one_execution():
+    calls = 0
+
+    async def slow():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls
+
+    async def main():
+        flight = SingleFlight()
+        return await asyncio.gather(*(flight.do("k", slow) for _ in range(5)))
+
+    assert asyncio.run(main()) == [1] * 5
+    assert calls == 1
@@ -0,0 +1,57 @@
+# backend/tests/test_metrics.py
+import logging
+from app.core import instrumentation, metrics
+from app.core.config import settings
+
+def test_metrics_endpoint_reports_queries_and_routes(client, random_user):
+    assert client.get(f"/api/v1/users/{random_user['username']}", headers=random_user["headers"]).status_code == 200
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert 'db_query_duration_seconds_count{query="user.get_profile_by_username"}' in body
+    assert 'db_query_rows_total{query="user.get_profile_by_username"}' in body
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/v1/users/{username}",status="200"}' in body
+    assert 'http_request_db_round_trips_bucket{route="/api/v1/users/{username}",le="+Inf"}' in body
+
+def test_histogram_buckets_are_cumulative():
+    histogram = metrics.Histogram("test_latency_seconds", "Test", ("route",), buckets=(0.1, 1))
+    for value in (0.05, 0.5, 0.5, 5):
+        histogram.observe(("/x",), value)
+    lines = histogram.render()
+    assert 'test_latency_seconds_bucket{route="/x",le="0.1"} 1' in lines
+    assert 'test_latency_seconds_bucket{route="/x",le="1"} 3' in lines
+    assert 'test_latency_seconds_bucket{route="/x",le="+Inf"} 4' in lines
+    assert 'test_latency_seconds_count{route="/x"} 4' in lines
+
+class _FakeCursor:
+    arraysize = 100
+    prefetchrows = 2
+
+    def execute(self, sql, params=None):
+        return self
+
+    def fetchall(self):
+        return [(i,) for i in range(150)]
+
+    def close(self):
+        pass
+
+def list_things(cursor):
+    cursor.execute("SELECT id FROM things")
+    return cursor.fetchall()
+
+def test_statements_are_named_counted_and_logged_when_slow(monkeypatch, caplog):
+    monkeypatch.setattr(settings, "SLOW_QUERY_MS", 1e-9)
+    cursor = instrumentation.InstrumentedCursor(_FakeCursor())
+    stats = instrumentation.RequestStats()
+    token = instrumentation._request_stats.set(stats)
+    try:
+        with caplog.at_level(logging.WARNING, logger="app.core.instrumentation"):
+            assert len(list_things(cursor)) == 150
+            cursor.close()
+    finally:
+        instrumentation._request_stats.reset(token)
+    # execute (first 2 rows) + two more arraysize fetches
+    assert (stats.queries, stats.round_trips) == (1, 3)
+    assert "Slow query test_metrics.list_things" in caplog.text
@@ -0,0 +1,77 @@
+# backend/tests/test_migrations.py
+import inspect
+import re
+import pytest
+from app import init_db, migrate
+from app.migrations import MIGRATIONS, Migration
+
+def test_pending_keeps_order_and_skips_applied():
+    migrations = [Migration(1, "a", []), Migration(2, "b", []), Migration(5, "c", [])]
+    assert [m.version for m in migrate.pending(migrations, {2})] == [1, 5]
+    assert migrate.pending(migrations, {1, 2, 5}) == []
+
+def test_pending_rejects_out_of_order_versions():
+    with pytest.raises(ValueError):
+        migrate.pending([Migration(2, "b", []), Migration(1, "a", [])], set())
+
+def test_migrations_create_every_index_init_db_creates():
+    # A database migrated forward must end up with the same indexes as a fresh one
+    pattern = re.compile(r"CREATE (?:UNIQUE )?INDEX (\w+)")
+    fresh = set(pattern.findall(inspect.getsource(init_db)))
+    migrated = {name for m in MIGRATIONS for step in m.steps if isinstance(step, str)
+                for name in pattern.findall(step)}
+    assert fresh == migrated
+
+def test_hot_queries_build():
+    queries = migrate.hot_queries()
+    assert "feed" in queries and "notifications" in queries
+    assert all("SELECT" in sql for sql in queries.values())
+
+class _CatalogCursor:
+    """Answers the data dictionary queries of migrate.matches_existing."""
+
+    def __init__(self, indexes=None, index_columns=None, objects=None, table_columns=None):
+        self.answers = {"user_indexes": indexes or [], "user_ind_columns": index_columns or [],
+                        "user_objects": objects or [], "user_tab_columns": table_columns or []}
+        self.rows = []
+
+    def execute(self, sql, params=()):
+        self.rows = next(rows for view, rows in self.answers.items() if f"FROM {view} " in sql)
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def fetchall(self):
+        return self.rows
+
+def test_existing_index_must_match_to_count_as_applied():
+    step = "CREATE INDEX ix_posts_created ON posts (created_at, id)"
+    same = _CatalogCursor(indexes=[("POSTS", "NONUNIQUE")], index_columns=[("CREATED_AT",), ("ID",)])
+    assert migrate.matches_existing(same, step)
+    other_columns = _CatalogCursor(indexes=[("POSTS", "NONUNIQUE")], index_columns=[("AUTHOR_ID",)])
+    assert not migrate.matches_existing(other_columns, step)
+    other_table = _CatalogCursor(indexes=[("LIKES", "NONUNIQUE")], index_columns=[("CREATED_AT",), ("ID",)])
+    assert not migrate.matches_existing(other_table, step)
+
+def test_existing_table_must_have_the_columns():
+    step = """
+        CREATE TABLE cache_invalidations (
+            id NUMBER GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+            cache_name VARCHAR2(50) NOT NULL,
+            cache_key VARCHAR2(255) NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )"""
+    columns = [("ID",), ("CACHE_NAME",), ("CACHE_KEY",), ("CREATED_AT",)]
+    assert migrate.matches_existing(_CatalogCursor(objects=[("TABLE",)], table_columns=columns), step)
+    assert not migrate.matches_existing(_CatalogCursor(objects=[("VIEW",)], table_columns=columns), step)
+    assert not migrate.matches_existing(_CatalogCursor(objects=[("TABLE",)], table_columns=columns[:2]), step)
+
+def test_main_exits_non_zero_on_failure(monkeypatch):
+    def refuse(**kwargs):
+        raise RuntimeError("connection refused")
+
+    monkeypatch.setattr(migrate.oracledb, "connect", refuse)
+    monkeypatch.setattr("sys.argv", ["migrate"])
+    with pytest.raises(SystemExit) as exc:
+        migrate.main()
+    assert exc.value.code == 1
@@ -0,0 +1,145 @@
+# backend/tests/test_notifications.py
+import queue
+import uuid
+from datetime import timedelta
+from app.core import database, notification_queue, sqlite_db
+from app.core.config import settings
+from app.crud import notification as notif_crud
+from app.crud.sqlite import notification_delivery as sqlite_delivery
+
+def test_unread_count_and_mark_all_read(client, random_user, other_user):
+    post_id = client.post("/api/v1/posts/", json={"content": "Notify me"}, headers=random_user["headers"]).json()["id"]
+    client.post(f"/api/v1/posts/{post_id}/like", headers=other_user["headers"])
+    client.post(f"/api/v1/posts/{post_id}/comments", json={"content": "hi"}, headers=other_user["headers"])
+    notification_queue.flush()  # written behind the request
+
+    count = client.get("/api/v1/notifications/unread-count", headers=random_user["headers"]).json()["count"]
+    assert count >= 2
+
+    # Watermark at the older notification leaves the newest one unread
+    notifications = client.get("/api/v1/notifications/", headers=random_user["headers"]).json()["notifications"]
+    res = client.post("/api/v1/notifications/mark-all-read", json={"upTo": notifications[1]["seq"]}, headers=random_user["headers"])
+    assert res.status_code == 200
+    assert client.get("/api/v1/notifications/unread-count", headers=random_user["headers"]).json()["count"] == 1
+
+    client.post("/api/v1/notifications/mark-all-read", headers=random_user["headers"])
+    assert client.get("/api/v1/notifications/unread-count", headers=random_user["headers"]).json()["count"] == 0
+
+def test_activity_after_the_watermark_stays_unread(client, random_user, other_user, third_user):
+    post_id = client.post("/api/v1/posts/", json={"content": "Watermark"}, headers=random_user["headers"]).json()["id"]
+    client.post(f"/api/v1/posts/{post_id}/like", headers=other_user["headers"])
+    client.post(f"/api/v1/posts/{post_id}/comments", json={"content": "hi"}, headers=other_user["headers"])
+    notification_queue.flush()
+    seen = client.get("/api/v1/notifications/", headers=random_user["headers"]).json()["notifications"]
+
+    # The like coalesces into the row the client has already shown
+    client.post(f"/api/v1/posts/{post_id}/like", headers=third_user["headers"])
+    notification_queue.flush()
+    client.post("/api/v1/notifications/mark-all-read", json={"upTo": seen[0]["seq"]}, headers=random_user["headers"])
+
+    notifications = client.get("/api/v1/notifications/", headers=random_user["headers"]).json()["notifications"]
+    assert [(n["type"], n["read"]) for n in notifications[:2]] == [("LIKE", False), ("COMMENT", True)]
+
+def test_pages_follow_the_sequence(client, random_user, other_user):
+    post_id = client.post("/api/v1/posts/", json={"content": "Pages"}, headers=random_user["headers"]).json()["id"]
+    for i in range(3):
+        client.post(f"/api/v1/posts/{post_id}/comments", json={"content": f"c{i}"}, headers=other_user["headers"])
+    notification_queue.flush()
+
+    first = client.get("/api/v1/notifications/?limit=2", headers=random_user["headers"]).json()
+    second = client.get(f"/api/v1/notifications/?limit=2&cursor={first['nextCursor']}", headers=random_user["headers"]).json()
+    seqs = [n["seq"] for n in first["notifications"] + second["notifications"]]
+    assert len(seqs) >= 3 and seqs == sorted(set(seqs), reverse=True)  # no repeats across pages
+    assert client.get("/api/v1/notifications/?cursor=bogus", headers=random_user["headers"]).status_code == 400
+
+def test_writer_batches_by_size(monkeypatch):
+    monkeypatch.setattr(settings, "NOTIFICATION_BATCH_SIZE", 3)
+    q = queue.Queue()
+    for i in range(5):
+        q.put((f"n{i}",))
+    assert len(notification_queue._next_batch(q)) == 3
+    assert len(notification_queue._next_batch(q)) == 2
+    assert notification_queue._next_batch(q) == []
+
+def test_commit_hooks_are_per_cursor():
+    cursor, other = object(), object()
+    database.on_commit(cursor, lambda: None)
+    assert len(database.pop_commit_hooks(cursor)) == 1
+    assert database.pop_commit_hooks(cursor) == []
+    assert database.pop_commit_hooks(other) == []
+
+def test_likes_coalesce_into_one_notification(client, random_user, other_user, third_user):
+    post_id = client.post("/api/v1/posts/", json={"content": "Viral"}, headers=random_user["headers"]).json()["id"]
+    client.post(f"/api/v1/posts/{post_id}/like", headers=other_user["headers"])
+    client.post(f"/api/v1/posts/{post_id}/like", headers=third_user["headers"])
+    notification_queue.flush()
+
+    notifications = client.get("/api/v1/notifications/", headers=random_user["headers"]).json()["notifications"]
+    likes = [n for n in notifications if n["type"] == "LIKE" and n["post"]["id"] == post_id]
+    assert len(likes) == 1
+    assert likes[0]["actorCount"] == 2
+    assert [a["username"] for a in likes[0]["actors"]] == [third_user["username"], other_user["username"]]
+
+def test_actor_count_counts_each_actor_once():
+    conn = sqlite_db.connect(":memory:")
+    sqlite_db.create_schema(conn)
+    owner, a, b, c, d = (str(uuid.UUID(int=i)) for i in range(5))
+    conn.executemany(
+        "INSERT INTO users (id, email, username, password_hash) VALUES (?, ?, ?, 'x')",
+        [(i, f"{i}@example.com", i) for i in (owner, a, b, c, d)],
+    )
+    cursor = conn.cursor()
+    # `a` drops out of the three recent actors before acting again
+    actors = [a, b, c, d, a]
+    rows = [(f"n{n}", "FOLLOW", owner, actor, None, None, f"FOLLOW:{owner}::1") for n, actor in enumerate(actors)]
+    written, failed = sqlite_delivery.write(cursor, rows)
+
+    assert len(written) == 5 and failed == []
+    assert cursor.execute("SELECT actor_count, recent_actor_ids FROM notifications").fetchall() == [(4, f"{a},{d},{c}")]
+
+def test_failed_events_record_no_actor_and_old_actors_are_pruned():
+    conn = sqlite_db.connect(":memory:")
+    sqlite_db.create_schema(conn)
+    owner, actor = str(uuid.UUID(int=0)), str(uuid.UUID(int=1))
+    conn.executemany(
+        "INSERT INTO users (id, email, username, password_hash) VALUES (?, ?, ?, 'x')",
+        [(i, f"{i}@example.com", i) for i in (owner, actor)],
+    )
+    cursor = conn.cursor()
+    deleted_post = ("n1", "LIKE", owner, actor, "deleted-post", None, f"LIKE:{owner}:deleted-post:1")
+    written, failed = sqlite_delivery.write(cursor, [deleted_post])
+    assert written == [] and len(failed) == 1
+    assert cursor.execute("SELECT COUNT(*) FROM notification_actors").fetchone() == (0,)
+
+    cursor.execute(
+        "INSERT INTO notification_actors (group_key, actor_id, created_at) VALUES ('LIKE:old', ?, ?)",
+        (actor, sqlite_db.now() - timedelta(seconds=3 * settings.NOTIFICATION_COALESCE_WINDOW_SECONDS)),
+    )
+    assert sqlite_delivery.prune_actors(cursor) == 1
+
+def test_group_key_only_for_coalesced_types():
+    assert notif_crud._group_key("LIKE", "u1", "p1") == notif_crud._group_key("LIKE", "u1", "p1")
+    assert notif_crud._group_key("LIKE", "u1", "p1") != notif_crud._group_key("LIKE", "u1", "p2")
+    assert notif_crud._group_key("COMMENT", "u1", "p1") is None
+
+def test_block_written_outbox_events_only_wake_the_relay(monkeypatch):
+    monkeypatch.setattr(notification_queue, "_queue", None)
+    monkeypatch.setattr(notification_queue, "_writer", object())  # outbox mode
+    binds = notif_crud._notification_binds("LIKE", "u2", "p1")
+    assert binds["notif_outbox"] == 1
+
+    cursor = object()
+    notif_crud._submit_notification(cursor, binds, "u1")
+    assert database.pop_commit_hooks(cursor) == [notification_queue._wake.set]
+    notif_crud._submit_notification(cursor, binds, "u2")  # liking one's own post
+    assert database.pop_commit_hooks(cursor) == []
+
+def test_events_are_queued_by_default(client):
+    assert client.get("/health/notifications").json()["mode"] == "queue"
+
+def test_offer_after_the_writer_stopped_spills_to_the_outbox(monkeypatch):
+    spilled = []
+    monkeypatch.setattr(notification_queue, "_spill", spilled.extend)
+    stopped = queue.Queue()  # not the running writer's queue
+    notification_queue._offer(stopped, ("n1",))
+    assert spilled == [("n1",)] and stopped.empty()
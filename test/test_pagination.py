@@ -0,0 +1,31 @@
+# backend/tests/test_pagination.py
+from datetime import datetime
+import pytest
+from app.core.pagination import PageParams, encode_cursor, decode_cursor, keyset_filter, split_page
+
+def test_cursor_round_trip_keeps_microseconds():
+    created_at = datetime(2025, 1, 2, 3, 4, 5, 678901)
+    token = encode_cursor(created_at, "post-1")
+    assert decode_cursor(token) == ("2025-01-02 03:04:05.678901", "post-1")
+
+@pytest.mark.parametrize("token", ["garbage", "W10", encode_cursor(datetime.now(), "x")[:-3]])
+def test_decode_cursor_rejects_malformed(token):
+    with pytest.raises(ValueError):
+        decode_cursor(token)
+
+def test_keyset_filter_first_page_has_no_predicate():
+    assert keyset_filter("p.created_at", "p.id", PageParams(20, None)) == ("", {})
+
+def test_keyset_filter_binds_last_seen_key():
+    sql, params = keyset_filter("p.created_at", "p.id", PageParams(20, ("2025-01-01 00:00:00.000000", "abc")))
+    assert "p.id < :after_id" in sql
+    assert params == {"after_ts": "2025-01-01 00:00:00.000000", "after_id": "abc"}
+
+def test_split_page_uses_extra_row_as_has_more_marker():
+    rows = [(datetime(2025, 1, 1, 0, 0, i), f"id{i}") for i in (3, 2, 1)]
+    page, next_cursor = split_page(rows, 2, key=lambda row: row)
+    assert page == rows[:2]
+    assert decode_cursor(next_cursor) == ("2025-01-01 00:00:02.000000", "id2")
+
+    page, next_cursor = split_page(rows, 3, key=lambda row: row)
+    assert page == rows and next_cursor is None
@@ -1,4 +1,6 @@
 # backend/tests/test_posts.py
+import json
+from app.core.database import PoolTimeoutError
 
 def test_create_post(client, random_user):
     payload = {
@@ -17,11 +19,12 @@ def test_get_feed(client, random_user):
     response = client.get("/api/v1/posts/", headers=random_user["headers"])
     assert response.status_code == 200
     data = response.json()
-    assert isinstance(data, list)
-    assert len(data) > 0
+    assert isinstance(data["posts"], list)
+    assert len(data["posts"]) > 0
+    assert "nextCursor" in data
     
     # Check structure
-    first_post = data[0]
+    first_post = data["posts"][0]
     assert "content" in first_post
     assert "author" in first_post
     assert "username" in first_post["author"]
@@ -39,4 +42,103 @@ def test_like_post(client, random_user):
     # 3. Unlike it (Toggle)
     unlike_res = client.post(f"/api/v1/posts/{post_id}/like", headers=random_user["headers"])
     assert unlike_res.status_code == 200
-    assert unlike_res.json()["liked"] is False
\ No newline at end of file
+    assert unlike_res.json()["liked"] is False
+
+def test_put_and_delete_like_are_idempotent(client, random_user):
+    me = client.get("/api/v1/auth/me", headers=random_user["headers"]).json()
+    post_id = client.post("/api/v1/posts/", json={"content": "Like me twice"}, headers=random_user["headers"]).json()["id"]
+
+    for _ in range(2):
+        res = client.put(f"/api/v1/posts/{post_id}/like", headers=random_user["headers"])
+        assert res.status_code == 200 and res.json()["liked"] is True
+    posts = client.get(f"/api/v1/users/{me['id']}/posts").json()["posts"]
+    assert next(p for p in posts if p["id"] == post_id)["_count"]["likes"] == 1
+
+    for _ in range(2):
+        res = client.delete(f"/api/v1/posts/{post_id}/like", headers=random_user["headers"])
+        assert res.status_code == 200 and res.json()["liked"] is False
+
+    assert client.put("/api/v1/posts/no-such-post/like", headers=random_user["headers"]).status_code == 404
+
+def test_feed_pagination(client, random_user):
+    for i in range(2):
+        client.post("/api/v1/posts/", json={"content": f"Page me {i}"}, headers=random_user["headers"])
+
+    first = client.get("/api/v1/posts/", params={"limit": 1}).json()
+    assert len(first["posts"]) == 1
+    assert first["nextCursor"]
+
+    second = client.get("/api/v1/posts/", params={"limit": 1, "cursor": first["nextCursor"]}).json()
+    assert second["posts"][0]["id"] != first["posts"][0]["id"]
+
+def test_feed_rejects_bad_cursor(client):
+    response = client.get("/api/v1/posts/", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+def test_like_updates_counter(client, random_user):
+    me = client.get("/api/v1/auth/me", headers=random_user["headers"]).json()
+    post_id = client.post("/api/v1/posts/", json={"content": "Count me"}, headers=random_user["headers"]).json()["id"]
+    client.post(f"/api/v1/posts/{post_id}/like", headers=random_user["headers"])
+
+    posts = client.get(f"/api/v1/users/{me['id']}/posts").json()["posts"]
+    liked = next(p for p in posts if p["id"] == post_id)
+    assert liked["_count"] == {"likes": 1, "comments": 0}
+
+def test_comment_previews_and_pagination(client, random_user):
+    post_id = client.post("/api/v1/posts/", json={"content": "Discuss"}, headers=random_user["headers"]).json()["id"]
+    for i in range(5):
+        client.post(f"/api/v1/posts/{post_id}/comments", json={"content": f"c{i}"}, headers=random_user["headers"])
+
+    feed = client.get("/api/v1/posts/").json()["posts"]
+    post = next(p for p in feed if p["id"] == post_id)
+    assert [c["content"] for c in post["comments"]] == ["c2", "c3", "c4"]
+    assert post["_count"]["comments"] == 5
+
+    first = client.get(f"/api/v1/posts/{post_id}/comments", params={"limit": 3}).json()
+    rest = client.get(f"/api/v1/posts/{post_id}/comments", params={"limit": 3, "cursor": first["nextCursor"]}).json()
+    assert [c["content"] for c in first["comments"] + rest["comments"]] == ["c0", "c1", "c2", "c3", "c4"]
+    assert rest["nextCursor"] is None
+
+def test_home_timeline_follows_authors(client, random_user, other_user):
+    other = client.get("/api/v1/auth/me", headers=other_user["headers"]).json()
+    client.post(f"/api/v1/users/{other['id']}/follow", headers=random_user["headers"])
+    post_id = client.post("/api/v1/posts/", json={"content": "For my followers"}, headers=other_user["headers"]).json()["id"]
+
+    timeline = client.get("/api/v1/posts/timeline", headers=random_user["headers"]).json()
+    assert post_id in [p["id"] for p in timeline["posts"]]
+
+    # Unfollowing trims the author's posts back out
+    client.post(f"/api/v1/users/{other['id']}/follow", headers=random_user["headers"])
+    timeline = client.get("/api/v1/posts/timeline", headers=random_user["headers"]).json()
+    assert post_id not in [p["id"] for p in timeline["posts"]]
+
+def test_feed_conditional_get(client, random_user):
+    client.post("/api/v1/posts/", json={"content": "Cache me"}, headers=random_user["headers"])
+    first = client.get("/api/v1/posts/")
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+
+    again = client.get("/api/v1/posts/", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.content == b""
+
+def test_export_streams_ndjson(client, random_user):
+    me = client.get("/api/v1/auth/me", headers=random_user["headers"]).json()
+    response = client.get(f"/api/v1/users/{me['id']}/export", headers=random_user["headers"])
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert {"post"} <= {r["type"] for r in records}
+
+def test_export_other_user_forbidden(client, random_user):
+    response = client.get("/api/v1/users/someone-else/export", headers=random_user["headers"])
+    assert response.status_code == 403
+
+def test_export_without_a_free_connection_is_503(client, random_user, monkeypatch):
+    def no_connection():
+        raise PoolTimeoutError("pool exhausted")
+
+    monkeypatch.setattr("app.api.v1.endpoints.users.get_db_connection", no_connection)
+    me = client.get("/api/v1/auth/me", headers=random_user["headers"]).json()
+    response = client.get(f"/api/v1/users/{me['id']}/export", headers=random_user["headers"])
+    assert response.status_code == 503
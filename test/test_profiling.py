@@ -0,0 +1,48 @@
+# backend/tests/test_profiling.py
+import threading
+import time
+from app.core import profiling
+from app.core.config import settings
+from app.core.http_cache import render_json
+
+def _phases(header):
+    return {entry.split(";")[0].strip() for entry in header.split(",")}
+
+def test_server_timing_breaks_down_the_request(client, random_user):
+    response = client.get(f"/api/v1/users/{random_user['username']}/posts", headers=random_user["headers"])
+    assert response.status_code == 200
+    assert {"sql", "json", "total"} <= _phases(response.headers["server-timing"])
+    response = client.get("/api/v1/auth/me", headers=random_user["headers"])
+    assert {"auth", "total"} <= _phases(response.headers["server-timing"])
+
+def test_profile_token_writes_collapsed_stacks(client, random_user, monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "PROFILING_ENABLED", True)
+    monkeypatch.setattr(settings, "PROFILE_TOKEN", "secret")
+    monkeypatch.setattr(settings, "PROFILE_DIR", str(tmp_path))
+    headers = {**random_user["headers"], "X-Profile-Token": "secret"}
+    response = client.get("/api/v1/posts/", headers=headers)
+    assert 'profile;desc="GET_api_v1_posts.folded"' in response.headers["server-timing"]
+    # A wrong token is just an ordinary request
+    response = client.get("/api/v1/posts/", headers={**random_user["headers"], "X-Profile-Token": "guess"})
+    assert "profile" not in response.headers["server-timing"]
+
+def test_sampler_records_app_stacks(monkeypatch):
+    monkeypatch.setattr(settings, "PROFILE_INTERVAL_MS", 1)
+    stop = threading.Event()
+    data = [{"id": i, "content": "x" * 50} for i in range(2000)]
+
+    def busy():
+        while not stop.is_set():
+            render_json(data)
+
+    worker = threading.Thread(target=busy)
+    worker.start()
+    profile = profiling.Profile()
+    profiling._sampler.attach(profile)
+    time.sleep(0.1)
+    profiling._sampler.detach(profile)
+    stop.set()
+    worker.join()
+    lines = profile.collapsed().splitlines()
+    assert any("app.core.http_cache:render_json" in line for line in lines)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
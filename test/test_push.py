@@ -0,0 +1,76 @@
+# backend/tests/test_push.py
+import asyncio
+from fastapi import HTTPException
+from app.api.v1.endpoints import notifications
+from app.core import push
+from app.core.config import settings
+
+def test_published_events_reach_only_the_recipient():
+    async def main():
+        mine, other = push.subscribe("u1"), push.subscribe("u2")
+        try:
+            push.publish("u1", push.make_event("LIKE", "u3", "p1", None))
+            event = await asyncio.wait_for(mine.queue.get(), 1)
+            await asyncio.sleep(0)
+            return event, other.queue.qsize()
+        finally:
+            push.unsubscribe(mine)
+            push.unsubscribe(other)
+
+    event, other_pending = asyncio.run(main())
+    assert event == {"type": "LIKE", "creatorId": "u3", "postId": "p1", "commentId": None}
+    assert other_pending == 0
+
+def test_slow_subscriber_gets_overflow_marker(monkeypatch):
+    monkeypatch.setattr(settings, "PUSH_BUFFER_SIZE", 2)
+
+    async def main():
+        sub = push.subscribe("slow")
+        try:
+            for i in range(5):
+                push.publish("slow", {"n": i})
+            await asyncio.sleep(0.01)
+            return [sub.queue.get_nowait() for _ in range(sub.queue.qsize())]
+        finally:
+            push.unsubscribe(sub)
+
+    assert asyncio.run(main()) == [{"n": 0}, {"n": 1}, push.OVERFLOW]
+
+def _stream_while_busy(monkeypatch, verify):
+    """Runs the SSE stream while events keep arriving; returns what it sent."""
+    monkeypatch.setattr(settings, "PUSH_HEARTBEAT_SECONDS", 0.05)
+    monkeypatch.setattr(notifications, "verify_token", verify)
+
+    async def collect(stream):
+        return [chunk async for chunk in stream]
+
+    async def main():
+        async def publish_forever():
+            while True:
+                push.publish("busy", {"n": 1})
+                await asyncio.sleep(0.005)
+
+        publisher = asyncio.create_task(publish_forever())
+        try:
+            return await asyncio.wait_for(collect(notifications._event_stream("busy", "token")), 2)
+        finally:
+            publisher.cancel()
+
+    return asyncio.run(main())
+
+def test_busy_stream_closes_when_the_session_is_revoked(monkeypatch):
+    answers = iter(["busy"])
+
+    async def verify(token):
+        return next(answers, None)
+
+    sent = _stream_while_busy(monkeypatch, verify)
+    assert sent.count(": heartbeat\n\n") == 1
+    assert any(chunk.startswith("event: notification") for chunk in sent)
+
+def test_stream_closes_when_the_session_cannot_be_checked(monkeypatch):
+    async def verify(token):
+        raise HTTPException(status_code=503, detail="Database busy, try again")
+
+    sent = _stream_while_busy(monkeypatch, verify)
+    assert ": heartbeat\n\n" not in sent
@@ -0,0 +1,30 @@
+# backend/tests/test_repository.py
+import importlib
+import inspect
+from datetime import datetime
+import pytest
+from app import repository
+from app.core import sqlite_db
+
+@pytest.mark.parametrize("name", repository.MODULES)
+def test_sqlite_module_matches_oracle_module(name):
+    oracle = importlib.import_module(f"app.crud.{name}")
+    sqlite = importlib.import_module(f"app.crud.sqlite.{name}")
+    for attr, fn in vars(oracle).items():
+        if attr.startswith("_") or not inspect.isfunction(fn) or fn.__module__ != oracle.__name__:
+            continue
+        other = getattr(sqlite, attr, None)
+        assert other is not None, f"app.crud.sqlite.{name} has no {attr}"
+        assert inspect.signature(other) == inspect.signature(fn), attr
+        assert inspect.iscoroutinefunction(other) == inspect.iscoroutinefunction(fn), attr
+
+def test_sqlite_round_trips_timestamps():
+    conn = sqlite_db.connect(":memory:")
+    sqlite_db.create_schema(conn)
+    created = datetime(2024, 5, 6, 7, 8, 9, 123456)
+    conn.execute(
+        "INSERT INTO users (id, email, username, password_hash, created_at) VALUES ('u', 'e', 'n', 'h', ?)",
+        (created,),
+    )
+    assert conn.execute("SELECT created_at FROM users").fetchone() == (created,)
+    conn.close()
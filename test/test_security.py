@@ -0,0 +1,35 @@
+# backend/tests/test_security.py
+import asyncio
+import pytest
+from fastapi import HTTPException
+from app.core import security
+from app.core.config import settings
+
+@pytest.fixture
+def fast_bcrypt(monkeypatch):
+    monkeypatch.setattr(settings, "BCRYPT_ROUNDS", 4)
+
+def test_async_hash_and_verify_round_trip(fast_bcrypt):
+    async def main():
+        hashed = await security.get_password_hash_async("s3cret")
+        return hashed, await security.verify_password_async("s3cret", hashed), await security.verify_password_async("nope", hashed)
+
+    hashed, ok, bad = asyncio.run(main())
+    assert ok is True and bad is False
+    assert hashed.startswith("$2b$04$")
+    assert security.password_hasher_stats()["verify"]["count"] >= 2
+
+def test_needs_rehash_when_cost_changes(fast_bcrypt, monkeypatch):
+    hashed = security.get_password_hash("pw")
+    assert not security.needs_rehash(hashed)
+    monkeypatch.setattr(settings, "BCRYPT_ROUNDS", 5)
+    assert security.needs_rehash(hashed)
+
+def test_malformed_hash_never_matches():
+    assert security.verify_password("pw", "!") is False
+
+def test_queue_limit_returns_503(fast_bcrypt, monkeypatch):
+    monkeypatch.setattr(settings, "PASSWORD_HASH_MAX_PENDING", 0)
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(security.get_password_hash_async("pw"))
+    assert exc.value.status_code == 503
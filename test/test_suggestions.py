@@ -0,0 +1,53 @@
+# backend/tests/test_suggestions.py
+import asyncio
+from app import repository
+from app.core import suggestions
+from app.core.database import get_db_connection
+
+def _refresh():
+    assert suggestions.refresh()
+
+def _me(client, user):
+    return client.get("/api/v1/auth/me", headers=user["headers"]).json()
+
+def _suggested_ids(client, user):
+    res = client.get("/api/v1/users/suggestions", headers=user["headers"])
+    assert res.status_code == 200
+    return [s["id"] for s in res.json()]
+
+def test_friend_of_friend_is_suggested_first(client, random_user, other_user, third_user):
+    me, friend, friend_of_friend = (_me(client, u) for u in (random_user, other_user, third_user))
+    client.put(f"/api/v1/users/{friend['id']}/follow", headers=random_user["headers"])
+    client.put(f"/api/v1/users/{friend_of_friend['id']}/follow", headers=other_user["headers"])
+    _refresh()
+
+    suggested = _suggested_ids(client, random_user)
+    assert suggested[0] == friend_of_friend["id"]
+    assert friend["id"] not in suggested and me["id"] not in suggested
+
+def test_following_a_suggestion_removes_it(client, random_user, third_user):
+    target = _me(client, third_user)
+    assert target["id"] in _suggested_ids(client, random_user)
+    client.put(f"/api/v1/users/{target['id']}/follow", headers=random_user["headers"])
+    assert target["id"] not in _suggested_ids(client, random_user)
+
+def test_users_without_precomputed_rows_get_popular_accounts(client, random_user):
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    # Stands in for an account created after the last refresh
+    suggested = asyncio.run(repository.suggestion.get_suggestions_async(cursor, "signed-up-since-refresh"))
+    cursor.close()
+    conn.close()
+    assert suggested
+    counts = [s["_count"]["followers"] for s in suggested]
+    assert counts == sorted(counts, reverse=True)
+
+def test_anonymous_users_get_a_sample(client, random_user):
+    res = client.get("/api/v1/users/suggestions")
+    assert res.status_code == 200
+    assert 0 < len(res.json()) <= 3
+    assert {"id", "name", "username", "image", "_count"} <= set(res.json()[0])
+
+def test_refresh_skips_lists_another_worker_just_computed(client, random_user):
+    _refresh()
+    assert not suggestions.refresh(max_age_seconds=3600)
@@ -0,0 +1,59 @@
+# backend/tests/test_tokens.py
+import asyncio
+from datetime import datetime, timedelta
+from fastapi import HTTPException
+from jose import jwt
+import pytest
+from app.core import deps
+from app.core.config import settings
+from app.core.database import PoolTimeoutError
+from app.core.security import create_access_token
+
+@pytest.fixture
+def versions(monkeypatch):
+    """Stands in for users.session_version lookups."""
+    current = {}
+
+    async def current_session_version(user_id):
+        return current.get(user_id)
+
+    monkeypatch.setattr(deps, "current_session_version", current_session_version)
+    monkeypatch.setattr(settings, "TOKEN_REVOCATION_ENABLED", True)
+    return current
+
+def verify(token):
+    return asyncio.run(deps.verify_token(token))
+
+def test_verified_token_is_cached(versions, monkeypatch):
+    versions["u1"] = 0
+    token = create_access_token({"sub": "u1", "sv": 0})
+    assert verify(token) == "u1"
+
+    # A cache hit must not decode the JWT again
+    monkeypatch.setattr(deps.jwt, "decode", lambda *a, **k: pytest.fail("decoded twice"))
+    assert verify(token) == "u1"
+
+def test_bumped_session_version_revokes_cached_token(versions):
+    versions["u2"] = 0
+    token = create_access_token({"sub": "u2", "sv": 0})
+    assert verify(token) == "u2"
+
+    versions["u2"] = 1
+    assert verify(token) is None
+
+def test_expired_and_forged_tokens_are_rejected(versions):
+    versions["u3"] = 0
+    expired = jwt.encode({"sub": "u3", "exp": datetime.utcnow() - timedelta(minutes=1)}, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    forged = jwt.encode({"sub": "u3"}, "not-the-secret", algorithm=settings.ALGORITHM)
+    assert verify(expired) is None
+    assert verify(forged) is None
+
+def test_busy_pool_on_version_lookup_is_503(monkeypatch):
+    async def no_connection(user_id):
+        raise PoolTimeoutError("pool exhausted")
+
+    monkeypatch.setattr(deps, "current_session_version", no_connection)
+    monkeypatch.setattr(settings, "TOKEN_REVOCATION_ENABLED", True)
+    with pytest.raises(HTTPException) as exc:
+        verify(create_access_token({"sub": "u4", "sv": 0}))
+    assert exc.value.status_code == 503
@@ -0,0 +1,18 @@
+# backend/tests/test_users.py
+
+def test_put_and_delete_follow_are_idempotent(client, random_user, other_user):
+    other = client.get("/api/v1/auth/me", headers=other_user["headers"]).json()
+    url = f"/api/v1/users/{other['id']}/follow"
+
+    for _ in range(2):
+        res = client.put(url, headers=random_user["headers"])
+        assert res.status_code == 200 and res.json()["following"] is True
+    profile = client.get(f"/api/v1/users/{other['username']}").json()
+    assert profile["_count"]["followers"] == 1
+
+    for _ in range(2):
+        res = client.delete(url, headers=random_user["headers"])
+        assert res.status_code == 200 and res.json()["following"] is False
+
+def test_follow_unknown_user_is_404(client, random_user):
+    assert client.put("/api/v1/users/no-such-user/follow", headers=random_user["headers"]).status_code == 404